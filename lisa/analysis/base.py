@@ -17,7 +17,12 @@
 
 import io
 import os
+import sys
 import inspect
+import importlib
+import hashlib
+import marshal
+import threading
 import abc
 import textwrap
 import base64
@@ -55,6 +60,78 @@ from lisa.datautils import _df_to
 import lisa.notebook
 
 
+_CACHED_FUNCTIONS = {}
+"""
+Mapping of ``(module, qualname)`` to the functions decorated with
+:meth:`TraceAnalysisBase.cache`.
+"""
+
+_CACHE_DEPS = threading.local()
+"""
+Thread-local stack of the dependencies collected for each cached function
+being computed.
+"""
+
+
+def _get_cache_deps_stack():
+    try:
+        return _CACHE_DEPS.stack
+    except AttributeError:
+        stack = []
+        _CACHE_DEPS.stack = stack
+        return stack
+
+
+@functools.lru_cache(maxsize=None)
+def _get_code_token(module, qualname):
+    """
+    Get a token identifying the code of a function decorated with
+    :meth:`TraceAnalysisBase.cache`, or ``None`` if the function cannot be
+    found.
+
+    The token is computed from the source code of the function and from the
+    events it uses. Since methods conventionally reuse the ``used_events`` of
+    the methods they call, this also captures changes in the event
+    requirements of their dependencies.
+    """
+    key = (module, qualname)
+    try:
+        f = _CACHED_FUNCTIONS[key]
+    except KeyError:
+        # The function may come from a module that has not been imported yet
+        # in this process.
+        try:
+            importlib.import_module(module)
+            f = _CACHED_FUNCTIONS[key]
+        except (ImportError, KeyError):
+            return None
+
+    raw_f = inspect.unwrap(f)
+    try:
+        code = inspect.getsource(raw_f).encode('utf-8')
+    except (OSError, TypeError):
+        code = marshal.dumps(raw_f.__code__)
+
+    # The used_events attribute is set by decorators applied on the outermost
+    # function, so we need to look it up from the class.
+    obj = sys.modules[module]
+    try:
+        for name in qualname.split('.'):
+            obj = getattr(obj, name)
+    except AttributeError:
+        events = None
+    else:
+        obj = inspect.unwrap(obj, stop=lambda x: hasattr(x, 'used_events'))
+        try:
+            events = sorted(obj.used_events.get_all_events())
+        except AttributeError:
+            events = None
+
+    h = hashlib.sha1(code)
+    h.update(repr(events).encode('utf-8'))
+    return h.hexdigest()
+
+
 class AnalysisHelpers(Loggable, abc.ABC):
     """
     Helper methods class for Analysis modules.
@@ -1192,6 +1269,12 @@ class TraceAnalysisBase(AnalysisHelpers):
         This will write the return data to the swap as well, so processing can be
         skipped completely when possible.
 
+        The cache entries are keyed on the source code and used events of the
+        function, so that they are automatically invalidated when the code
+        changes. The cached functions called while computing the data are
+        recorded as dependencies, and the entry is also invalidated if the
+        code of any of them changes.
+
         :param fmt: Format of the data to write to the cache. This will
             influence the extension of the cache file created. If ``disk-only``
             format is chosen, the data is not retained in memory and the path
@@ -1219,6 +1302,16 @@ class TraceAnalysisBase(AnalysisHelpers):
             path_param = parameter_names[1]
             ignored_kwargs.add(path_param)
 
+        key = (f.__module__, f.__qualname__)
+        _CACHED_FUNCTIONS[key] = f
+
+        def check_deps(deps):
+            return all(
+                (token := _get_code_token(module, qualname)) is None or
+                token == dep_token
+                for module, qualname, dep_token in deps
+            )
+
         @functools.wraps(f)
         def wrapper(self, *args, **kwargs):
             # Make some room for the argument we will fill later
@@ -1231,9 +1324,12 @@ class TraceAnalysisBase(AnalysisHelpers):
             kwargs = dict(params.arguments)
 
             trace = self.trace
+            code_token = _get_code_token(*key)
             spec = dict(
                 module=f.__module__,
                 func=f.__qualname__,
+                # Invalidate the cache when the code is modified
+                code=code_token,
                 # Include the trace window in the spec since that influences
                 # what the analysis was seeing
                 trace_state=trace.trace_state,
@@ -1246,6 +1342,7 @@ class TraceAnalysisBase(AnalysisHelpers):
                 }),
             )
             cache_desc = _CacheDataDesc(spec=spec, fmt=fmt)
+            deps_desc = _CacheDataDesc(spec=dict(spec, deps=True), fmt='json')
             cache = trace._cache
 
             def call_f():
@@ -1256,16 +1353,29 @@ class TraceAnalysisBase(AnalysisHelpers):
                         swap_path = None
                     kwargs[path_param] = swap_path
 
-                with measure_time() as measure:
-                    data = f(**kwargs)
+                deps_stack = _get_cache_deps_stack()
+                deps_stack.append(set())
+                try:
+                    with measure_time() as measure:
+                        data = f(**kwargs)
+                finally:
+                    deps = deps_stack.pop()
 
                 if memory_cache:
                     compute_cost = measure.exclusive_delta
                 else:
                     compute_cost = None
 
-                cache.insert(cache_desc, data, compute_cost=compute_cost, write_swap=True)
-                return data
+                # The dependencies are only useful to validate the data, so
+                # they are only written to the swap along with them.
+                cache.insert(
+                    cache_desc,
+                    data,
+                    compute_cost=compute_cost,
+                    write_swap=True,
+                    swap_companion=(deps_desc, sorted(map(list, deps))),
+                )
+                return (data, deps)
 
             if memory_cache:
                 try:
@@ -1275,10 +1385,23 @@ class TraceAnalysisBase(AnalysisHelpers):
                     # cached, as it will be stored in a parquet file and
                     # reloaded most likely as a polars LazyFrame.
                     data = cache.fetch(cache_desc)
+                    deps = set(map(tuple, cache.fetch(deps_desc)))
                 except KeyError:
-                    data = call_f()
+                    data, deps = call_f()
+                else:
+                    # The entry may have been computed by another process
+                    # running a different version of one of the dependencies.
+                    if not check_deps(deps):
+                        data, deps = call_f()
             else:
-                data = call_f()
+                data, deps = call_f()
+
+            # Record ourselves and our own dependencies in the dependencies of
+            # the caller.
+            deps_stack = _get_cache_deps_stack()
+            if deps_stack:
+                deps_stack[-1].update(deps)
+                deps_stack[-1].add((*key, code_token))
 
             return data
 
@@ -18,7 +18,7 @@
 """ Functions Analysis Module """
 import json
 import os
-from operator import itemgetter, attrgetter, mul
+from operator import attrgetter, mul
 from functools import reduce
 from itertools import chain
 from collections.abc import Mapping
@@ -46,6 +46,15 @@ class FunctionsAnalysis(TraceAnalysisBase):
 
     name = 'functions'
 
+    @property
+    @memoized
+    def _ksym_index(self):
+        """
+        :class:`_KsymIndex` of the symbols addresses from the
+        :class:`lisa.platforms.platinfo.PlatformInfo` attached to the trace.
+        """
+        return _KsymIndex(self.trace.plat_info['kernel']['symbols-address'])
+
     def df_resolve_ksym(self, df, addr_col, name_col='func_name', addr_map=None, exact=True):
         """
         Resolve the kernel function names.
@@ -57,11 +66,13 @@ class FunctionsAnalysis(TraceAnalysisBase):
         :param df: Dataframe to augment
         :type df: pandas.DataFrame
 
-        :param addr_col: Name of the column containing a kernel address.
-        :type addr_col: str
+        :param addr_col: Name of the column containing a kernel address. A
+            list of column names can be given to resolve them all at once.
+        :type addr_col: str or list(str)
 
-        :param name_col: Name of the column to create with symbol names
-        :param name_col: str
+        :param name_col: Name of the column to create with symbol names. If
+            ``addr_col`` is a list, this must be a list of the same length.
+        :param name_col: str or list(str)
 
         :param addr_map: If provided, the mapping of kernel addresses to symbol
             names. If missing, the symbols addresses from the
@@ -75,45 +86,36 @@ class FunctionsAnalysis(TraceAnalysisBase):
             resolve an instruction pointer that could point anywhere inside of
             a function (but before the starting address of the next function).
         :type exact: bool
+
+        The names are stored in a categorical column, and addresses that
+        cannot be resolved are left as ``NaN``.
         """
-        trace = self.trace
-        df = df.copy(deep=False)
+        if isinstance(addr_col, str):
+            addr_cols = [addr_col]
+            name_cols = [name_col]
+        else:
+            addr_cols = list(addr_col)
+            name_cols = list(name_col)
+            if len(addr_cols) != len(name_cols):
+                raise ValueError(f'addr_col and name_col must have the same length: {addr_cols} and {name_cols}')
 
-        # Names already resolved, we can just copy the address column to the
-        # name one
-        if not is_numeric_dtype(df[addr_col].dtype):
-            df[name_col] = df[addr_col]
-            return df
+        df = df.copy(deep=False)
 
         if addr_map is None:
-            addr_map = trace.plat_info['kernel']['symbols-address']
-
-        if exact:
-            df[name_col] = df[addr_col].map(addr_map)
-        # Not exact means the function addresses will be used as ranges, so
-        # we can find in which function any instruction point value is
+            index = None
         else:
-            # Sort by address, so that each consecutive pair of address
-            # constitue a range of address belonging to a given function.
-            addr_list = sorted(
-                addr_map.items(),
-                key=itemgetter(0)
-            )
-            bins, labels = zip(*addr_list)
-            # "close" the last bucket with the highest value possible of that column
-            max_addr = np.iinfo(df[addr_col].dtype).max
-            bins = list(bins) + [max_addr]
-            name_i = pd.cut(
-                df[addr_col],
-                bins=bins,
-                # Since our labels are not unique, we cannot pass it here
-                # directly. Instead, use an index into the labels list
-                labels=range(len(labels)),
-                # Include the left boundary and exclude the right one
-                include_lowest=True,
-                right=False,
-            )
-            df[name_col] = name_i.apply(lambda x: labels[x])
+            index = _KsymIndex(addr_map)
+
+        for addr_col, name_col in zip(addr_cols, name_cols):
+            # Names already resolved, we can just copy the address column to the
+            # name one
+            if not is_numeric_dtype(df[addr_col].dtype):
+                df[name_col] = df[addr_col]
+            else:
+                # Only lookup the index when needed, so that the symbols are
+                # not required for already-resolved names
+                index = self._ksym_index if index is None else index
+                df[name_col] = index.resolve(df[addr_col], exact=exact)
 
         return df
 
@@ -121,7 +123,7 @@ class FunctionsAnalysis(TraceAnalysisBase):
         df = self.trace.df_event(event)
         try:
             return self.df_resolve_ksym(df, *args, **kwargs)
-        except ConfigKeyError:
+        except ConfigKeyError as e:
             self.logger.warning(f'Missing symbol addresses, function names will not be resolved: {e}')
             return df
 
@@ -145,7 +147,7 @@ class FunctionsAnalysis(TraceAnalysisBase):
 
     @df_funcgraph.used_events
     @LoadTrackingAnalysis.df_cpus_signal.used_events
-    def _get_callgraph(self, tag_df=None, thread_root_functions=None):
+    def _df_callgraph_events(self, tag_df=None):
         entry_df = self.df_funcgraph(event='entry').copy(deep=False)
         entry_df['event'] = _CallGraph._EVENT.ENTRY
         exit_df = self.df_funcgraph(event='exit').copy(deep=False)
@@ -184,20 +186,26 @@ class FunctionsAnalysis(TraceAnalysisBase):
         if tag_df is not None:
             cpu = tag_df['__cpu']
             tag_df = tag_df.drop(columns=['__cpu'])
-            tag_df = pd.DataFrame(dict(
-                tags=tag_df.apply(pd.Series.to_dict, axis=1),
-                __cpu=cpu,
-            ))
+            tag_df = pd.DataFrame(
+                dict(
+                    tags=tag_df.to_dict('records'),
+                    __cpu=cpu,
+                ),
+                index=tag_df.index,
+            )
             tag_df['event'] = _CallGraph._EVENT.SET_TAG
             to_merge.append(tag_df)
 
-        df = df_merge(to_merge)
+        return df_merge(to_merge)
+
+    @_df_callgraph_events.used_events
+    def _get_callgraph(self, tag_df=None, thread_root_functions=None):
         return _CallGraph.from_df(
-            df,
+            self._df_callgraph_events(tag_df=tag_df),
             thread_root_functions=thread_root_functions
         )
 
-    @_get_callgraph.used_events
+    @_df_callgraph_events.used_events
     def df_calls(self, tag_df=None, thread_root_functions=None, normalize=True):
         """
         Return a :class:`pandas.DataFrame` with a row for each function call,
@@ -240,33 +248,21 @@ class FunctionsAnalysis(TraceAnalysisBase):
             properly return, for example functions triggering a context switch
             and returning to userspace.
         """
-        graph = self._get_callgraph(
-            tag_df=tag_df,
+        df = _CallGraph.df_from_df(
+            self._df_callgraph_events(tag_df=tag_df),
             thread_root_functions=thread_root_functions,
         )
+        df = df[df['listed']]
         metrics = _CallGraphNode._METRICS
 
-        def get_metric(node, metric):
-            val = node[metric]
-            if normalize:
-                return (node.cpu_capacity / PELT_SCALE) * val
-            else:
-                return val
+        if normalize:
+            scale = df['capacity'] / PELT_SCALE
+            df = df.assign(**{
+                metric: scale * df[metric]
+                for metric in metrics
+            })
 
-        return pd.DataFrame.from_records(
-            (
-                (
-                    node.entry_time, node.cpu, node.func_name, FrozenDict(node.tags), node.tagged_name,
-                    *(
-                        get_metric(node, metric)
-                        for metric in metrics
-                    )
-                )
-                for node in graph.all_nodes
-            ),
-            columns=['Time', 'cpu', 'function', 'tags', 'tagged_name'] + metrics,
-            index='Time',
-        )
+        return df[['cpu', 'function', 'tags', 'tagged_name', *metrics]]
 
     @df_calls.used_events
     def compare_with_traces(self, others, normalize=True, **kwargs):
@@ -427,6 +423,69 @@ class FunctionsAnalysis(TraceAnalysisBase):
         )
 
 
+class _KsymIndex:
+    """
+    Index of kernel symbols, used to resolve addresses into symbol names.
+
+    :param addr_map: Mapping of kernel addresses to symbol names.
+    :type addr_map: dict(int, str)
+
+    The addresses are kept in a sorted array so that resolving any number of
+    addresses is a single :func:`numpy.searchsorted` call.
+    """
+    def __init__(self, addr_map):
+        addrs = np.fromiter(addr_map.keys(), dtype='uint64', count=len(addr_map))
+        order = np.argsort(addrs, kind='stable')
+        self.addrs = addrs[order]
+
+        codes, categories = pd.factorize(
+            np.fromiter(addr_map.values(), dtype='object', count=len(addr_map))
+        )
+        self.codes = codes[order]
+        self.categories = categories
+
+        # Sentinel used when there is no symbol, so that lookups never go out
+        # of bounds. Its code is -1 so it resolves to NaN.
+        if not len(self.addrs):
+            self.addrs = np.array([np.iinfo('uint64').max], dtype='uint64')
+            self.codes = np.array([-1])
+
+    def resolve(self, addrs, exact=True):
+        """
+        Resolve addresses into symbol names.
+
+        :param addrs: Addresses to resolve.
+        :type addrs: pandas.Series
+
+        :param exact: If ``True``, only exact symbol addresses are resolved.
+            Otherwise, an address is resolved to the symbol with the closest
+            lower or equal address.
+        :type exact: bool
+
+        :returns: A categorical :class:`pandas.Series` with the same index as
+            ``addrs``.
+        """
+        values = addrs.to_numpy()
+        # Negative values and NaN cannot be the address of a symbol
+        found = values >= 0
+        values = np.where(found, values, 0).astype('uint64')
+
+        if exact:
+            i = np.searchsorted(self.addrs, values, side='left')
+            i = i.clip(max=len(self.addrs) - 1)
+            found &= self.addrs[i] == values
+        else:
+            i = np.searchsorted(self.addrs, values, side='right') - 1
+            found &= i >= 0
+
+        codes = np.where(found, self.codes[i.clip(min=0)], -1)
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=self.categories),
+            index=addrs.index,
+            name=addrs.name,
+        )
+
+
 class _CallGraph:
     class _EVENT(IntEnum):
         """
@@ -592,6 +651,324 @@ class _CallGraph:
             }
         )
 
+    @classmethod
+    def df_from_df(cls, df, thread_root_functions=None, ts_cols=('calltime', 'rettime')):
+        """
+        Columnar equivalent of :meth:`from_df`.
+
+        Rather than creating a :class:`_CallGraphNode` for each call, the call
+        tree of each CPU is computed with array operations on the whole event
+        stream, and returned as a :class:`pandas.DataFrame` with a row for each
+        call, in order of entry:
+
+            * ``cpu``: CPU of the call.
+            * ``function``: Name of the called function.
+            * ``capacity``: CPU capacity when the function was entered.
+            * ``parent``: Row number of the calling function, or ``-1`` for
+              toplevel calls.
+            * ``depth``: Depth in the call tree, starting at 1 for toplevel
+              calls.
+            * ``tags``: :class:`lisa.utils.FrozenDict` of tags, see
+              :attr:`_CallGraphNode.tags`.
+            * ``tagged_name``: See :attr:`_CallGraphNode.tagged_name`.
+            * ``cum_time`` and ``self_time``: see
+              :meth:`_CallGraphNode.__getitem__`.
+            * ``listed``: ``True`` if the call is part of
+              :attr:`_CallGraph.all_nodes`, ``False`` if it is part of another
+              logical thread or was folded into a recursive caller.
+
+        The index is the entry time of each call. Parameters are the same as
+        for :meth:`from_df`.
+        """
+        thread_root_functions = set(thread_root_functions) if thread_root_functions else set()
+        columns = ['cpu', 'function', 'capacity', 'parent', 'depth', 'tags', 'tagged_name', 'cum_time', 'self_time', 'listed']
+
+        dfs = []
+        offset = 0
+        for cpu, subdf in df.groupby('__cpu', observed=True, group_keys=False):
+            cpu_df = cls._df_from_cpu_df(
+                subdf,
+                thread_root_functions=thread_root_functions,
+                ts_cols=ts_cols,
+            )
+            cpu_df['parent'] = np.where(cpu_df['parent'] >= 0, cpu_df['parent'] + offset, -1)
+            offset += len(cpu_df)
+            dfs.append(cpu_df)
+
+        if dfs:
+            return pd.concat(dfs)
+        else:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='Time'))
+
+    @classmethod
+    def _df_from_cpu_df(cls, df, thread_root_functions, ts_cols):
+        event_enum = cls._EVENT
+        nr_rows = len(df)
+        event = df['event'].to_numpy()
+        is_entry = event == event_enum.ENTRY
+        is_exit = event == event_enum.EXIT
+
+        # Depth of the call stack after each event. Exiting from the root is
+        # ignored, so this is a cumulative sum clamped to 0.
+        step = is_entry.astype('int64') - is_exit.astype('int64')
+        depth = np.cumsum(step)
+        depth -= np.minimum(np.minimum.accumulate(depth), 0)
+        prev_depth = np.concatenate(([0], depth[:-1]))
+
+        # Each call is identified by the position of its entry event. The
+        # root of the call tree is an extra node at the end.
+        entry_pos = np.flatnonzero(is_entry)
+        nr_nodes = len(entry_pos)
+        root = nr_nodes
+        node_depth = depth[entry_pos]
+
+        # The innermost call at depth d before position p is the last call
+        # entered at depth d before p.
+        keys = node_depth * (nr_rows + 1) + entry_pos
+        key_order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[key_order]
+        def innermost(depth, pos):
+            if not nr_nodes:
+                return np.full(len(pos), root)
+            idx = np.searchsorted(sorted_keys, depth * (nr_rows + 1) + pos) - 1
+            return np.where(depth > 0, key_order[idx.clip(min=0)], root)
+
+        parent = innermost(node_depth - 1, entry_pos)
+
+        exit_pos = np.flatnonzero(is_exit & (prev_depth > 0))
+        exited = innermost(prev_depth[exit_pos], exit_pos)
+
+        func_names = df['func_name'].to_numpy() if 'func_name' in df.columns else np.full(nr_rows, None)
+        names = func_names[entry_pos]
+        valid = np.zeros(nr_nodes, dtype=bool)
+        valid[exited] = func_names[exit_pos] == names[exited]
+
+        times = df.index.to_numpy()
+        entry_time = times[entry_pos].astype('float64')
+        exit_time = np.full(nr_nodes, times[-1] if nr_rows else np.nan, dtype='float64')
+        if ts_cols is None:
+            exit_time[exited] = times[exit_pos]
+        else:
+            entry_ts, exit_ts = ts_cols
+            entry_time[exited] = df[entry_ts].to_numpy()[exit_pos] * 1e-9
+            exit_time[exited] = df[exit_ts].to_numpy()[exit_pos] * 1e-9
+
+        end_pos = np.full(nr_nodes, nr_rows)
+        end_pos[exited] = exit_pos
+        # Calls are numbered in preorder, so the descendants of a call are
+        # the calls numbered from node + 1 to last_desc
+        last_desc = np.searchsorted(entry_pos, end_pos) - 1
+
+        if 'capacity' in df.columns:
+            capacity = df['capacity'].where(event == event_enum.SET_CAPACITY)
+            capacity = capacity.ffill().fillna(PELT_SCALE).to_numpy()[entry_pos]
+        else:
+            capacity = np.full(nr_nodes, PELT_SCALE)
+
+        max_depth = node_depth.max() if nr_nodes else 0
+        depth_nodes = [
+            np.flatnonzero(node_depth == d)
+            for d in range(max_depth + 1)
+        ]
+
+        # Logical thread of each call, inherited from the parent unless the
+        # function is a thread root.
+        is_thread_root = np.isin(names, list(thread_root_functions))
+        thread = np.zeros(nr_nodes + 1, dtype='int64')
+        for nodes in depth_nodes[1:]:
+            thread[nodes] = np.where(is_thread_root[nodes], nodes + 1, thread[parent[nodes]])
+
+        # Recursive calls are folded into their recursive caller: a call that
+        # has a descendant calling the same function does not own the calls on
+        # the path to that descendant, but gets their other children instead.
+        codes, _ = pd.factorize(names)
+        code_order = np.lexsort((np.arange(nr_nodes), codes))
+        next_same = np.full(nr_nodes, nr_nodes)
+        same = codes[code_order][1:] == codes[code_order][:-1]
+        next_same[code_order[:-1][same]] = code_order[1:][same]
+        is_recursive = (codes >= 0) & (next_same <= last_desc)
+
+        keep_edge = np.ones(nr_nodes, dtype=bool)
+        extra_src = []
+        extra_dst = []
+        for node in np.flatnonzero(is_recursive).tolist():
+            start = node + 1
+            end = last_desc[node] + 1
+            target = codes[start:end] == codes[node]
+            nr_targets = np.concatenate(([0], np.cumsum(target)))
+            local_last_desc = last_desc[start:end] - start
+            on_path = target | (nr_targets[local_last_desc + 1] > nr_targets[1:])
+
+            local_parent = parent[start:end] - start
+            parent_is_node = local_parent < 0
+            parent_on_path = np.where(parent_is_node, False, on_path[local_parent.clip(min=0)])
+            expansion = ~on_path & (parent_is_node | parent_on_path)
+
+            keep_edge[start:end][parent_is_node & on_path] = False
+            dst = np.flatnonzero(expansion & ~parent_is_node) + start
+            extra_src.append(np.full(len(dst), node))
+            extra_dst.append(dst)
+
+        # Edges from each call to its expanded children
+        src = np.concatenate([parent[keep_edge], *extra_src]).astype('int64')
+        dst = np.concatenate([np.flatnonzero(keep_edge), *extra_dst]).astype('int64')
+        # Children of a call in the same logical thread. The others are
+        # considered as preempting the call.
+        child_edge = thread[src] == thread[dst]
+
+        delta = exit_time - entry_time
+        children_time = np.zeros(nr_nodes + 1)
+        np.add.at(children_time, src, delta[dst])
+        self_time = delta - children_time[:nr_nodes]
+        self_time[~valid] = np.nan
+
+        dst_depth = node_depth[dst]
+        edge_order = np.argsort(dst_depth, kind='stable')
+        edge_bounds = np.searchsorted(dst_depth[edge_order], np.arange(max_depth + 2))
+        def depth_edges(d):
+            edges = edge_order[edge_bounds[d]:edge_bounds[d + 1]]
+            return edges[child_edge[edges]]
+
+        listed = np.zeros(nr_nodes + 1, dtype=bool)
+        listed[root] = True
+        for d in range(1, max_depth + 1):
+            edges = depth_edges(d)
+            np.logical_or.at(listed, dst[edges], listed[src[edges]])
+
+        cum_time = self_time.copy()
+        children_cum_time = np.zeros(nr_nodes + 1)
+        for d in reversed(range(1, max_depth + 1)):
+            nodes = depth_nodes[d]
+            cum_time[nodes] += children_cum_time[nodes]
+            edges = depth_edges(d)
+            np.add.at(children_cum_time, src[edges], cum_time[dst[edges]])
+
+        tags = cls._get_cpu_tags(
+            df=df,
+            prev_depth=prev_depth,
+            innermost=innermost,
+            last_desc=last_desc,
+            src=src[child_edge],
+            dst=dst[child_edge],
+            nr_nodes=nr_nodes,
+        )
+        tagged_names = {}
+        def tagged_name(name, tags):
+            try:
+                return tagged_names[(name, tags)]
+            except KeyError:
+                tagged_name = _CallGraphNode.format_name(name, tags)
+                tagged_names[(name, tags)] = tagged_name
+                return tagged_name
+
+        return pd.DataFrame(
+            {
+                'cpu': df['__cpu'].to_numpy()[entry_pos],
+                'function': names,
+                'capacity': capacity,
+                'parent': np.where(parent == root, -1, parent),
+                'depth': node_depth,
+                'tags': tags,
+                'tagged_name': list(map(tagged_name, names, tags)),
+                'cum_time': cum_time,
+                'self_time': self_time,
+                'listed': listed[:nr_nodes],
+            },
+            index=pd.Index(entry_time, name='Time'),
+        )
+
+    @staticmethod
+    def _get_cpu_tags(df, prev_depth, innermost, last_desc, src, dst, nr_nodes):
+        """
+        Compute the tags of each call, as a list of
+        :class:`lisa.utils.FrozenDict`.
+
+        Tags of a call are inherited by all its descendants, and all its
+        callers that have the call in their
+        :attr:`_CallGraphNode.indirect_children`. The tags set on a call
+        override the inherited ones.
+        """
+        root = nr_nodes
+        no_tags = FrozenDict({})
+
+        is_tag = (df['event'] == _CallGraph._EVENT.SET_TAG).to_numpy()
+        if not is_tag.any():
+            return [no_tags] * nr_nodes
+
+        tag_pos = np.flatnonzero(is_tag)
+        tag_nodes = innermost(prev_depth[tag_pos], tag_pos).tolist()
+        own_tags = {}
+        for node, tags in zip(tag_nodes, df['tags'].to_numpy()[tag_pos]):
+            node_tags = own_tags.setdefault(node, {})
+            for tag, val in tags.items():
+                node_tags.setdefault(tag, set()).add(val)
+
+        def merge_tags(tags1, tags2):
+            return {
+                tag: tags1.get(tag, set()) | tags2.get(tag, set())
+                for tag in tags1.keys() | tags2.keys()
+            }
+
+        # Tags inherited from parents. The descendants of each tagged call
+        # form a contiguous range of calls, so we split the calls in segments
+        # that are covered by the same set of tagged calls.
+        ranges = [
+            (0, nr_nodes) if node == root else (node + 1, last_desc[node] + 1)
+            for node in own_tags.keys()
+        ]
+        bounds = np.unique([0, nr_nodes, *chain.from_iterable(ranges)])
+        segment = np.searchsorted(bounds, np.arange(nr_nodes), side='right') - 1
+        segment_tags = [{} for _ in bounds]
+        for (start, end), tags in zip(ranges, own_tags.values()):
+            for i in range(np.searchsorted(bounds, start), np.searchsorted(bounds, end)):
+                segment_tags[i] = merge_tags(segment_tags[i], tags)
+
+        # Tags inherited from indirect children, by walking up the children
+        # edges from each tagged call.
+        edge_order = np.argsort(dst, kind='stable')
+        sorted_dst = dst[edge_order]
+        sorted_src = src[edge_order]
+        def callers(node):
+            return sorted_src[
+                np.searchsorted(sorted_dst, node, side='left'):
+                np.searchsorted(sorted_dst, node, side='right')
+            ].tolist()
+
+        children_tags = {}
+        for node, tags in own_tags.items():
+            if node == root:
+                continue
+            seen = set()
+            to_visit = callers(node)
+            while to_visit:
+                caller = to_visit.pop()
+                if caller in seen or caller == root:
+                    continue
+                seen.add(caller)
+                children_tags[caller] = merge_tags(children_tags.get(caller, {}), tags)
+                to_visit.extend(callers(caller))
+
+        def freeze(tags):
+            return FrozenDict(
+                {
+                    tag: frozenset(vals)
+                    for tag, vals in tags.items()
+                },
+                deepcopy=False,
+            )
+
+        frozen_segment_tags = list(map(freeze, segment_tags))
+        tags = [frozen_segment_tags[i] for i in segment.tolist()]
+        for node in (children_tags.keys() | own_tags.keys()) - {root}:
+            tags[node] = freeze({
+                **merge_tags(
+                    segment_tags[segment[node]],
+                    children_tags.get(node, {}),
+                ),
+                **own_tags.get(node, {}),
+            })
+
+        return tags
 
 
 class _CallGraphNode(Mapping):
@@ -34,7 +34,7 @@ import polars as pl
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.utils import memoized, kwargs_forwarded_to, deprecate, order_as
 from lisa.datautils import df_filter_task_ids, series_rolling_apply, series_refit_index, df_refit_index, df_deduplicate, df_split_signals, df_add_delta, df_window, df_update_duplicates, df_combine_duplicates, SignalDesc
-from lisa.trace import requires_events, will_use_events_from, may_use_events, CPU, MissingTraceEventError
+from lisa.trace import requires_events, will_use_events_from, may_use_events, CPU, MissingTraceEventError, MissingMetadataError, OrTraceEventChecker
 from lisa.notebook import _hv_neutral, plot_signal, _hv_twinx
 from lisa._typeclass import FromString
 
@@ -261,28 +261,38 @@ class TasksAnalysis(TraceAnalysisBase):
     name = 'tasks'
 
 
-    @memoized
-    def _get_task_maps(self):
+    @may_use_events('task_rename', 'sched_switch')
+    @TraceAnalysisBase.df_method
+    def _df_task_maps(self):
         """
-        Give the mapping from PID to task names, and the opposite.
+        Compact table of the ``(name, pid)`` pairs of the tasks in the trace,
+        in appearance order.
 
-        The names or PIDs are listed in appearance order.
+        Only the ``comm`` and ``pid`` columns of the events are loaded. The
+        ``pid-comms`` metadata of the trace (see
+        :meth:`lisa.trace.TraceParserBase.get_metadata`) is used for the PIDs
+        that do not appear in any of these events, and on its own if none of
+        the events are available.
+
+        :returns: a :class:`polars.LazyFrame` with a ``name`` and ``pid``
+            column.
         """
         trace = self.trace.get_view(df_fmt='polars-lazyframe')
 
         mapping_df_list = []
         def _load(event, name_col, pid_col):
-            df = trace.df_event(event)
+            df = trace.df_event(event, columns=[name_col, pid_col])
             grouped = df.group_by(name_col, pid_col)
 
             # Get timestamp of first occurrences of each key/value combinations
             mapping_df = grouped.first().select(
                 'Time',
-                pid=pl.col(pid_col),
+                pid=pl.col(pid_col).cast(pl.Int64),
                 # Ensure we have a Categorical dtype, otherwise we might not be
                 # able to successfully concatenate a String and Categorical
-                # column
-                name=pl.col(name_col).cast(pl.Categorical),
+                # column. Going through String re-encodes columns that were
+                # already categorical in the StringCache used by the caller.
+                name=pl.col(name_col).cast(pl.String).cast(pl.Categorical),
             )
             mapping_df_list.append(mapping_df)
 
@@ -299,18 +309,53 @@ class TasksAnalysis(TraceAnalysisBase):
         load('sched_switch', 'prev_comm', 'prev_pid')
         load('sched_switch', 'next_comm', 'next_pid')
 
-        if not mapping_df_list:
+        try:
+            pid_comms = self.trace.get_metadata('pid-comms')
+        except MissingMetadataError:
+            pid_comms = {}
+
+        if not (mapping_df_list or pid_comms):
             missing = OrTraceEventChecker.from_events(events=missing)
             raise MissingTraceEventError(missing, available_events=trace.available_events)
 
-        df = pl.concat(mapping_df_list).sort('Time')
-        df = df.unique(
-            subset=['name', 'pid'],
-            keep='first',
-            maintain_order=True,
+        if mapping_df_list:
+            df = pl.concat(mapping_df_list).sort('Time')
+            df = df.unique(
+                subset=['name', 'pid'],
+                keep='first',
+                maintain_order=True,
+            )
+            df = df.select('name', 'pid')
+        else:
+            df = pl.LazyFrame(
+                schema=dict(name=pl.Categorical, pid=pl.Int64),
+            )
+
+        # The names found in the events are more accurate than the
+        # metadata, which only records one name per PID, so only use the
+        # metadata for the PIDs we do not know anything about.
+        meta_df = pl.LazyFrame(
+            dict(
+                name=list(pid_comms.values()),
+                pid=list(pid_comms.keys()),
+            ),
+            schema=dict(name=pl.String, pid=pl.Int64),
         )
-        df = df.select('name', 'pid')
+        meta_df = meta_df.join(df, on='pid', how='anti')
+        # Cast lazily so that the categories are created in the same
+        # StringCache as the ones of the events.
+        meta_df = meta_df.with_columns(pl.col('name').cast(pl.Categorical))
 
+        return pl.concat([df, meta_df])
+
+    @memoized
+    def _get_task_maps(self):
+        """
+        Give the mapping from PID to task names, and the opposite.
+
+        The names or PIDs are listed in appearance order.
+        """
+        df = self._df_task_maps(df_fmt='polars-lazyframe')
         with pl.StringCache():
             df = df.collect()
 
@@ -527,7 +572,7 @@ class TasksAnalysis(TraceAnalysisBase):
         :type tasks: list(int or str or tuple(int, str))
         """
         trace = self.trace
-        df = trace.df_event('sched_switch')[['next_pid', 'next_comm', '__cpu']]
+        df = trace.df_event('sched_switch', columns=['next_pid', 'next_comm', '__cpu'])
 
         task_ids = [self.get_task_id(task, update=False) for task in tasks]
         df = df_filter_task_ids(df, task_ids, pid_col='next_pid', comm_col='next_comm')
@@ -625,35 +670,26 @@ class TasksAnalysis(TraceAnalysisBase):
     @will_use_events_from('task_rename')
     @may_use_events('sched_wakeup_new')
     @TraceAnalysisBase.df_method
-    def _df_tasks_states(self, tasks=None):
+    def _df_tasks_timeline(self, rename=False):
         """
-        Compute tasks states for all tasks.
+        Task state updates of all tasks, sorted by PID and then by time.
 
-        :param tasks: If specified, states of these tasks only will be yielded.
-            The :class:`lisa.analysis.tasks.TaskID` must have a ``pid`` field specified,
-            since the task state is per-PID.
-        :type tasks: list(lisa.analysis.tasks.TaskID) or list(int)
+        Each task occupies a contiguous range of rows, so that the states of a
+        given PID can be sliced out using :meth:`_df_tasks_timeline_offsets`
+        instead of being recomputed from the whole trace.
+
+        :param rename: If ``True``, ``task_rename`` events are included as
+            :attr:`TaskState.TASK_RENAMED` updates.
+        :type rename: bool
         """
-        ######################################################
-        # A) Assemble the sched_switch and sched_wakeup events
-        ######################################################
         dtypes = dict(
             state=pl.Int64,
             comm=pl.Categorical,
         )
 
-        def filters_comm(task):
-            try:
-                return task.comm is not None
-            except AttributeError:
-                return isinstance(task, str)
-
         def state(value):
             return pl.lit(value, dtypes['state'])
 
-        # Add the rename events if we are interested in the comm of tasks
-        add_rename = any(map(filters_comm, tasks or []))
-
         trace = self.trace.get_view(
             df_fmt='polars-lazyframe',
             signals=[
@@ -668,7 +704,7 @@ class TasksAnalysis(TraceAnalysisBase):
                 'sched_switch',
                 'sched_wakeup',
                 'sched_wakeup_new',
-                *(['task_rename'] if add_rename else [])
+                *(['task_rename'] if rename else [])
             ]
         )
 
@@ -720,7 +756,7 @@ class TasksAnalysis(TraceAnalysisBase):
         })
         all_sw_df = pl.concat([prev_sw_df, next_sw_df], how='diagonal_relaxed')
 
-        if add_rename:
+        if rename:
             rename_df = get_df('task_rename').rename({
                 'oldcomm': 'comm',
             })
@@ -736,8 +772,63 @@ class TasksAnalysis(TraceAnalysisBase):
         all_sw_df = all_sw_df.with_columns(target_cpu=pl.lit(-1, pl.Int32))
 
         df = pl.concat([all_sw_df, wk_df], how='diagonal_relaxed')
-        df = df.sort('Time')
+        df = df.sort('Time', maintain_order=True)
         df = df.rename({'__cpu': 'cpu'})
+        # Record the chronological order so that it can be restored once the
+        # rows of a subset of PIDs have been sliced.
+        df = df.with_row_index('__order')
+        df = df.sort('pid', maintain_order=True)
+        return df
+
+    @_df_tasks_timeline.used_events
+    @TraceAnalysisBase.df_method
+    def _df_tasks_timeline_offsets(self, rename=False):
+        """
+        Row offsets of each PID in :meth:`_df_tasks_timeline`.
+
+        :param rename: See :meth:`_df_tasks_timeline`.
+        :type rename: bool
+
+        :returns: a :class:`polars.LazyFrame` with a ``pid``, ``offset`` and
+            ``len`` column.
+        """
+        df = self._df_tasks_timeline(rename=rename, df_fmt='polars-lazyframe')
+        df = df.select('pid').with_row_index('offset')
+        df = df.group_by('pid', maintain_order=True).agg(
+            offset=pl.col('offset').first(),
+            len=pl.len(),
+        )
+        return df
+
+    @_df_tasks_timeline.used_events
+    @TraceAnalysisBase.df_method
+    def _df_tasks_states(self, tasks=None):
+        """
+        Compute tasks states for all tasks.
+
+        :param tasks: If specified, states of these tasks only will be yielded.
+            The :class:`lisa.analysis.tasks.TaskID` must have a ``pid`` field specified,
+            since the task state is per-PID.
+        :type tasks: list(lisa.analysis.tasks.TaskID) or list(int)
+        """
+        def filters_comm(task):
+            try:
+                return task.comm is not None
+            except AttributeError:
+                return isinstance(task, str)
+
+        def state(value):
+            return pl.lit(value, pl.Int64)
+
+        # Keep the rename events if we are interested in the comm of tasks
+        add_rename = any(map(filters_comm, tasks or []))
+        if add_rename and 'task_rename' not in self.trace.available_events:
+            raise MissingTraceEventError(
+                ['task_rename'],
+                available_events=self.trace.available_events,
+            )
+
+        df = self._df_tasks_timeline(rename=add_rename, df_fmt='polars-lazyframe')
 
         # Restrict the set of data we will process to a given set of tasks
         if tasks is not None:
@@ -755,8 +846,23 @@ class TasksAnalysis(TraceAnalysisBase):
                 return self.get_task_id(task, update=do_update)
 
             tasks = list(map(resolve_task, tasks))
+            pids = sorted({task.pid for task in tasks})
+
+            # Only process the rows of the PIDs we are interested in rather
+            # than the whole timeline. Both dataframes are cached like any
+            # other df_method result, so slicing an in-memory timeline does
+            # not copy it.
+            offsets = self._df_tasks_timeline_offsets(rename=add_rename, df_fmt='polars-lazyframe')
+            offsets = offsets.filter(pl.col('pid').is_in(pids)).collect()
+            slices = [
+                df.slice(offset, length)
+                for offset, length in offsets.select('offset', 'len').iter_rows()
+            ]
+            df = pl.concat(slices) if slices else df.clear()
             df = df_filter_task_ids(df, tasks)
 
+        # The timeline is sorted by PID, so rows of a given PID are contiguous
+        # and in chronological order
         df = df.with_columns(
             next_state=pl.col('curr_state').shift(
                 -1,
@@ -767,6 +873,7 @@ class TasksAnalysis(TraceAnalysisBase):
         df = df.with_columns(
             delta=pl.col('duration_delta').dt.total_nanoseconds() / 1e9,
         )
+        df = df.sort('__order').drop('__order')
 
         return df
 
@@ -1081,7 +1188,7 @@ class TasksAnalysis(TraceAnalysisBase):
         # Merge consecutive activations' duration. They could have been
         # split in two by a bit of preemption, and we don't want that to
         # affect the duty cycle.
-        df_combine_duplicates(df, cols=['active'], func=lambda df: df['duration'].sum(), output_col='duration', inplace=True)
+        df_combine_duplicates(df, cols=['active'], func='sum', output_col='duration', inplace=True)
 
         # Make a dataframe where the rows corresponding to preempted time are
         # removed, unless preempted_value is set to non-NA
@@ -1257,11 +1364,12 @@ class TasksAnalysis(TraceAnalysisBase):
 
         series = series_rolling_apply(
             df["target_cpu"],
-            lambda x: x.count() / (window if per_sec else 1),
+            'count',
             window,
-            window_float_index=False,
             center=True
         )
+        if per_sec:
+            series = series / window
 
         if per_sec:
             label = f"Number of task {name} per second ({window}s windows)"
@@ -1262,6 +1262,232 @@ def df_window(df, window, method='pre', clip_window=True):
     )
 
 
+@DataFrameAccessor.register_accessor
+def df_windows(df, windows, method='pre', window_col='window'):
+    """
+    Same as :func:`df_window` but selecting many windows at once.
+
+    :returns: A long-format dataframe made of the rows selected by each
+        window, in the order of ``windows``. The ``window_col`` column contains
+        the ID of the window the row was selected by. Rows selected by
+        overlapping windows will appear once per window.
+
+    :param df: The dataframe to act on.
+    :type df: pandas.DataFrame or polars.LazyFrame
+
+    :param windows: Dataframe with one window per row, with ``start`` and
+        ``end`` columns. Missing values are treated like ``None`` in
+        :func:`df_window`. If it contains a ``window_col`` column, it is used
+        as the window ID, otherwise the row number is used.
+    :type windows: pandas.DataFrame or polars.LazyFrame or polars.DataFrame
+
+    :param method: See :func:`series_window`. ``nearest`` is not supported.
+    :type method: str
+
+    :param window_col: Name of the column holding the window IDs.
+    :type window_col: str
+
+    All the windows are selected in a single pass, so that computing a
+    per-window quantity over thousands of windows costs about the same as
+    over a single one, e.g.::
+
+        df = df_windows(df, phases_df)
+        means = df.groupby('window')['util'].mean()
+
+    .. note:: Each window selects the same rows as :func:`df_window` on a
+        :class:`pandas.DataFrame`, including the clipping of the windows to
+        the index of ``df``.
+    """
+    if window_col in df.columns:
+        raise ValueError(f'Column "{window_col}" already exists in the dataframe')
+
+    return _dispatch(
+        _polars_windows,
+        _pandas_windows,
+        df,
+
+        windows=windows,
+        method=method,
+        window_col=window_col,
+    )
+
+
+def _windows_searchsorted_sides(method):
+    """
+    Give the side of the index value to pick for the start and end of the
+    windows: ``pre`` for the last value before or equal, ``post`` for the first
+    value after or equal and ``next`` for the first value strictly after, or
+    the last value if there is none.
+
+    .. note:: ``next`` is used for the end of the windows to match
+        :func:`df_window`, which picks the value following the end even when
+        there is an exact match.
+    """
+    try:
+        return {
+            'pre': ('pre', 'pre'),
+            'post': ('post', 'next'),
+            'inclusive': ('pre', 'next'),
+            'exclusive': ('post', 'pre'),
+        }[method]
+    except KeyError:
+        raise ValueError(f'Slicing method not supported: {method}')
+
+
+def _pandas_windows(df, windows, method, window_col):
+    start_side, end_side = _windows_searchsorted_sides(method)
+    if isinstance(windows, (pl.LazyFrame, pl.DataFrame)):
+        windows = windows.lazy()
+        windows = windows.with_columns(
+            pl.col(name).dt.total_nanoseconds() * 1e-9
+            for name, dtype in windows.schema.items()
+            if dtype == pl.Duration
+        ).collect().to_pandas()
+
+    if window_col in windows.columns:
+        ids = windows[window_col].to_numpy()
+    else:
+        ids = np.arange(len(windows))
+
+    index = df.index.to_numpy()
+    if not len(index):
+        df = df.copy()
+        df[window_col] = ids[:0]
+        return df
+
+    first = index[0]
+    last = index[-1]
+    # Clip the windows to the index, and fill the placeholders
+    starts = np.clip(windows['start'].fillna(first).to_numpy(), first, last)
+    ends = np.clip(windows['end'].fillna(last).to_numpy(), first, last)
+
+    if (starts > ends).any():
+        raise KeyError(f'Some windows start after their end: {windows[starts > ends]}')
+
+    # The windows are within the index, so "pre" and "post" values always
+    # exist.
+    def loc(values, side):
+        if side == 'post':
+            return np.searchsorted(index, values, side='left')
+        else:
+            pre = np.searchsorted(index, values, side='right') - 1
+            if side == 'next':
+                return np.minimum(pre + 1, len(index) - 1)
+            else:
+                return pre
+
+    lo = loc(starts, start_side)
+    hi = np.maximum(loc(ends, end_side) + 1, lo)
+
+    # Positions of all the rows selected by all the windows, laid out one
+    # window after the other
+    lengths = hi - lo
+    offsets = np.cumsum(lengths) - lengths
+    pos = np.arange(lengths.sum()) - np.repeat(offsets - lo, lengths)
+
+    df = df.iloc[pos].copy()
+    df[window_col] = np.repeat(ids, lengths)
+    return df
+
+
+def _polars_windows(df, windows, method, window_col):
+    start_side, end_side = _windows_searchsorted_sides(method)
+    df = _df_to_polars(df)
+    index = _polars_index_col(df)
+    dtype = df.schema[index]
+
+    if isinstance(windows, pd.DataFrame):
+        windows = pl.from_pandas(windows)
+    windows = windows.lazy()
+
+    row = '__row'
+    window_pos = '__window_pos'
+    first = '__first'
+    last = '__last'
+
+    if window_col not in windows.columns:
+        windows = windows.with_row_index(window_col)
+
+    # Convert windows in seconds to the dtype of the index the same way as
+    # _df_to_polars() converts the index, so that a window bound equal to an
+    # index value selects that exact row.
+    def to_index(name):
+        col = pl.col(name)
+        if windows.schema[name].is_float() and dtype.is_temporal():
+            col = col * 1_000_000_000
+        return col.cast(dtype)
+
+    bounds = df.select(
+        pl.col(index).first().alias(first),
+        pl.col(index).last().alias(last),
+    )
+    windows = windows.with_row_index(window_pos).select(
+        window_pos,
+        window_col,
+        to_index('start').alias('start'),
+        to_index('end').alias('end'),
+    ).join(
+        bounds,
+        how='cross',
+    ).select(
+        window_pos,
+        window_col,
+        # Clip the windows to the index, and fill the placeholders
+        pl.col('start').fill_null(pl.col(first)).clip(pl.col(first), pl.col(last)),
+        pl.col('end').fill_null(pl.col(last)).clip(pl.col(first), pl.col(last)),
+    )
+
+    rows = df.select(index).with_row_index(row)
+
+    # The windows are within the index, so "pre" and "post" values always
+    # exist.
+    def loc(col, side):
+        _row = pl.col(row).cast(pl.Int64)
+        # The row past the end that "next" gives for windows ending on the
+        # last row does not exist, so the join with the rows will drop it.
+        if side == 'next':
+            _row = _row + 1
+
+        return windows.select(window_pos, col).sort(col).join_asof(
+            rows,
+            left_on=col,
+            right_on=index,
+            strategy='forward' if side == 'post' else 'backward',
+        ).select(
+            window_pos,
+            _row.alias(col),
+        )
+
+    lo = loc('start', start_side)
+    hi = loc('end', end_side)
+
+    selected = windows.select(window_pos, window_col).join(
+        lo, on=window_pos,
+    ).join(
+        hi, on=window_pos,
+    ).select(
+        window_pos,
+        window_col,
+        pl.int_ranges(
+            pl.col('start'),
+            pl.max_horizontal(pl.col('end') + 1, pl.col('start')),
+        ).alias(row),
+    ).explode(row).drop_nulls(row)
+
+    return df.with_row_index(row).with_columns(
+        pl.col(row).cast(pl.Int64)
+    ).join(
+        selected,
+        on=row,
+    ).sort(
+        window_pos,
+        row,
+    ).select(
+        *df.columns,
+        window_col,
+    )
+
+
 @DataFrameAccessor.register_accessor
 def df_make_empty_clone(df):
     """
@@ -1321,19 +1547,15 @@ def _polars_window_signals(df, window, signals, compress_init):
     if start is not None:
         if stop is None:
             post_filter = pl.col(index) >= start
-            pre_filter = pl.lit(True)
         else:
             post_filter = pl.col(index).is_between(
                 lower_bound=start,
                 upper_bound=stop,
                 closed='both'
             )
-            pre_filter = (pl.col(index) < stop)
-
-        pre_filter &= ~post_filter
 
         post_df = df.filter(post_filter)
-        pre_df = df.filter(pre_filter)
+        pre_df = df.filter(pl.col(index) < start)
 
         signals_init = [
             pre_df.group_by(fields).last()
@@ -1342,25 +1564,45 @@ def _polars_window_signals(df, window, signals, compress_init):
         ]
 
         if signals_init:
+            # group_by() moves the signal fields first, so restore the
+            # original order of the columns
             pre_df = pl.concat(
                 signals_init,
                 how='diagonal',
-            )
-
-            if compress_init:
-                first_row = post_df.select(index).head(1).collect()
-                try:
-                    first_time = first_row[0]
-                except IndexError:
-                    pass
-                else:
-                    pre_df.with_columns(Time=pl.lit(first_time))
+            ).select(df.columns)
 
             # We could have multiple signals for the same event, so we want to
-            # avoid duplicate events occurrences.
-            pre_df = pre_df.unique()
+            # avoid duplicate events occurrences. Rows of the same event cannot
+            # share the same timestamp, so the index is enough to identify
+            # them.
+            pre_df = pre_df.unique(subset=[index])
             pre_df = pre_df.sort(index)
 
+            if compress_init:
+                # Move the init values right before the first row in the
+                # window, keeping them in order. If the window is empty, they
+                # are moved right before the last row preceding the window
+                # like with pandas.
+                first_df = post_df.select(
+                    pl.col(index).first().alias('__first_time')
+                ).join(
+                    df.filter(pl.col(index) < start).select(
+                        pl.col(index).last().alias('__last_pre_time')
+                    ),
+                    how='cross',
+                ).select(
+                    pl.coalesce('__first_time', '__last_pre_time').alias('__first_time')
+                )
+                compressed = pl.col('__first_time') - pl.duration(
+                    nanoseconds=pl.len() - pl.int_range(pl.len())
+                )
+                pre_df = pre_df.join(
+                    first_df,
+                    how='cross',
+                ).with_columns(
+                    pl.coalesce(compressed, pl.col(index)).alias(index)
+                ).drop('__first_time')
+
             return pl.concat(
                 [
                     pre_df,
@@ -1668,19 +1910,47 @@ def series_tunnel_mean(*args, **kwargs):
     return series_envelope_mean(*args, **kwargs)
 
 
+_ROLLING_REDUCTIONS = {'mean', 'sum', 'count', 'min', 'max', 'median', 'std', 'var'}
+"""
+Named reductions supported by :func:`series_rolling_apply` without calling
+back into Python for each window.
+"""
+
+
 @SeriesAccessor.register_accessor
 def series_rolling_apply(series, func, window, window_float_index=True, center=False):
     """
     Apply a function on a rolling window of a series.
 
+    .. note:: When rows share the same timestamp, pandas only includes the
+        rows up to the current one in its window, whereas polars includes all
+        of them. The results for such rows will therefore differ, apart from
+        the last one of each timestamp.
+
     :returns: The series of results of the function.
 
-    :param series: Series to act on.
-    :type series: pandas.Series
+    :param series: Series to act on. If a :class:`polars.LazyFrame` or
+        :class:`polars.DataFrame` is passed, the function is applied to all
+        its columns apart from the ``Time`` index and a
+        :class:`polars.LazyFrame` is returned.
+    :type series: pandas.Series or polars.LazyFrame or polars.DataFrame
 
     :param func: Function to apply on each window. It must take a
-        :class:`pandas.Series` as only parameter and return one value.
-    :type func: collections.abc.Callable
+        :class:`pandas.Series` as only parameter and return one value. It can
+        also be the name of one of the following reductions, which are
+        computed without calling back into Python for each window and should
+        be preferred:
+
+            * ``mean``
+            * ``sum``
+            * ``count``
+            * ``min``
+            * ``max``
+            * ``median``
+            * ``std``
+            * ``var``
+
+    :type func: collections.abc.Callable or str
 
     :param window: Rolling window width in seconds.
     :type window: float
@@ -1692,17 +1962,26 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
     :param window_float_index: If ``True``, the series passed to ``func`` will
         be of type :class:`pandas.Index` (float64), in nanoseconds. Disabling is
         recommended if the index is not used by ``func`` since it will remove
-        the need for a conversion.
+        the need for a conversion. Ignored for named reductions.
     :type window_float_index: bool
     """
-    orig_index = series.index
+    if isinstance(func, str) and func not in _ROLLING_REDUCTIONS:
+        raise ValueError(f'Unknown rolling reduction "{func}", available reductions are: {", ".join(sorted(_ROLLING_REDUCTIONS))}')
 
-    # Wrap the func to turn the index into nanosecond Float64Index
-    if window_float_index:
-        def func(s, func=func):
-            # pylint: disable=function-redefined
-            s.index = s.index.astype('int64') * 1e-9
-            return func(s)
+    return _dispatch(
+        _polars_rolling_apply,
+        _pandas_rolling_apply,
+        series,
+
+        func=func,
+        window=window,
+        window_float_index=window_float_index,
+        center=center,
+    )
+
+
+def _pandas_rolling_apply(series, func, window, window_float_index, center):
+    orig_index = series.index
 
     # Use a timedelta index so that rolling gives time-based results
     index = pd.to_timedelta(orig_index, unit='s')
@@ -1710,7 +1989,19 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
 
     window_ns = int(window * 1e9)
     rolling_window = f'{window_ns}ns'
-    values = series.rolling(rolling_window).apply(func, raw=False).values
+    rolling = series.rolling(rolling_window)
+
+    if isinstance(func, str):
+        values = getattr(rolling, func)().values
+    else:
+        # Wrap the func to turn the index into nanosecond Float64Index
+        if window_float_index:
+            def func(s, func=func):
+                # pylint: disable=function-redefined
+                s.index = s.index.astype('int64') * 1e-9
+                return func(s)
+
+        values = rolling.apply(func, raw=False).values
 
     if center:
         new_index = orig_index - (window / 2)
@@ -1720,6 +2011,66 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
     return pd.Series(values, index=new_index)
 
 
+def _polars_rolling_apply(df, func, window, window_float_index, center):
+    if isinstance(df, pl.Series):
+        raise TypeError('polars.Series have no index, a polars.LazyFrame or polars.DataFrame with a "Time" column must be used')
+
+    df = _df_to_polars(df)
+    index = _polars_index_col(df)
+
+    # Arbitrary Python functions are only supported by pandas
+    if not isinstance(func, str):
+        df = _df_to_pandas(df)
+        df = pd.DataFrame({
+            col: _pandas_rolling_apply(
+                df[col],
+                func=func,
+                window=window,
+                window_float_index=window_float_index,
+                center=center,
+            )
+            for col in df.columns
+        })
+        df.index.name = index
+        return _df_to_polars(df)
+
+    rolling_index = '__rolling_index'
+    window_ns = int(window * 1e9)
+    cols = [col for col in df.columns if col != index]
+
+    df = df.with_columns(
+        pl.col(index).dt.total_nanoseconds().alias(rolling_index)
+    ).set_sorted(rolling_index)
+
+    def reduce(col):
+        col = pl.col(col)
+        expr = getattr(col, func)()
+        # pandas uses ddof=1 and gives NaN for a single sample, rather than
+        # 0 like some polars versions.
+        if func in ('std', 'var'):
+            expr = pl.when(col.count() > 1).then(expr).otherwise(None)
+        return expr
+
+    # Windows are closed on the right like with pandas, i.e. (t - window, t]
+    df = df.rolling(
+        index_column=rolling_index,
+        period=f'{window_ns}i',
+    ).agg([
+        reduce(col)
+        for col in cols
+    ])
+
+    time = pl.col(rolling_index).cast(pl.Duration('ns'))
+    if center:
+        time = time - _polars_duration_expr(window / 2)
+
+    df = df.select(
+        time.alias(index),
+        *cols,
+    )
+    return df
+
+
 def _pandas_find_unique_bool_vector(data, cols, all_col, keep):
     if keep == 'first':
         shift = 1
@@ -1756,19 +2107,211 @@ def _pandas_find_unique_bool_vector(data, cols, all_col, keep):
     return cond
 
 
-def _pandas_deduplicate(data, keep, consecutives, cols, all_col):
+_RLE_COMBINERS = {'sum', 'first', 'last', 'min', 'max', 'duration'}
+"""
+Combiners supported by :func:`df_run_length_encode` and friends, computed
+without calling back into Python for each run.
+"""
+
+
+def _check_rle_agg(agg):
+    agg = dict(agg or {})
+    for col, combiner in agg.items():
+        if combiner not in _RLE_COMBINERS:
+            raise ValueError(f'Unknown combiner "{combiner}" for column "{col}", available combiners are: {", ".join(sorted(_RLE_COMBINERS))}')
+    return agg
+
+
+def _pandas_rle_starts(data, cols, all_col):
+    """
+    Positions of the first row of each run of consecutive duplicates, and the
+    length of each run.
+    """
+    unique = _pandas_find_unique_bool_vector(data, cols, all_col, keep='first')
+    starts = np.flatnonzero(unique.to_numpy())
+    lengths = np.diff(starts, append=len(data))
+    return (starts, lengths)
+
+
+def _pandas_rle_combine(data, col, combiner, starts, lengths):
+    if combiner == 'duration':
+        index = data.index.to_numpy()
+        run_starts = index[starts]
+        if not len(starts):
+            return run_starts.astype('float64')
+        # Like df_add_delta(), the duration of the last run is unknown
+        return np.append(run_starts[1:], np.nan) - run_starts
+
+    series = data[col]
+    if combiner == 'first':
+        return series.iloc[starts].array
+    elif combiner == 'last':
+        return series.iloc[starts + lengths - 1].array
+    else:
+        values = series.to_numpy()
+        if not len(starts):
+            return values
+        elif values.dtype.kind == 'b':
+            values = values.astype('int64')
+
+        # Missing values are ignored, like in pandas.Series.sum() and
+        # friends.
+        if combiner == 'sum':
+            if values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), 0, values)
+            return np.add.reduceat(values, starts)
+        elif combiner == 'min':
+            return np.fmin.reduceat(values, starts)
+        elif combiner == 'max':
+            return np.fmax.reduceat(values, starts)
+        else:
+            raise ValueError(f'Unknown combiner: {combiner}')
+
+
+def _pandas_rle(data, cols, all_col, keep, agg):
+    starts, lengths = _pandas_rle_starts(data, cols, all_col)
+
+    if keep == 'first':
+        pos = starts
+        mask = slice(None)
+    elif keep == 'last':
+        pos = starts + lengths - 1
+        mask = slice(None)
+    elif keep is None:
+        mask = lengths == 1
+        pos = starts[mask]
+    else:
+        raise ValueError(f'Unknown keep value: {keep}')
+
+    out = data.iloc[pos]
+    if agg:
+        out = out.copy()
+        for col, combiner in agg.items():
+            combined = _pandas_rle_combine(data, col, combiner, starts, lengths)
+            out[col] = combined[mask]
+
+    return (out, lengths[mask])
+
+
+def _polars_rle(df, cols, all_col, keep, agg):
+    index = _polars_index_col(df)
+    cols = cols or [
+        col
+        for col in df.columns
+        if col != index
+    ]
+
+    run = '__run'
+    run_start = '__run_start'
+    length = '__run_length'
+
+    # Unique values will be True, duplicate False. Like with pandas, missing
+    # values are never considered as duplicates.
+    changed = [
+        (pl.col(col) != pl.col(col).shift(1)).fill_null(True)
+        for col in cols
+    ]
+    if all_col:
+        new_run = pl.any_horizontal(changed)
+    else:
+        new_run = pl.all_horizontal(changed)
+
+    if keep in ('first', None):
+        def pick(expr):
+            return expr.first()
+    elif keep == 'last':
+        def pick(expr):
+            return expr.last()
+    else:
+        raise ValueError(f'Unknown keep value: {keep}')
+
+    combiners = {
+        'sum': lambda expr: expr.sum(),
+        'first': lambda expr: expr.first(),
+        'last': lambda expr: expr.last(),
+        'min': lambda expr: expr.min(),
+        'max': lambda expr: expr.max(),
+    }
+    durations = [
+        col
+        for col, combiner in agg.items()
+        if combiner == 'duration'
+    ]
+    combined = [
+        combiners[combiner](pl.col(col))
+        for col, combiner in agg.items()
+        if combiner != 'duration'
+    ]
+    exclude = [run, *agg.keys()]
+
+    # Runs are contiguous so maintaining the order also keeps them sorted by
+    # index.
+    df = df.with_columns(
+        new_run.cum_sum().alias(run)
+    ).group_by(run, maintain_order=True).agg(
+        pick(pl.exclude(exclude)),
+        *combined,
+        pl.col(index).first().alias(run_start),
+        pl.len().alias(length),
+    ).with_columns(
+        (pl.col(run_start).shift(-1) - pl.col(run_start)).alias(col)
+        for col in durations
+    )
+
+    if keep is None:
+        df = df.filter(pl.col(length) == 1)
+
+    return (df, length)
+
+
+def _pandas_deduplicate(data, keep, consecutives, cols, all_col, agg=None):
     if consecutives:
-        return data.loc[_pandas_find_unique_bool_vector(data, cols, all_col, keep)]
+        df, _ = _pandas_rle(data, cols=cols, all_col=all_col, keep=keep, agg=agg)
+        return df
     else:
         if not all_col:
             raise ValueError("all_col=False is not supported with consecutives=False")
+        elif agg:
+            raise ValueError("agg is not supported with consecutives=False")
 
         kwargs = dict(subset=cols) if cols else {}
         return data.drop_duplicates(keep=keep, **kwargs)
 
 
+def _polars_deduplicate(df, keep, consecutives, cols, all_col, agg=None):
+    df = _df_to_polars(df)
+    if consecutives:
+        columns = list(df.columns)
+        new_columns = [
+            col
+            for col in agg.keys()
+            if col not in columns
+        ]
+        df, _ = _polars_rle(df, cols=cols, all_col=all_col, keep=keep, agg=agg)
+        return df.select(columns + new_columns)
+    else:
+        if not all_col:
+            raise ValueError("all_col=False is not supported with consecutives=False")
+        elif agg:
+            raise ValueError("agg is not supported with consecutives=False")
+
+        # Like _polars_rle(), the index is not considered, otherwise no row
+        # would ever be a duplicate of another one.
+        index = _polars_index_col(df)
+        cols = cols or [
+            col
+            for col in df.columns
+            if col != index
+        ]
+        return df.unique(
+            subset=cols,
+            keep='none' if keep is None else keep,
+            maintain_order=True,
+        )
+
+
 @SeriesAccessor.register_accessor
-def series_deduplicate(series, keep, consecutives):
+def series_deduplicate(series, keep, consecutives, agg=None):
     """
     Remove duplicate values in a :class:`pandas.Series`.
 
@@ -1787,12 +2330,35 @@ def series_deduplicate(series, keep, consecutives):
             assert (s3 == [1,2,3,4]).all()
 
     :type consecutives: bool
+
+    :param agg: Name of the combiner used to replace the value of each row
+        that is kept by the combination of the values of the run of
+        consecutive duplicates it belongs to, for example::
+
+            s4 = series_deduplicate(s, keep='first', consecutives=True, agg='duration')
+            assert (s4.iloc[:-1] == [1,28,10,10]).all()
+
+        See :func:`df_deduplicate` for the available combiners. Only supported
+        with ``consecutives=True``.
+    :type agg: str or None
     """
-    return _pandas_deduplicate(series, keep=keep, consecutives=consecutives, cols=None, all_col=True)
+    if agg is None:
+        return _pandas_deduplicate(series, keep=keep, consecutives=consecutives, cols=None, all_col=True)
+    else:
+        col = 'value'
+        df = _pandas_deduplicate(
+            series.to_frame(col),
+            keep=keep,
+            consecutives=consecutives,
+            cols=None,
+            all_col=True,
+            agg=_check_rle_agg({col: agg}),
+        )
+        return df[col].rename(series.name)
 
 
 @DataFrameAccessor.register_accessor
-def df_deduplicate(df, keep, consecutives, cols=None, all_col=True):
+def df_deduplicate(df, keep, consecutives, cols=None, all_col=True, agg=None):
     """
     Same as :func:`series_deduplicate` but for :class:`pandas.DataFrame`.
 
@@ -1803,8 +2369,116 @@ def df_deduplicate(df, keep, consecutives, cols=None, all_col=True):
     :param all_col: If ``True``, remove a row when all the columns have duplicated value.
         Otherwise, remove the row if any column is duplicated.
     :type all_col: bool
+
+    :param agg: Mapping of column names to a combiner name among
+        ``sum``, ``first``, ``last``, ``min``, ``max`` and ``duration``. The
+        column of each row that is kept will contain the combination of the
+        values of the whole run of consecutive duplicates it belongs to. See
+        :func:`df_run_length_encode`. Only supported with
+        ``consecutives=True``.
+    :type agg: dict(str, str) or None
+    """
+    return _dispatch(
+        _polars_deduplicate,
+        _pandas_deduplicate,
+        df,
+
+        keep=keep,
+        consecutives=consecutives,
+        cols=cols,
+        all_col=all_col,
+        agg=_check_rle_agg(agg),
+    )
+
+
+@DataFrameAccessor.register_accessor
+def df_run_length_encode(df, cols=None, all_col=True, agg=None):
+    """
+    Run-length encode the runs of consecutive duplicated rows.
+
+    :returns: A dataframe with one row per run. The start of the run is given
+        by the index (``Time`` column for :class:`polars.LazyFrame`), and the
+        number of rows in the run by the ``length`` column. The value of the
+        run is given by the columns used for duplicates detection.
+
+    :param df: The dataframe to act on.
+    :type df: pandas.DataFrame or polars.LazyFrame
+
+    :param cols: Columns to use for duplicates detection. By default, all
+        columns are considered.
+    :type cols: list(str) or None
+
+    :param all_col: See :func:`df_deduplicate`.
+    :type all_col: bool
+
+    :param agg: Mapping of column names to the name of a combiner, used to
+        add columns combining the values of all the rows in each run. The
+        combination is computed without calling back into Python for each
+        run. Missing values are ignored. Available combiners are:
+
+            * ``sum``: Sum of the values.
+            * ``first``: Value of the first row of the run.
+            * ``last``: Value of the last row of the run.
+            * ``min``: Minimum value.
+            * ``max``: Maximum value.
+            * ``duration``: Time between the start of the run and the start
+              of the next one. The column does not need to exist in ``df``.
+              The duration of the last run is unknown.
+
+        For example, the following adds a ``duration`` column with the time
+        spent in each state, and the sum of the ``count`` column over each
+        run::
+
+            df_run_length_encode(df, cols=['state'], agg={'duration': 'duration', 'count': 'sum'})
+
+    :type agg: dict(str, str) or None
     """
-    return _pandas_deduplicate(df, keep=keep, consecutives=consecutives, cols=cols, all_col=all_col)
+    return _dispatch(
+        _polars_run_length_encode,
+        _pandas_run_length_encode,
+        df,
+
+        cols=cols,
+        all_col=all_col,
+        agg=_check_rle_agg(agg),
+    )
+
+
+def _pandas_run_length_encode(df, cols, all_col, agg):
+    cols = list(cols or df.columns)
+    df, lengths = _pandas_rle(
+        df,
+        cols=cols,
+        all_col=all_col,
+        keep='first',
+        agg=agg,
+    )
+    df = df[cols + [col for col in agg.keys() if col not in cols]].copy()
+    df['length'] = lengths
+    return df
+
+
+def _polars_run_length_encode(df, cols, all_col, agg):
+    df = _df_to_polars(df)
+    index = _polars_index_col(df)
+    cols = list(cols or [
+        col
+        for col in df.columns
+        if col != index
+    ])
+    df, length = _polars_rle(
+        df,
+        cols=cols,
+        all_col=all_col,
+        keep='first',
+        agg=agg,
+    )
+    return df.select(
+        index,
+        *cols,
+        *(col for col in agg.keys() if col not in cols),
+        pl.col(length).alias('length'),
+    )
 
 
 @DataFrameAccessor.register_accessor
@@ -1894,7 +2568,12 @@ def df_combine_duplicates(df, func, output_col, cols=None, all_col=True, prune=T
         :class:`pandas.DataFrame` corresponding to the group and must return
         either a :class:`pandas.Series` with the same index as its input dataframe,
         or a scalar depending on the value of ``prune``.
-    :type func: collections.abc.Callable
+
+        It can also be the name of a combiner supported by
+        :func:`df_run_length_encode`, which will be applied on ``output_col``
+        without calling back into Python for each group, and should therefore
+        be preferred.
+    :type func: collections.abc.Callable or str
 
     :param prune: If ``True``, ``func`` will be expected to return a single
         scalar that will be used instead of a whole duplicated group. Only the
@@ -1916,6 +2595,17 @@ def df_combine_duplicates(df, func, output_col, cols=None, all_col=True, prune=T
     :param inplace: If ``True``, the passed dataframe is modified.
     :type inplace: bool
     """
+    if isinstance(func, str):
+        return _pandas_combine_duplicates_rle(
+            df,
+            combiner=func,
+            output_col=output_col,
+            cols=cols,
+            all_col=all_col,
+            prune=prune,
+            inplace=inplace,
+        )
+
     init_df = df if inplace else df.copy()
     # We are going to add columns so make a copy
     df = df.copy(deep=False)
@@ -1963,8 +2653,10 @@ def df_combine_duplicates(df, func, output_col, cols=None, all_col=True, prune=T
     if prune:
         # Only keep the first row of each duplicate run
         if inplace:
-            removed_indices = duplicates_to_remove[duplicates_to_remove].index
-            init_df.drop(removed_indices, inplace=True)
+            _pandas_keep_rows_inplace(
+                init_df,
+                np.flatnonzero(~duplicates_to_remove.to_numpy()),
+            )
             return None
         else:
             return init_df.loc[~duplicates_to_remove]
@@ -1975,6 +2667,53 @@ def df_combine_duplicates(df, func, output_col, cols=None, all_col=True, prune=T
             return init_df
 
 
+def _pandas_keep_rows_inplace(df, pos):
+    """
+    Only keep the rows of ``df`` at the given sorted positions, inplace.
+
+    Unlike :meth:`pandas.DataFrame.drop`, this selects rows by position so it
+    behaves when the index has duplicated labels, e.g. duplicated timestamps.
+    """
+    index = df.index[pos]
+    df.reset_index(drop=True, inplace=True)
+    df.drop(np.setdiff1d(np.arange(len(df)), pos), inplace=True)
+    df.index = index
+
+
+def _pandas_combine_duplicates_rle(df, combiner, output_col, cols, all_col, prune, inplace):
+    _check_rle_agg({output_col: combiner})
+    init_df = df if inplace else df.copy()
+
+    starts, lengths = _pandas_rle_starts(init_df, cols, all_col)
+    combined = _pandas_rle_combine(init_df, output_col, combiner, starts, lengths)
+
+    # Only update the runs of duplicates, other rows are left untouched
+    duplicated = lengths > 1
+    if prune:
+        rows = starts[duplicated]
+        values = combined[duplicated]
+    else:
+        rows = np.flatnonzero(np.repeat(duplicated, lengths))
+        values = np.repeat(combined[duplicated], lengths[duplicated])
+
+    if output_col not in init_df.columns:
+        init_df[output_col] = np.NaN
+    init_df.iloc[rows, init_df.columns.get_loc(output_col)] = values
+
+    if prune:
+        # Only keep the first row of each duplicate run
+        if inplace:
+            _pandas_keep_rows_inplace(init_df, starts)
+            return None
+        else:
+            return init_df.iloc[starts]
+    else:
+        if inplace:
+            return None
+        else:
+            return init_df
+
+
 @DataFrameAccessor.register_accessor
 def df_add_delta(df, col='delta', src_col=None, window=None, inplace=False):
     """
@@ -17,10 +17,13 @@
 """Classes for modeling and estimating energy usage of CPU systems"""
 
 from collections import namedtuple, OrderedDict
-from itertools import product
+import heapq
+from itertools import chain, product
+import math
 import operator
 import re
 
+import numpy as np
 import pandas
 
 from devlib.utils.misc import mask_to_list, ranges_to_list
@@ -281,6 +284,32 @@ class PowerDomain(_CpuTree):
         self.idle_states = idle_states
 
 
+def _distinct_permutations(values):
+    """
+    Yield the distinct permutations of ``values``, without generating all the
+    permutations of repeated values.
+    """
+    values = sorted(values)
+    n = len(values)
+    yield tuple(values)
+    # Lexicographic order permutations algorithm, which naturally skips
+    # repeated permutations
+    while True:
+        for i in reversed(range(n - 1)):
+            if values[i] < values[i + 1]:
+                break
+        else:
+            return
+
+        for j in reversed(range(i + 1, n)):
+            if values[i] < values[j]:
+                break
+
+        values[i], values[j] = values[j], values[i]
+        values[i + 1:] = reversed(values[i + 1:])
+        yield tuple(values)
+
+
 class EnergyModel(Serializable, Loggable):
     """Represents hierarchical CPU topology with power and capacity data
 
@@ -680,7 +709,726 @@ class EnergyModel(Serializable, Loggable):
         return self._estimate_from_active_time(cpu_active_time,
                                                freqs, idle_states, combine=True)
 
-    def get_optimal_placements(self, capacities, capacity_margin_pct=0):
+    @property
+    @memoized
+    def _symmetric_cpu_groups(self):
+        """
+        List of lists of CPUs that can be swapped without changing the
+        estimated power, i.e. sibling CPUs with identical energy and power
+        domain data, in the same frequency domain.
+
+        This is a refinement of :attr:`cpu_groups`, which only looks at active
+        states.
+        """
+        def freq_domain(cpu):
+            [domain] = [i for i, d in enumerate(self.freq_domains) if cpu in d]
+            return domain
+
+        def key(cpu):
+            node = self.cpu_nodes[cpu]
+            pd = self.cpu_pds[cpu]
+            return (
+                id(node.parent),
+                id(pd.parent),
+                freq_domain(cpu),
+                sorted(node.active_states.items()),
+                list((node.idle_states or {}).items()),
+                list(pd.idle_states),
+            )
+
+        groups = []
+        for cpu in self.cpus:
+            for group in groups:
+                if key(group[0]) == key(cpu):
+                    group.append(cpu)
+                    break
+            else:
+                groups.append([cpu])
+        return groups
+
+    def _get_optimal_placements_brute_force(self, capacities, capacity_margin_pct):
+        tasks = list(capacities.keys())
+
+        num_candidates = len(self.cpus) ** len(tasks)
+
+        logger = self.logger
+        logger.debug(
+            f'Searching {num_candidates} configurations for optimal task placement...')
+
+        candidates = {}
+        excluded = set()
+        for cpus in product(self.cpus, repeat=len(tasks)):
+            placement = dict(zip(tasks, cpus))
+
+            util = [0] * len(self.cpus)
+            for task, cpu in placement.items():
+                util[cpu] += capacities[task]
+            util = tuple(util)
+
+            # Filter out candidate placements that have tasks greater than max
+            # or that we have already determined that we cannot place.
+            if (any(u > self.capacity_scale for u in util) or util in excluded):
+                continue
+
+            if util not in candidates:
+                freqs, overutilized = self._guess_freqs(util, capacity_margin_pct)
+                if overutilized:
+                    # This isn't a valid placement
+                    excluded.add(util)
+                else:
+                    power = self.estimate_from_cpu_util(util, freqs=freqs)
+                    candidates[util] = sum(power.values())
+
+        return candidates
+
+    @property
+    @memoized
+    def _power_blocks(self):
+        """
+        Partition of the CPUs into blocks, such that the estimated power of
+        each block only depends on the utilization of its own CPUs.
+
+        CPUs sharing a frequency domain, an energy model node with energy data
+        or a power domain with idle states end up in the same block.
+        """
+        links = [
+            *self.freq_domains,
+            *(
+                node.cpus
+                for node in self.root.iter_nodes()
+                if node.active_states and node.idle_states
+            ),
+            *(
+                pd.cpus
+                for pd in self.pd.iter_nodes()
+                if pd.idle_states
+            ),
+        ]
+
+        blocks = [{cpu} for cpu in self.cpus]
+        for link in links:
+            merged = set(link)
+            unlinked = []
+            for block in blocks:
+                if block & merged:
+                    merged |= block
+                else:
+                    unlinked.append(block)
+            blocks = unlinked + [merged]
+
+        return sorted(sorted(block) for block in blocks)
+
+    @property
+    @memoized
+    def _power_bound_params(self):
+        """
+        Parameters used to compute a lower bound of the estimated power of the
+        placements derived from a partial placement, or ``None`` if the
+        estimated power is not a monotonic function of the utilization of each
+        CPU.
+
+        The estimated power is monotonic if, for all nodes with energy data:
+
+            * The power per unit of capacity does not decrease with the
+              frequency, i.e. running at a higher OPP is never more efficient.
+            * The power of any active state is higher than the power of any
+              idle state.
+            * The power of idle states decreases with their depth.
+
+        :returns: A tuple of:
+
+            * A list with, for each CPU, the power of its node in the idle
+              state used while it is active and a list of ``(freq, capacity,
+              slope)``. ``slope`` is the power increase per unit of
+              utilization of the node at that frequency on top of the idle
+              power.
+            * A list of ``(cpus, idle_power, levels)`` for non-overlapping
+              nodes spanning multiple CPUs, with the power of the idle state
+              used while any of its CPUs is active and a list of ``(freq,
+              capacity, slope)``. ``capacity`` is the highest capacity of its
+              CPUs, and ``slope`` is a lower bound of the power increase per
+              unit of the maximum utilization of its CPUs.
+        """
+        def is_monotonic(l, decreasing=False):
+            op = operator.ge if decreasing else operator.le
+            return all(op(a, b) for a, b in zip(l, l[1:]))
+
+        cpus_params = [
+            (0, [(freq, state.capacity, 0) for freq, state in sorted(node.active_states.items())])
+            for node in self.cpu_nodes
+        ]
+        clusters_params = []
+        for node in self.root.iter_nodes():
+            if not node.active_states or not node.idle_states:
+                continue
+
+            idle_powers = list(node.idle_states.values())
+            # Active CPUs use their shallowest idle state
+            cpu_idle_states = list(self.cpu_nodes[node.cpus[0]].idle_states or [None])
+            idle_power = node.idle_states.get(cpu_idle_states[0], min(idle_powers))
+            freqs = sorted(node.active_states.keys())
+            powers = [node.active_states[freq].power for freq in freqs]
+            if not is_monotonic(idle_powers, decreasing=True) or min(powers) < idle_power:
+                return None
+
+            cpus_slopes = []
+            cpus_caps = []
+            for cpu in node.cpus:
+                try:
+                    caps = [
+                        self.cpu_nodes[cpu].active_states[freq].capacity
+                        for freq in freqs
+                    ]
+                except KeyError:
+                    return None
+
+                if not all(caps) or not is_monotonic(caps):
+                    return None
+
+                efficiencies = [power / cap for power, cap in zip(powers, caps)]
+                if not is_monotonic(efficiencies):
+                    return None
+
+                cpus_caps.append(caps)
+                cpus_slopes.append([
+                    (power - idle_power) / cap
+                    for power, cap in zip(powers, caps)
+                ])
+
+            if len(node.cpus) == 1:
+                [cpu] = node.cpus
+                [caps] = cpus_caps
+                [slopes] = cpus_slopes
+                cpus_params[cpu] = (idle_power, list(zip(freqs, caps, slopes)))
+            # Nodes are iterated in post-order, so the smallest nodes are
+            # picked when they overlap
+            elif not any(set(node.cpus) & set(cpus) for cpus, _, _ in clusters_params):
+                levels = list(zip(
+                    freqs,
+                    map(max, zip(*cpus_caps)),
+                    map(min, zip(*cpus_slopes)),
+                ))
+                clusters_params.append((node.cpus, idle_power, levels))
+
+        return (cpus_params, clusters_params)
+
+    def _get_optimal_placements_search(self, capacities, capacity_margin_pct):
+        logger = self.logger
+        groups = self._symmetric_cpu_groups
+        blocks = self._power_blocks
+        bound_params = self._power_bound_params
+        margin = 100 / (100 - capacity_margin_pct)
+        max_utils = [
+            # Same condition as used by _guess_freqs() to detect overutilized
+            # CPUs, along with the filter of the brute force search.
+            min(self.capacity_scale, node.max_capacity / margin)
+            for node in self.cpu_nodes
+        ]
+        # Tolerance used to compare power estimates of placements that differ
+        # only by the order of floating point operations.
+        rel_tol = 1e-9
+
+        # Placing the biggest tasks first prunes unfeasible placements earlier.
+        caps = sorted(capacities.values(), reverse=True)
+        total = sum(caps)
+        root = tuple([0] * len(self.cpus))
+
+        def canonical(util):
+            # Representative of all the utilizations obtained by swapping
+            # symmetric CPUs, which all have the same estimated power.
+            canon = list(util)
+            for group in groups:
+                for cpu, u in zip(group, sorted((util[cpu] for cpu in group), reverse=True)):
+                    canon[cpu] = u
+            return tuple(canon)
+
+        def linear_cost(base, slope, power, size):
+            # Increase of max(power, base + slope * x) with respect to "power"
+            # for x between 0 and "size", as a fixed cost and segments of
+            # cost per unit of x.
+            if base >= power:
+                return (base - power, [(slope, size)])
+            elif slope:
+                free = min(size, (power - base) / slope)
+                return (0, [(0, free), (slope, size - free)])
+            else:
+                return (0, [(0, size)])
+
+        def add_segments(a, b):
+            # Sum of two non-decreasing piecewise-constant marginal costs
+            a = list(reversed(a))
+            b = list(reversed(b))
+            segments = []
+            while a and b:
+                (cost_a, size_a), (cost_b, size_b) = a.pop(), b.pop()
+                size = min(size_a, size_b)
+                segments.append((cost_a + cost_b, size))
+                if size_a > size:
+                    a.append((cost_a, size_a - size))
+                if size_b > size:
+                    b.append((cost_b, size_b - size))
+            return segments + list(reversed(a))
+
+        def block_bound_options(block, util, limits, freqs, nodes_power):
+            # Cheapest increase of power of the nodes of the block when
+            # adding utilization to the block, without exceeding "limits" on
+            # any CPU, as a list of options. Each option corresponds to a set
+            # of idle CPUs that are woken up and to a final frequency of each
+            # frequency domain, so that the power of each node is a linear
+            # function of the utilization of its CPUs.
+            #
+            # The power of a cluster depends on the maximum utilization of
+            # its CPUs, which is not a separable function of the utilization
+            # of each CPU. It is bounded in different ways, each giving an
+            # alternative fixed cost and segments of non-decreasing cost per
+            # unit of added utilization. Any of them gives a lower bound.
+            cpus_params, clusters_params = bound_params
+            cpus_levels = {
+                cpu: {
+                    freq: (cap, slope)
+                    for freq, cap, slope in cpus_params[cpu][1]
+                }
+                for cpu in block
+            }
+            clusters = [
+                (
+                    cpus,
+                    idle_power,
+                    {freq: slope for freq, _, slope in levels},
+                )
+                for cpus, idle_power, levels in clusters_params
+                if cpus[0] in block
+            ]
+            clustered = {cpu for cpus, _, _ in clusters for cpu in cpus}
+            domains = [
+                domain
+                for domain in self.freq_domains
+                if domain[0] in block
+            ]
+
+            # Idle symmetric CPUs are interchangeable, so only the number of
+            # CPUs woken up in each group matters.
+            idle_groups = [
+                [
+                    cpu
+                    for cpu in group
+                    if cpu in block and not util[cpu] and limits[cpu] > 0
+                ]
+                for group in groups
+            ]
+            woken_up = [
+                {cpu for cpus in _woken_up for cpu in cpus}
+                for _woken_up in product(*(
+                    [group[:i] for i in range(len(group) + 1)]
+                    for group in idle_groups
+                ))
+            ]
+            # The frequency can only increase when adding utilization
+            final_freqs = [
+                {
+                    cpu: freq
+                    for domain, freq in zip(domains, domains_freqs)
+                    for cpu in domain
+                }
+                for domains_freqs in product(*(
+                    [
+                        freq
+                        for freq in sorted(cpus_levels[domain[0]])
+                        if freq >= freqs[domain[0]]
+                    ]
+                    for domain in domains
+                ))
+            ]
+
+            options = []
+            for woken, cpu_freqs in product(woken_up, final_freqs):
+                used = [cpu for cpu in block if util[cpu] or cpu in woken]
+                fixed = 0
+                cpu_segments = {}
+                for cpu in used:
+                    idle_power = cpus_params[cpu][0]
+                    cap, slope = cpus_levels[cpu][cpu_freqs[cpu]]
+                    _fixed, cpu_segments[cpu] = linear_cost(
+                        base=idle_power + slope * util[cpu],
+                        slope=slope,
+                        power=nodes_power.get((cpu,), 0),
+                        size=max(0, min(limits[cpu], cap / margin) - util[cpu]),
+                    )
+                    fixed += _fixed
+
+                alternatives = [
+                    (
+                        fixed,
+                        [
+                            segment
+                            for cpu in used
+                            if cpu not in clustered
+                            for segment in cpu_segments[cpu]
+                        ]
+                    )
+                ]
+                for cpus, idle_power, slopes in clusters:
+                    used_cpus = [cpu for cpu in cpus if cpu in used]
+                    if not used_cpus:
+                        continue
+
+                    slope = slopes[cpu_freqs[cpus[0]]]
+                    power = nodes_power.get(cpus, 0)
+                    cpus_segments = sorted(
+                        segment
+                        for cpu in used_cpus
+                        for segment in cpu_segments[cpu]
+                    )
+                    # The maximum utilization is at least the average over
+                    # the CPUs that are used, so work in terms of total
+                    # utilization of the cluster.
+                    nr_cpus = len(used_cpus)
+                    total = sum(util[cpu] for cpu in cpus)
+                    _fixed, segments = linear_cost(
+                        base=idle_power + slope * total / nr_cpus,
+                        slope=slope / nr_cpus,
+                        power=power,
+                        size=sum(size for _, size in cpus_segments),
+                    )
+                    cluster_alternatives = [
+                        (_fixed, add_segments(cpus_segments, segments))
+                    ]
+
+                    # The maximum utilization is also at least the one of the
+                    # busiest CPU, so the power of the cluster can be
+                    # accounted on that CPU only.
+                    if total:
+                        busiest = max(cpus, key=lambda cpu: util[cpu])
+                        _fixed, segments = linear_cost(
+                            base=idle_power + slope * util[busiest],
+                            slope=slope,
+                            power=power,
+                            size=sum(size for _, size in cpu_segments[busiest]),
+                        )
+                        cluster_alternatives.append((
+                            _fixed,
+                            sorted(
+                                segment
+                                for cpu in used_cpus
+                                for segment in (
+                                    add_segments(cpu_segments[cpu], segments)
+                                    if cpu == busiest else
+                                    cpu_segments[cpu]
+                                )
+                            )
+                        ))
+
+                    alternatives = [
+                        (fixed + _fixed, segments + _segments)
+                        for fixed, segments in alternatives
+                        for _fixed, _segments in cluster_alternatives
+                    ]
+
+                options.append(alternatives)
+
+            return options
+
+        # The power of each block is memoized separately, so that placements
+        # only differing in one block do not need to estimate the power of
+        # the other ones again.
+        power_cache = {}
+        options_cache = {}
+
+        def get_block_power(block, block_util):
+            key = (tuple(block), block_util)
+            try:
+                return power_cache[key]
+            except KeyError:
+                util = [0] * len(self.cpus)
+                for cpu, u in zip(block, block_util):
+                    util[cpu] = u
+
+                freqs, _ = self._guess_freqs(util, capacity_margin_pct)
+                nodes_power = {
+                    cpus: node_power
+                    for cpus, node_power in self.estimate_from_cpu_util(util, freqs=freqs).items()
+                    if cpus[0] in block
+                }
+                power = sum(nodes_power.values())
+                power_cache[key] = (util, freqs, nodes_power, power)
+                return power_cache[key]
+
+        def get_block_options(block, block_util, block_limits):
+            key = (tuple(block), block_util, block_limits)
+            try:
+                return options_cache[key]
+            except KeyError:
+                util, freqs, nodes_power, _ = get_block_power(block, block_util)
+                limits = dict(zip(block, block_limits))
+                options = block_bound_options(block, util, limits, freqs, nodes_power)
+                options_cache[key] = options
+                return options
+
+        def get_power(util):
+            return sum(
+                get_block_power(block, tuple(util[cpu] for cpu in block))[-1]
+                for block in blocks
+            )
+
+        def lower_bound(util, limits=max_utils):
+            # If the power is monotonic, the power of the partial utilization
+            # is a lower bound of the power of any utilization derived from
+            # it. On top of that, the utilization left to place costs at
+            # least the cheapest increase of power of the nodes it can be
+            # placed on, up to the "limits" utilization of each CPU.
+            if bound_params is None:
+                return -math.inf
+
+            left = total - sum(util)
+            blocks_options = [
+                get_block_options(
+                    block,
+                    tuple(util[cpu] for cpu in block),
+                    tuple(limits[cpu] for cpu in block),
+                )
+                for block in blocks
+            ]
+
+            def fill(segments):
+                cost = 0
+                _left = left
+                for _cost, size in sorted(segments):
+                    if _left <= 0:
+                        return cost
+                    placed = min(_left, size)
+                    cost += _cost * placed
+                    _left -= placed
+
+                # The utilization does not fit on the CPUs that are used
+                if _left > abs(total) * rel_tol:
+                    return math.inf
+                else:
+                    return cost
+
+            # Each complete placement derived from the partial placement
+            # corresponds to one option of each block, so the bound is the
+            # cheapest of all the combinations of options.
+            return get_power(util) + min(
+                max(
+                    sum(fixed for fixed, _ in alternatives) + fill(chain.from_iterable(
+                        segments
+                        for _, segments in alternatives
+                    ))
+                    for alternatives in product(*options)
+                )
+                for options in product(*blocks_options)
+            )
+
+        def find_placement(target):
+            # Depth-first search of a placement of the tasks leading to the
+            # given canonical utilization, or None if there is none.
+            # Partial placements are tracked by their canonical utilization
+            # rather than by task, so identical tasks and symmetric CPUs do
+            # not multiply the number of states. The subtree of a given state
+            # at a given depth is always the same, so it is only explored
+            # once.
+            visited = set()
+
+            def place(depth, util):
+                if depth == len(caps):
+                    return util
+                elif (depth, util) in visited:
+                    return None
+
+                visited.add((depth, util))
+                # Try the CPUs with the most utilization left to reach first
+                for cpu in sorted(self.cpus, key=lambda cpu: util[cpu] - target[cpu]):
+                    new_util = list(util)
+                    new_util[cpu] += caps[depth]
+                    child = canonical(new_util)
+                    if all(
+                        u <= t + abs(t) * rel_tol
+                        for u, t in zip(child, target)
+                    ):
+                        found = place(depth + 1, child)
+                        if found is not None:
+                            return found
+                return None
+
+            return place(0, root)
+
+        def is_pruned(bound):
+            return bound == math.inf or bound > best + abs(best) * rel_tol
+
+        # Utilizations that can be reached by a subset of the tasks. There is
+        # at most one per unit of capacity with integer utilizations, but
+        # they can grow exponentially with the number of tasks otherwise.
+        sums = {0}
+        for cap in caps:
+            sums |= {
+                s + cap
+                for s in sums
+                if s + cap <= max(max_utils)
+            }
+            if len(sums) > self.capacity_scale + 1:
+                sums = None
+                break
+
+        best = math.inf
+        candidates = {}
+        if bound_params is None or sums is None:
+            # Best-first search: the partial placement with the lowest bound
+            # is always expanded first, so that the optimal placements are
+            # found before exploring any partial placement that cannot lead
+            # to them. Complete placements are queued with their actual
+            # power, which is also their bound. Ties are broken by depth to
+            # finish placements early when there is no bound.
+            #
+            # Partial placements are tracked by their canonical utilization
+            # rather than by task, so identical tasks and symmetric CPUs do
+            # not multiply the number of states. The subtree of a given state
+            # at a given depth is always the same, so it is only explored
+            # once.
+            visited = set()
+            queue = [(lower_bound(root), 0, root)]
+            state = None
+            nr_explored = 0
+            while queue or state:
+                if state is None:
+                    state = heapq.heappop(queue)
+                bound, depth, util = state
+                state = None
+                depth = -depth
+                if is_pruned(bound):
+                    break
+                elif depth == len(caps):
+                    best = min(best, bound)
+                    candidates[util] = bound
+                    continue
+
+                nr_explored += 1
+                cap = caps[depth]
+                depth += 1
+                children = []
+                for group in groups:
+                    # Placing the task on two symmetric CPUs with the same
+                    # utilization leads to the same canonical state
+                    seen = set()
+                    for cpu in group:
+                        u = util[cpu] + cap
+                        if util[cpu] in seen or u > max_utils[cpu]:
+                            continue
+                        seen.add(util[cpu])
+
+                        new_util = list(util)
+                        new_util[cpu] = u
+                        child = canonical(new_util)
+                        if (depth, child) not in visited:
+                            visited.add((depth, child))
+                            if depth == len(caps):
+                                child_bound = get_power(child)
+                            else:
+                                child_bound = lower_bound(child)
+
+                            if not is_pruned(child_bound):
+                                children.append((child_bound, -depth, child))
+
+                # Many partial placements usually have the same bound as the
+                # best one, up to rounding errors that would make the search
+                # explore them in a random order. Instead, the best child is
+                # explored right away if it is as good as its parent.
+                if children:
+                    children.sort()
+                    if children[0][0] <= bound + abs(bound) * rel_tol:
+                        state, *children = children
+                    for child in children:
+                        heapq.heappush(queue, child)
+
+            logger.debug(f'Explored {nr_explored} partial placements')
+        else:
+            # Many different placements of the tasks usually lead to the same
+            # utilization, and the lower bound cannot tell apart the ones that
+            # cannot be completed because of the granularity of the tasks.
+            # Instead of placing one task at a time, the canonical
+            # utilizations are therefore enumerated one CPU at a time among
+            # the utilizations that can be reached by a subset of the tasks.
+            # A best-first search enumerates them by increasing power, and
+            # they are checked against the actual tasks once complete.
+            sums = sorted(sums)
+            group_prev = {
+                cpu: group[i - 1]
+                for group in groups
+                for i, cpu in enumerate(group)
+                if i
+            }
+            last_cpu = len(self.cpus) - 1
+
+            queue = [(lower_bound(root), 0, root)]
+            nr_explored = 0
+            while queue:
+                bound, cpu, util = heapq.heappop(queue)
+                if is_pruned(bound):
+                    break
+                elif cpu > last_cpu:
+                    placement = find_placement(util)
+                    if placement is not None:
+                        candidates[placement] = bound
+                        best = min(best, bound)
+                    continue
+
+                nr_explored += 1
+                placed = sum(util)
+                # The utilization of symmetric CPUs is decreasing, so that
+                # only canonical utilizations are enumerated.
+                limit = min(
+                    max_utils[cpu],
+                    util[group_prev[cpu]] if cpu in group_prev else math.inf,
+                )
+                for u in sums:
+                    left = total - placed - u
+                    if u > limit or left < -abs(total) * rel_tol:
+                        break
+                    # The last CPU gets all the utilization left
+                    elif cpu == last_cpu and left > abs(total) * rel_tol:
+                        continue
+
+                    new_util = list(util)
+                    new_util[cpu] = u
+                    new_util = tuple(new_util)
+                    if cpu == last_cpu:
+                        child_bound = get_power(new_util)
+                    else:
+                        # The utilization of the CPUs up to "cpu" is final
+                        limits = new_util[:cpu + 1] + tuple(max_utils[cpu + 1:])
+                        child_bound = lower_bound(new_util, limits)
+
+                    if not is_pruned(child_bound):
+                        heapq.heappush(queue, (child_bound, cpu + 1, new_util))
+
+            logger.debug(f'Explored {nr_explored} partial utilizations')
+
+        if candidates:
+            best = min(candidates.values())
+
+        # Expand the optimal canonical placements back to all the distinct
+        # equivalent placements, which have the same estimated power.
+        ret = {}
+        for util, power in candidates.items():
+            if not math.isclose(power, best, rel_tol=rel_tol):
+                continue
+
+            group_perms = [
+                [
+                    dict(zip(group, perm))
+                    for perm in _distinct_permutations([util[cpu] for cpu in group])
+                ]
+                for group in groups
+            ]
+            for perms in product(*group_perms):
+                util = [0] * len(self.cpus)
+                for perm in perms:
+                    for cpu, u in perm.items():
+                        util[cpu] = u
+                ret[tuple(util)] = power
+
+        return ret
+
+    def get_optimal_placements(self, capacities, capacity_margin_pct=0, brute_force=False):
         """Find the optimal distribution of work for a set of tasks
 
         Find a list of candidates which are estimated to be optimal in terms of
@@ -701,8 +1449,14 @@ class EnergyModel(Serializable, Loggable):
         states for CPUs.
 
         .. note::
-            This is a brute force search taking time exponential wrt. the number
-            of tasks.
+            The search only considers placements that are not equivalent by
+            swapping identical tasks or identical CPUs, and stops exploring a
+            placement as soon as a CPU is overutilized. If the estimated power
+            increases with the utilization of each CPU (which is the case if
+            higher OPPs are less efficient and deeper idle states use less
+            power), partial placements are also pruned as soon as their power
+            exceeds the one of the best placement found so far. It can still
+            take time exponential wrt. the number of tasks in the worst case.
 
         :param capacities: Dict mapping tasks to expected utilization
                            values. These tasks are assumed not to change; they
@@ -710,52 +1464,35 @@ class EnergyModel(Serializable, Loggable):
                            single-phase periodic RT-App tasks is an example of a
                            suitable workload for this model.
         :param capacity_margin_pct: Capacity margin before overutilizing a CPU
+        :param brute_force: If ``True``, evaluate every possible task placement
+                            rather than using the optimized search. Both give
+                            the same result.
         :returns: List of ``cpu_utils`` items representing distributions of work
                   under optimal task placements, see
                   :ref:`cpu_utils <cpu-utils>`. Multiple task placements
                   that result in the same CPU utilizations are considered
                   equivalent.
         """
-        tasks = list(capacities.keys())
-
-        num_candidates = len(self.cpus) ** len(tasks)
-
         logger = self.logger
-        logger.debug(
-            f'Searching {num_candidates} configurations for optimal task placement...')
-
-        candidates = {}
-        excluded = []
-        for cpus in product(self.cpus, repeat=len(tasks)):
-            placement = dict(zip(tasks, cpus))
-
-            util = [0] * len(self.cpus)
-            for task, cpu in placement.items():
-                util[cpu] += capacities[task]
-            util = tuple(util)
-
-            # Filter out candidate placements that have tasks greater than max
-            # or that we have already determined that we cannot place.
-            if (any(u > self.capacity_scale for u in util) or util in excluded):
-                continue
-
-            if util not in candidates:
-                freqs, overutilized = self._guess_freqs(util, capacity_margin_pct)
-                if overutilized:
-                    # This isn't a valid placement
-                    excluded.append(util)
-                else:
-                    power = self.estimate_from_cpu_util(util, freqs=freqs)
-                    candidates[util] = sum(power.values())
+        if brute_force:
+            candidates = self._get_optimal_placements_brute_force(capacities, capacity_margin_pct)
+        else:
+            candidates = self._get_optimal_placements_search(capacities, capacity_margin_pct)
 
         if not candidates:
             # The system can't provide full throughput to this workload.
             raise EnergyModelCapacityError(
                 f"Can't handle workload: total capacity = {sum(capacities.values())}")
 
-        # Whittle down to those that give the lowest energy estimate
+        # Whittle down to those that give the lowest energy estimate. Swapping
+        # symmetric CPUs only changes the order of floating point operations,
+        # so the estimates are compared with a tolerance.
         min_power = min(p for p in iter(candidates.values()))
-        ret = [u for u, p in candidates.items() if p == min_power]
+        ret = [
+            u
+            for u, p in candidates.items()
+            if math.isclose(p, min_power, rel_tol=1e-9)
+        ]
 
         logger.debug('done')
         return ret
@@ -874,53 +1611,152 @@ class EnergyModel(Serializable, Loggable):
         # (e.g. where we have had our first cpu_idle event but no cpu_frequency)
         inputs = inputs.dropna()
         # Convert to int wholesale so we can do things like use the values in
-        # the inputs DataFrame as list indexes. The only reason we had floats
+        # the inputs DataFrame as array indexes. The only reason we had floats
         # was to make room for NaN, but we've just dropped all the NaNs, so
         # that's fine.
         inputs = inputs.astype(int)
         inputs = df_deduplicate(inputs, keep='first', consecutives=True)
 
-        memo_cache = {}
+        for kind in ('idle', 'freq'):
+            missing = set(self.cpus) - set(inputs[kind].columns)
+            if missing:
+                raise ValueError(f'No {kind} data in the trace for CPUs {sorted(missing)}')
 
-        def f(input_row):
-            # The code in this module is slow. Try not to call it too much.
-            memo_key = tuple(input_row)
-            if memo_key in memo_cache:
-                return memo_cache[memo_key]
-
-            # cpuidle doesn't understand shared resources so it will claim to
-            # put a CPU into e.g. 'cluster sleep' while its cluster siblings are
-            # active. Rectify those false claims.
-            cpus_active = input_row['idle'] == -1
-            deepest_possible = self._deepest_idle_idxs(cpus_active)
-            idle_idxs = [min(i, j) for i, j in zip(deepest_possible,
-                                                   input_row['idle'])]
+        nrg = self._estimate_from_idle_freqs(
+            idle=inputs['idle'][list(self.cpus)].to_numpy(),
+            freqs=inputs['freq'][list(self.cpus)].to_numpy(),
+        )
+        return pandas.DataFrame(nrg, index=inputs.index)
 
-            # Convert indexes to state names
-            idle_states = [n.idle_state_by_idx(max(i, 0))
-                           for n, i in zip(self.cpu_nodes, idle_idxs)]
+    def _estimate_from_idle_freqs(self, idle, freqs):
+        """
+        Vectorized equivalent of :meth:`estimate_from_cpu_util` for CPUs that
+        are either fully active or idle.
 
-            # We don't use tracked load, we just treat a CPU as active or idle,
-            # so set util to 0 or 100%.
-            utils = cpus_active * self.capacity_scale
+        :param idle: 2D array with one row per sample and one column per CPU,
+            containing the index of the idle state of the CPU, or ``-1`` if the
+            CPU is active.
+        :type idle: numpy.ndarray
 
-            nrg = self.estimate_from_cpu_util(cpu_utils=utils,
-                                              idle_states=idle_states,
-                                              freqs=input_row['freq'])
+        :param freqs: 2D array of the same shape as ``idle`` with the frequency
+            of each CPU.
+        :type freqs: numpy.ndarray
 
-            # nrg is a dict mapping CPU group tuples to energy values.
-            # Unfortunately tuples don't play nicely as pandas column labels
-            # because parts of its API treat that as nested indexing
-            # (i.e. df[(0, 1)] sometimes means df[0][1]). So we'll give them
-            # awkward names.
+        :returns: Dict mapping the CPUs of each node, joined by ``-``, to an
+            array of power values for each sample.
 
-            nrg = {'-'.join(str(c) for c in k): v for k, v in iter(nrg.items())}
+        The power of each node is computed with per-node lookup tables indexed
+        by frequency and idle state index, rather than by calling
+        :meth:`estimate_from_cpu_util` for each sample.
+        """
+        def lookup(mapping, keys, get=lambda x: x):
+            # Vectorized version of [get(mapping[key]) for key in keys]
+            table_keys = np.array(list(mapping.keys()))
+            table_values = np.array([get(v) for v in mapping.values()], dtype=float)
+            order = np.argsort(table_keys)
+            table_keys = table_keys[order]
+            table_values = table_values[order]
+
+            pos = np.searchsorted(table_keys, keys).clip(max=len(table_keys) - 1)
+            found = table_keys[pos] == keys
+            if not found.all():
+                raise KeyError(keys[~found][0])
+            return table_values[pos]
+
+        cpus_active = idle == -1
+
+        # cpuidle doesn't understand shared resources so it will claim to put
+        # a CPU into e.g. 'cluster sleep' while its cluster siblings are
+        # active. Rectify those false claims. This is the vectorized version of
+        # _deepest_idle_idxs()
+        deepest_memo = {}
+        def find_deepest(pd):
+            try:
+                return deepest_memo[pd]
+            except KeyError:
+                pass
 
-            ret = pandas.Series(nrg)
-            memo_cache[memo_key] = ret
+            if pd.parent:
+                parent_idx = find_deepest(pd.parent)
+            else:
+                parent_idx = -1
+            ret = np.where(
+                cpus_active[:, list(pd.cpus)].any(axis=1),
+                -1,
+                parent_idx + len(pd.idle_states),
+            )
+            deepest_memo[pd] = ret
             return ret
 
-        return inputs.apply(f, axis=1)
+        deepest_possible = np.stack(
+            [find_deepest(pd) for pd in self.cpu_pds],
+            axis=1,
+        )
+        idle_idxs = np.maximum(np.minimum(deepest_possible, idle), 0)
+
+        for cpu, node in enumerate(self.cpu_nodes):
+            nr_states = len(node.idle_states or [])
+            if (idle_idxs[:, cpu] >= nr_states).any():
+                raise KeyError(f'No idle state with index {idle_idxs[:, cpu].max()}')
+
+        # We don't use tracked load, we just treat a CPU as active or idle,
+        # so set util to 0 or 100%.
+        cpu_active_time = np.stack(
+            [
+                np.minimum(
+                    cpus_active[:, cpu] * self.capacity_scale /
+                    lookup(node.active_states, freqs[:, cpu], lambda s: s.capacity),
+                    1.0,
+                )
+                for cpu, node in enumerate(self.cpu_nodes)
+            ],
+            axis=1,
+        )
+
+        ret = {}
+        for node in self.root.iter_nodes():
+            # Some nodes might not have energy model data, they could just be
+            # used to group other nodes (likely the root node, for example).
+            if not node.active_states or not node.idle_states:
+                continue
+
+            cpus = list(node.cpus)
+            # The active time of a node is estimated as the max of the active
+            # times of its children, see _estimate_from_active_time()
+            active_time = cpu_active_time[:, cpus].max(axis=1)
+            active_power = lookup(
+                node.active_states,
+                freqs[:, cpus[0]],
+                lambda s: s.power,
+            ) * active_time
+
+            def get_idle_power(cpu):
+                # Power of this node in each of the idle states of the CPU,
+                # indexed by the idle state index of the CPU
+                states = list(self.cpu_nodes[cpu].idle_states.keys())
+                table = np.array([
+                    node.idle_states.get(state, np.nan)
+                    for state in states
+                ])
+                power = table[idle_idxs[:, cpu]]
+                missing = np.isnan(power)
+                if missing.any():
+                    raise KeyError(states[idle_idxs[:, cpu][missing][0]])
+                return power
+
+            _idle_power = np.stack(
+                [get_idle_power(cpu) for cpu in cpus],
+                axis=1,
+            ).max(axis=1)
+            idle_power = _idle_power * (1 - active_time)
+
+            # Tuples don't play nicely as pandas column labels because parts of
+            # its API treat that as nested indexing (i.e. df[(0, 1)] sometimes
+            # means df[0][1]). So we'll give them awkward names.
+            name = '-'.join(str(c) for c in cpus)
+            ret[name] = ret.get(name, 0) + active_power + idle_power
+
+        return ret
 
     @classmethod
     @memoized
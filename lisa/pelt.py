@@ -18,6 +18,7 @@
 import math
 import functools
 
+import numpy as np
 import pandas as pd
 
 from lisa.datautils import series_envelope_mean
@@ -35,7 +36,7 @@ PELT half-life in number of windows.
 PELT_SCALE = 1024
 
 
-def simulate_pelt(activations, init=0, index=None, clock=None, capacity=None, windowless=False, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
+def simulate_pelt(activations, init=0, index=None, clock=None, capacity=None, windowless=False, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE, engine='numpy'):
     """
     Simulate a PELT signal out of a series of activations.
 
@@ -75,6 +76,14 @@ def simulate_pelt(activations, init=0, index=None, clock=None, capacity=None, wi
     :param scale: Scale of the signal, i.e. maximum value it can take.
     :type scale: float
 
+    :param engine: Simulation engine to use:
+
+        * ``numpy``: vectorized implementation.
+        * ``python``: reference implementation updating the signal one
+          activation at a time. It is much slower but easier to audit.
+
+    :type engine: str
+
     .. note:: PELT windowing is not time-invariant, i.e. it depends on the
         absolute value of the timestamp. This means that the timestamp of the
         activations matters, and it is recommended to use the ``clock``
@@ -184,6 +193,124 @@ def simulate_pelt(activations, init=0, index=None, clock=None, capacity=None, wi
     # some NaN at the beginning of the dataframe as well
     df.dropna(inplace=True)
 
+    if engine == 'numpy':
+        simulate = _simulate_pelt_numpy
+    elif engine == 'python':
+        simulate = _simulate_pelt_python
+    else:
+        raise ValueError(f'Unknown engine "{engine}"')
+
+    df['pelt'] = simulate(
+        df,
+        init=init,
+        windowless=windowless,
+        window=window,
+        half_life=half_life,
+        scale=scale,
+    )
+    pelt = df['pelt']
+    if pelt.index is not index:
+        pelt = pelt.reindex(index, method='ffill')
+    return pelt
+
+
+def simulate_pelt_batch(df, col='pid', activations_col='activations', clock_col=None, init=0, windowless=False, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
+    """
+    Simulate the PELT signals of multiple tasks in one go.
+
+    :param df: Long-format dataframe of activations of all the tasks, indexed
+        by timestamp.
+    :type df: pandas.DataFrame
+
+    :param col: Column identifying the task each row belongs to, e.g. a PID.
+    :type col: str
+
+    :param activations_col: Column of activations: ``1 == running`` and ``0
+        == sleeping``.
+    :type activations_col: str
+
+    :param clock_col: Optional column of clock values to be used instead of
+        the timestamp index. Unlike :func:`simulate_pelt`, missing clock values
+        are not extrapolated, and rows without a clock value are ignored.
+    :type clock_col: str or None
+
+    :returns: A :class:`pandas.DataFrame` with the same index and row order as
+        ``df``, with the ``col`` column and a ``pelt`` column.
+
+    Other parameters are the same as :func:`simulate_pelt`. For each task,
+    the result is the same as calling :func:`simulate_pelt` on its own
+    activations, but the simulation of all the tasks is vectorized rather
+    than paying the overhead of a separate pandas pipeline for each of them.
+    """
+    index = df.index
+    # The default RangeIndex keeps track of the original position of rows
+    all_df = pd.DataFrame(
+        {
+            col: df[col].to_numpy(),
+            'activations': df[activations_col].to_numpy(),
+            'clock': (
+                index.to_numpy()
+                if clock_col is None else
+                df[clock_col].to_numpy()
+            ),
+            'time': index.to_numpy(),
+        },
+    )
+    all_df.sort_values([col, 'time'], kind='stable', inplace=True)
+    sim_df = all_df.dropna(subset=['clock'])
+
+    grouped = sim_df.groupby(col, sort=False)
+
+    # Ensure the clock is monotonic
+    prev_clock = grouped['clock'].shift()
+    clock = sim_df['clock'].where(
+        cond=(sim_df['clock'] >= prev_clock.fillna(sim_df['clock'])),
+        other=prev_clock,
+    )
+    sim_df = sim_df.assign(
+        clock=clock,
+        delta=clock.groupby(sim_df[col], sort=False).diff(),
+        crossed_windows=(clock // window).groupby(sim_df[col], sort=False).diff(),
+        # We want to have the entity state in the window between the previous
+        # sample and now.
+        activations=grouped['activations'].shift(),
+    )
+    sim_df = sim_df.dropna(subset=['delta', 'activations'])
+
+    all_df['pelt'] = _simulate_pelt_numpy(
+        sim_df,
+        init=init,
+        windowless=windowless,
+        window=window,
+        half_life=half_life,
+        scale=scale,
+        group=pd.factorize(sim_df[col])[0],
+    )
+    # Rows that were ignored for the simulation get the last value of their
+    # task, as simulate_pelt() does
+    all_df['pelt'] = all_df.groupby(col, sort=False)['pelt'].ffill()
+    all_df.sort_index(inplace=True)
+
+    return pd.DataFrame(
+        {
+            col: all_df[col].to_numpy(),
+            'pelt': all_df['pelt'].to_numpy(),
+        },
+        index=index,
+    )
+
+
+def _simulate_pelt_python(df, init, windowless, window, half_life, scale):
+    """
+    Reference implementation of the PELT simulation, updating the signal one
+    row at a time.
+
+    :param df: Dataframe with ``activations``, ``clock``, ``delta`` and
+        ``crossed_windows`` columns, as prepared by :func:`simulate_pelt`.
+    :type df: pandas.DataFrame
+
+    Other parameters are the same as :func:`simulate_pelt`.
+    """
     def make_windowed_pelt_sim(init, scale, window, half_life):
         decay = (1 / 2)**(1 / half_life)
         # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
@@ -275,11 +402,185 @@ def simulate_pelt(activations, init=0, index=None, clock=None, capacity=None, wi
         half_life=half_life,
         scale=scale,
     )
-    df['pelt'] = df.apply(sim, axis=1)
-    pelt = df['pelt']
-    if pelt.index is not index:
-        pelt = pelt.reindex(index, method='ffill')
-    return pelt
+    return df.apply(sim, axis=1)
+
+
+_LINEAR_RECURRENCE_MAX_LOG_DECAY = 64
+"""
+Maximum amount of decay (in log space) within a segment of
+:func:`_linear_recurrence`, so that the inputs rescaled relatively to the
+start of the segment stay well within the range of float64.
+"""
+
+
+def _linear_recurrence(log_a, b, init, reset=None):
+    """
+    Vectorized solver for the first order linear recurrence
+    ``y[k] = exp(log_a[k]) * y[k-1] + b[k]`` with ``y[-1] = init``.
+
+    :param log_a: Natural logarithm of the (non-increasing) decay factor
+        applied at each step.
+    :type log_a: numpy.ndarray
+
+    :param b: Input added at each step.
+    :type b: numpy.ndarray
+
+    :param init: Initial value of the output.
+    :type init: float
+
+    :param reset: Optional boolean array. The recurrence restarts from
+        ``init`` at each ``True`` item, so that multiple independent series
+        can be solved in one call.
+    :type reset: numpy.ndarray or None
+
+    The closed form ``y[k] = A[k] * (init + sum(b[j] / A[j] for j <= k))``
+    with ``A[k] = prod(a[:k+1])`` cannot be computed directly as ``A``
+    quickly underflows. Instead, the input is split into segments over which
+    the decay stays within :attr:`_LINEAR_RECURRENCE_MAX_LOG_DECAY`, and each
+    segment is computed relatively to the decay at its first element. Only the
+    state carried from one segment to the next is computed in a Python loop,
+    and there is typically one segment every few hundreds of milliseconds of
+    simulated time.
+    """
+    log_a = np.asarray(log_a, dtype='float64')
+    b = np.asarray(b, dtype='float64')
+    if not len(b):
+        return b.copy()
+
+    cum_log_a = np.cumsum(log_a)
+    seg_id = np.floor(-cum_log_a / _LINEAR_RECURRENCE_MAX_LOG_DECAY)
+    is_seg_start = np.concatenate(([True], seg_id[1:] != seg_id[:-1]))
+    if reset is not None:
+        is_seg_start |= reset
+    seg_start = np.flatnonzero(is_seg_start)
+    seg_len = np.diff(np.append(seg_start, len(b)))
+    seg = np.repeat(np.arange(len(seg_start)), seg_len)
+
+    # Decay relative to the first element of each segment, within
+    # [exp(-_LINEAR_RECURRENCE_MAX_LOG_DECAY), 1]
+    rel_log_decay = pd.Series(log_a).groupby(seg, sort=False).cumsum().to_numpy()
+    rel_log_decay -= np.repeat(log_a[seg_start], seg_len)
+    rel_decay = np.exp(rel_log_decay)
+    rel_input = pd.Series(b * np.exp(-rel_log_decay))
+    rel_cumsum = rel_input.groupby(seg, sort=False).cumsum().to_numpy()
+
+    # Value carried into each segment, i.e. the output just before the segment
+    # started, decayed by the first step of the segment
+    seg_end = seg_start + seg_len - 1
+    first_decay = np.exp(log_a[seg_start]).tolist()
+    end_decay = rel_decay[seg_end].tolist()
+    end_cumsum = rel_cumsum[seg_end].tolist()
+    seg_reset = (
+        [False] * len(seg_start)
+        if reset is None else
+        reset[seg_start].tolist()
+    )
+    carry = []
+    y = init
+    for first_decay_, end_decay_, end_cumsum_, reset_ in zip(first_decay, end_decay, end_cumsum, seg_reset):
+        if reset_:
+            y = init
+        carry_ = first_decay_ * y
+        carry.append(carry_)
+        y = end_decay_ * (carry_ + end_cumsum_)
+
+    return rel_decay * (np.repeat(carry, seg_len) + rel_cumsum)
+
+
+def _simulate_pelt_numpy(df, init, windowless, window, half_life, scale, group=None):
+    """
+    Vectorized implementation of the PELT simulation, equivalent to
+    :func:`_simulate_pelt_python`.
+
+    :param group: Optional array of integers of the same length as ``df``. A
+        separate signal is simulated for each contiguous block of rows with
+        the same value, starting from ``init``.
+    :type group: numpy.ndarray or None
+
+    Both the windowless and windowed simulations are first order linear
+    recurrences, which are solved with :func:`_linear_recurrence`.
+    """
+    running = df['activations'].to_numpy(dtype='float64')
+    delta = df['delta'].to_numpy(dtype='float64')
+
+    if group is None:
+        reset = np.zeros(len(df), dtype=bool)
+    else:
+        group = np.asarray(group)
+        reset = np.concatenate(([False], group[1:] != group[:-1]))
+
+    if windowless:
+        tau = _pelt_tau(half_life, window)
+        log_decay = -delta / tau
+        signal = _linear_recurrence(
+            log_a=log_decay,
+            b=running * scale * -np.expm1(log_decay),
+            init=init,
+            reset=reset,
+        )
+        return pd.Series(signal, index=df.index)
+
+    decay = (1 / 2)**(1 / half_life)
+    # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
+    alpha = 1 - decay
+    log_decay = math.log(1 - alpha)
+
+    clock = df['clock'].to_numpy(dtype='float64')
+    windows = df['crossed_windows'].to_numpy().astype('int64')
+    crossed = windows > 0
+
+    # Running time accumulated in the current window by the rows that did not
+    # cross any window boundary, up to the next row that does. A new window
+    # starts after each crossing row and at the beginning of each group.
+    in_window = np.where(crossed, 0, running * delta / window)
+    window_start = reset.copy()
+    window_start[1:] |= crossed[:-1]
+    acc = pd.Series(in_window).groupby(
+        np.cumsum(window_start),
+        sort=False,
+    ).cumsum().to_numpy()
+
+    running = running[crossed]
+    clock = clock[crossed]
+    delta = delta[crossed]
+    windows = windows[crossed]
+    acc = acc[crossed]
+
+    first_window_fraction = (window - ((clock - delta) % window)) / window
+    last_window_fraction = (clock % window) / window
+    acc += running * first_window_fraction
+
+    # Decay over the windows that were fully crossed
+    full_decay = np.exp((windows - 1) * log_decay)
+    last_window = alpha * running * last_window_fraction
+
+    # Signal at the end of each crossing row, including the contribution of
+    # the current incomplete window
+    crossed_group = np.cumsum(reset)[crossed]
+    signal = _linear_recurrence(
+        log_a=windows * log_decay,
+        b=(
+            full_decay * alpha * acc +
+            running * (1 - full_decay) +
+            last_window
+        ),
+        init=init / scale,
+        reset=np.concatenate(([False], crossed_group[1:] != crossed_group[:-1])),
+    )
+    # Signal at the end of the last complete window
+    signal -= last_window
+
+    # Interpolate between the signal and its extrapolated value at the end of
+    # the current window, in the same way as kernel commit:
+    #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
+    output = signal * (1 - alpha * last_window_fraction) + last_window
+
+    # Rows that do not cross a window boundary keep the last output of their
+    # group, or the initial value
+    pelt = np.full(len(df), np.nan)
+    pelt[reset] = init
+    pelt[crossed] = output * scale
+    return pd.Series(pelt, index=df.index).ffill().fillna(init)
 
 
 def _pelt_tau(half_life, window):
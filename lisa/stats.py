@@ -18,7 +18,7 @@ import uuid
 import functools
 from operator import itemgetter
 import contextlib
-from math import nan
+from math import nan, inf
 import itertools
 from itertools import combinations
 from collections import OrderedDict
@@ -31,8 +31,8 @@ import holoviews as hv
 import holoviews.operation
 from bokeh.models import HoverTool
 
-from lisa.utils import Loggable, memoized, FrozenDict, deduplicate, fold
-from lisa.datautils import df_split_signals, df_make_empty_clone, df_filter, df_find_redundant_cols
+from lisa.utils import Loggable, memoized, deduplicate, fold
+from lisa.datautils import df_make_empty_clone, df_filter, df_find_redundant_cols
 
 # Ensure hv.extension() is called
 import lisa.notebook
@@ -102,6 +102,87 @@ def series_mean_stats(series, kind, confidence_level=0.95):
     interval = tuple(sorted(map(post, interval)))
     return (mean, std, sem, interval)
 
+
+def _grouped_bootstrap_interval(values, ids, confidence_level, resamples, seed=None, max_mem=None):
+    """
+    Compute the percentile bootstrap confidence interval of the arithmetic
+    mean of groups of values.
+
+    The resamples of all the groups are drawn at once, unless that would
+    require more than ``max_mem`` bytes, in which case the groups and then the
+    resamples are split in chunks processed one after the other.
+
+    :param values: Values of all the groups.
+    :type values: numpy.ndarray
+
+    :param ids: Group number of each value, starting from ``0``. The values of
+        a given group must be contiguous, and the groups sorted by number.
+    :type ids: numpy.ndarray
+
+    :param confidence_level: Confidence level of the confidence interval.
+    :type confidence_level: float
+
+    :param resamples: Number of resamples drawn for each group.
+    :type resamples: int
+
+    :param seed: Seed of the random number generator.
+    :type seed: int or None
+
+    :param max_mem: Approximate maximum memory in bytes used by the
+        resamples.
+    :type max_mem: int or None
+
+    :returns: A tuple ``(low, high)`` of arrays with the bounds of the
+        interval of each group.
+
+    .. note:: The random draws depend on ``max_mem``, so the same seed will
+        only give the same results for the same ``max_mem``.
+    """
+    values = np.asarray(values, dtype='float64')
+    sizes = np.bincount(ids)
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    nr_groups = len(sizes)
+
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence_level) / 2
+    # Each resampled value requires an int64 index and a float64 value
+    item_mem = 16
+    max_mem = max_mem or inf
+
+    low = np.empty(nr_groups)
+    high = np.empty(nr_groups)
+    first = 0
+    while first < nr_groups:
+        # Take as many groups as can be resampled at once, and at least one
+        max_rows = max_mem / (item_mem * resamples)
+        last = np.searchsorted(ends, starts[first] + max_rows, side='right')
+        last = max(first + 1, last)
+
+        block_sizes = sizes[first:last]
+        block_starts = starts[first:last] - starts[first]
+        block_values = values[starts[first]:ends[last - 1]]
+        nr_rows = len(block_values)
+        row_starts = np.repeat(block_starts, block_sizes)
+        row_sizes = np.repeat(block_sizes, block_sizes)
+
+        chunk = int(max(1, min(resamples, max_mem // (item_mem * nr_rows))))
+        means = np.empty((resamples, last - first))
+        for i in range(0, resamples, chunk):
+            n = min(chunk, resamples - i)
+            # Scaling uniform floats is much faster than
+            # Generator.integers() with an array of bounds.
+            idx = rng.random((n, nr_rows))
+            idx *= row_sizes
+            idx = idx.astype('int64')
+            idx += row_starts
+            means[i:i + n] = np.add.reduceat(block_values[idx], block_starts, axis=1) / block_sizes
+
+        low[first:last], high[first:last] = np.quantile(means, [alpha, 1 - alpha], axis=0)
+        first = last
+
+    return (low, high)
+
 def guess_mean_kind(unit, control_var):
     """
     Guess which kind of mean should be used to summarize results in the given
@@ -208,6 +289,29 @@ class Stats(Loggable):
         confidence interval, between ``0`` and ``1``.
     :type mean_ci_confidence: float
 
+    :param mean_ci_method: Method used to establish the mean confidence
+        interval:
+
+            * ``'t-score'``: Interval based on the T-score, which assumes the
+              mean is normally distributed.
+            * ``'bootstrap'``: Percentile bootstrap interval, better suited to
+              small samples of skewed data such as latencies.
+
+        Defaults to ``'t-score'``.
+    :type mean_ci_method: str or None
+
+    :param bootstrap_resamples: Number of resamples drawn for each group when
+        ``mean_ci_method='bootstrap'``.
+    :type bootstrap_resamples: int
+
+    :param bootstrap_seed: Seed of the random number generator used when
+        ``mean_ci_method='bootstrap'``.
+    :type bootstrap_seed: int or None
+
+    :param bootstrap_max_mem: Approximate maximum amount of memory in bytes
+        used to hold the resamples when ``mean_ci_method='bootstrap'``.
+    :type bootstrap_max_mem: int or None
+
     :param stats: Dictionnary of statistical functions to summarize each value
         group formed by tag columns along the aggregation columns. If ``None``
         is given as value, the name will be passed to
@@ -321,6 +425,10 @@ class Stats(Loggable):
         compare=True,
         agg_cols=None,
         mean_ci_confidence=None,
+        mean_ci_method=None,
+        bootstrap_resamples=10000,
+        bootstrap_seed=None,
+        bootstrap_max_mem=256 * 2**20,
         stats=None,
         stat_col='stat',
         unit_col='unit',
@@ -336,6 +444,12 @@ class Stats(Loggable):
         if df.empty:
             raise ValueError('Empty dataframes are not handled')
 
+        mean_ci_method = mean_ci_method or 't-score'
+        if mean_ci_method not in ('t-score', 'bootstrap'):
+            raise ValueError(f'Unrecognized mean confidence interval method: {mean_ci_method}')
+        if bootstrap_resamples < 1:
+            raise ValueError(f'At least one bootstrap resample is needed: {bootstrap_resamples}')
+
         if filter_rows:
             df = df_filter(df, filter_rows)
 
@@ -457,6 +571,10 @@ class Stats(Loggable):
         self._stat_col = stat_col
         self._mean_kind_col = mean_kind_col
         self._mean_ci_confidence = 0.95 if mean_ci_confidence is None else mean_ci_confidence
+        self._mean_ci_method = mean_ci_method
+        self._bootstrap_resamples = bootstrap_resamples
+        self._bootstrap_seed = bootstrap_seed
+        self._bootstrap_max_mem = bootstrap_max_mem
         self._unit_col = unit_col
         self._control_var_col = control_var_col
         self._tweak_cols = tweak_cols
@@ -522,126 +640,82 @@ class Stats(Loggable):
             **kwargs
         )
 
-    def _df_group_apply(self, df, func, melt=False, index_cols=None):
+    def _df_subgroups(self, df):
         """
-        Apply ``func`` on subsets of the dataframe and return the concatenated
-        result.
+        Split the dataframe in groups as asked by the user with ``ref_group``,
+        and further in subgroups along the remaining tag columns.
 
         :param df: Dataframe in database format (meaningless index, tag and
             value columns).
         :type df: pandas.DataFrame
 
-        :param func: Callable called with 3 parameters:
-
-            * ``ref``: Reference subgroup dataframe for comparison purposes. In
-              some cases, there is nothing to compare to (the user passed
-              ``None`` for all keys in ``ref_group``) so ``ref`` will be
-              ``None``.
-            * ``df``: Dataframe of the subgroup, to compare to ``ref``.
-            * ``group``: Dictionary ``dict(column_name, value)`` identifying
-              the ``df`` subgroup.
-        :type func: collections.abc.Callable
-
-        :param melt: If ``True``, extra columns added by the callback in the
-            return :class:`pandas.DataFrame` will be melted, i.e. they will be
-            turned into row with the column name being copied to the stat column.
-        :type melt: bool
-
-        :param index_cols: Columns to aggregate on that will be used for
-            indexing the sub-dataframes, instead of the default ``agg_cols``.
-        :type index_cols: list(str) or None
+        :returns: A tuple ``(df, ids, ref_ids, keys)`` with:
+
+            * ``df``: The input dataframe with the rows of each subgroup made
+              contiguous. The subgroups are ordered by group and then by
+              subgroup, in order of first appearance. Rows with a missing tag
+              are removed, as they cannot be attributed to any subgroup.
+            * ``ids``: :class:`numpy.ndarray` with the subgroup number of each
+              row of ``df``.
+            * ``ref_ids``: :class:`numpy.ndarray` giving for each subgroup the
+              number of the subgroup of the reference group it is compared
+              to, or ``-1`` if there is none. The reference group only exists
+              if all the values of ``ref_group`` are different from ``None``.
+            * ``keys``: :class:`pandas.DataFrame` with the values of the
+              columns identifying each subgroup.
         """
-        ref_group = FrozenDict(self._ref_group)
-        # All the columns that are not involved in the group itself except the
-        # value will be used as index, so that the reference group and other
-        # groups can be joined meaningfully on the index for comparison
-        # purposes.
-        index_cols = index_cols if index_cols is not None else self._agg_cols
-        index_cols = self._restrict_cols(index_cols, df)
+        ref_group = self._ref_group
+        group_cols = list(ref_group.keys())
         sub_group_cols = self._restrict_cols(self._sub_group_cols, df)
+        cols = group_cols + sub_group_cols
 
-        def process_subgroup(df, group, subgroup):
-            subgroup = FrozenDict(subgroup)
-            ref = subref.get(subgroup)
-            group = {**group, **subgroup}
+        if cols:
+            df = df[df[cols].notna().all(axis=1)]
 
-            # Make sure that the columns/index levels relative to the group are
-            # removed, since they are useless because they have a constant value
-            def remove_cols(df):
-                to_remove = group.keys()
-                df = df.drop(columns=self._restrict_cols(to_remove, df))
-                try:
-                    drop_level = df.index.droplevel
-                except AttributeError:
-                    pass
+        def ngroup(df, cols):
+            if cols:
+                return df.groupby(cols, observed=True, sort=False).ngroup().to_numpy()
+            else:
+                return np.zeros(len(df), dtype='int64')
+
+        # Stable sort on group and then subgroup number, so that the original
+        # order is preserved inside a subgroup.
+        order = np.lexsort((ngroup(df, cols), ngroup(df, group_cols)))
+        df = df.iloc[order].reset_index(drop=True)
+        ids = ngroup(df, cols)
+        _, first = np.unique(ids, return_index=True)
+
+        def decategorize(series):
+            # Values of categorical columns are usually strings, and should be
+            # treated as such once they have been split from the rest of the
+            # categories.
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                return series.astype(series.cat.categories.dtype)
+            else:
+                return series
+
+        keys = df[cols].iloc[first].reset_index(drop=True)
+        keys = keys.apply(decategorize)
+
+        ref_ids = np.full(len(keys), -1, dtype='int64')
+        if len(keys) and all(v is not None for v in ref_group.values()):
+            is_ref = np.ones(len(keys), dtype=bool)
+            for col, val in ref_group.items():
+                is_ref &= (keys[col] == val).to_numpy()
+
+            ref_keys = keys[is_ref]
+            if not ref_keys.empty:
+                if sub_group_cols:
+                    ref_keys = ref_keys[sub_group_cols].assign(__ref_id=ref_keys.index)
+                    ref_ids = keys[sub_group_cols].merge(
+                        ref_keys,
+                        on=sub_group_cols,
+                        how='left',
+                    )['__ref_id'].fillna(-1).to_numpy(dtype='int64')
                 else:
-                    df.index = drop_level(sorted(set(df.index.names) & set(to_remove)))
-                return df
-
-            df = remove_cols(df)
-            if ref is not None:
-                ref = remove_cols(ref)
+                    ref_ids[:] = ref_keys.index[0]
 
-            df = func(ref, df, group)
-            if df is None:
-                return None
-
-            # Only assign-back subgroup columns if they have not been set by the
-            # callback directly.
-            to_assign = group.keys() - set(
-                col
-                for col in df.columns
-                if not df[col].isna().all()
-            )
-            df = df.assign(**{
-                col: val
-                for col, val in group.items()
-                if col in to_assign
-            })
-
-            # Drop RangeIndex to avoid getting an "index" column that is
-            # useless
-            drop_index = isinstance(df.index, pd.RangeIndex)
-            df.reset_index(drop=drop_index, inplace=True)
-            return df
-
-        # Groups as asked by the user
-        comparison_groups = {
-            FrozenDict(group): df.set_index(index_cols)
-            for group, df in df_split_signals(df, ref_group.keys())
-        }
-
-        # We elect a comparison reference and split it in subgroups
-        comp_ref_group = FrozenDict(dict(
-            (k, v)
-            for k, v in ref_group.items()
-            if v is not None
-        ))
-        try:
-            ref = comparison_groups[comp_ref_group]
-        except KeyError:
-            subref = {}
-        else:
-            subref = {
-                FrozenDict(subgroup): subdf
-                for subgroup, subdf in df_split_signals(ref, sub_group_cols)
-            }
-
-        # For each group, split it further in subgroups
-        dfs = [
-            process_subgroup(subdf, group, subgroup)
-            for group, df in comparison_groups.items()
-            for subgroup, subdf in df_split_signals(df, sub_group_cols)
-        ]
-        dfs = [df for df in dfs if df is not None]
-        if dfs:
-            df = pd.concat(dfs, ignore_index=True, copy=False)
-            if melt:
-                df = self._melt(df)
-        else:
-            df = pd.DataFrame()
-
-        return df
+        return (df, ids, ref_ids, keys)
 
     @property
     @memoized
@@ -690,69 +764,162 @@ class Stats(Loggable):
         """
         Compute the mean and associated stats
         """
-        def get_const_col(group, df, col):
-            vals = df[col].unique()
-            if len(vals) > 1:
-                raise ValueError(f"Column \"{col}\" has more than one value ({', '.join(vals)}) for the group: {group}")
-            return vals[0]
+        val_col = self._val_col
+        df, ids, _, keys = self._df_subgroups(df)
+        if keys.empty:
+            return pd.DataFrame()
 
-        def mean_func(ref, df, group): # pylint: disable=unused-argument
-            try:
-                mean_kind = get_const_col(group, df, self._mean_kind_col)
-            except KeyError:
-                try:
-                    unit = get_const_col(group, df, self._unit_col)
-                except KeyError:
-                    unit = None
-                try:
-                    control_var = get_const_col(group, df, self._control_var_col)
-                except KeyError:
-                    control_var = None
+        df_grouped = df.groupby(ids, sort=True)
+
+        def get_group(i):
+            return keys.iloc[i].to_dict()
 
-                mean_kind = guess_mean_kind(unit, control_var)
+        def get_const_col(col):
+            """
+            Value of ``col`` for each subgroup, or ``None`` if the column is
+            not available.
+            """
+            if col in df.columns and col not in keys.columns:
+                def check(i, vals):
+                    if len(vals) > 1:
+                        raise ValueError(f"Column \"{col}\" has more than one value ({', '.join(vals)}) for the group: {get_group(i)}")
+                    return vals[0]
+
+                return [
+                    check(i, vals)
+                    for i, vals in enumerate(df_grouped[col].unique())
+                ]
             else:
-                mean_kind = mean_kind or 'arithmetic'
+                return None
 
-            try:
-                mean_name, sem_name, std_name = {
-                    'arithmetic': ('mean', 'sem', 'std'),
-                    'harmonic': ('hmean', 'hse', 'hsd'),
-                    'geometric': ('gmean', 'gse', 'gsd'),
-                }[mean_kind]
-            except KeyError:
-                # pylint: disable=raise-missing-from
+        mean_kinds = get_const_col(self._mean_kind_col)
+        if mean_kinds is None:
+            units = get_const_col(self._unit_col) or itertools.repeat(None)
+            control_vars = get_const_col(self._control_var_col) or itertools.repeat(None)
+            mean_kinds = [
+                guess_mean_kind(unit, control_var)
+                for unit, control_var, _ in zip(units, control_vars, range(len(keys)))
+            ]
+        else:
+            mean_kinds = [
+                mean_kind or 'arithmetic'
+                for mean_kind in mean_kinds
+            ]
+
+        stats_names = {
+            'arithmetic': ('mean', 'sem', 'std'),
+            'harmonic': ('hmean', 'hse', 'hsd'),
+            'geometric': ('gmean', 'gse', 'gsd'),
+        }
+        for mean_kind in set(mean_kinds):
+            if mean_kind not in stats_names:
                 raise ValueError(f'Unrecognized mean kind: {mean_kind}')
 
-            series = df[self._val_col]
-            min_sample_size = 30
-            series_len = len(series)
-            if series_len < min_sample_size:
-                group_str = ', '.join(sorted(f'{k}={v}' for k, v in group.items()))
-                self.logger.warning(f'Sample size smaller than {min_sample_size} is being used, the mean confidence interval will only be accurate if the data is normally distributed: {series_len} samples for group {group_str}')
-
-            mean, std, sem, ci = series_mean_stats(series, kind=mean_kind, confidence_level=self._mean_ci_confidence)
-
-            # Only display the stats we were asked for
-            rows = [
-                values
-                for stat, values in (
-                    ('mean', (mean_name, mean, ci[0], ci[1])),
-                    ('sem', (sem_name, sem, nan, nan)),
-                    ('std', (std_name, std, nan, nan)),
+        mean_kinds = np.array(mean_kinds, dtype=object)
+        harmonic = mean_kinds == 'harmonic'
+        geometric = mean_kinds == 'geometric'
+
+        # Equivalent of series_mean_stats() for all the subgroups at once
+        values = df[val_col].to_numpy(dtype='float64', copy=True)
+        row_harmonic = harmonic[ids]
+        row_geometric = geometric[ids]
+        values[row_harmonic] = 1 / values[row_harmonic]
+        values[row_geometric] = np.log(values[row_geometric])
+
+        grouped = pd.Series(values).groupby(ids, sort=True)
+        size = grouped.size().to_numpy()
+        mean = grouped.mean().to_numpy()
+        std = grouped.std().to_numpy()
+        # scipy.stats.sem() propagates NaN values
+        has_nan = pd.Series(np.isnan(values)).groupby(ids, sort=True).any().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sem = np.where(has_nan, nan, std / np.sqrt(size))
+            if self._mean_ci_method == 'bootstrap':
+                interval = _grouped_bootstrap_interval(
+                    values,
+                    ids,
+                    confidence_level=self._mean_ci_confidence,
+                    resamples=self._bootstrap_resamples,
+                    seed=self._bootstrap_seed,
+                    max_mem=self._bootstrap_max_mem,
                 )
-                if stat in provide_stats
-            ]
-            return pd.DataFrame.from_records(
-                rows,
-                columns=(
-                    self._stat_col,
-                    self._val_col,
-                    self._ci_cols[0],
-                    self._ci_cols[1]
+            else:
+                interval = scipy.stats.t.interval(
+                    self._mean_ci_confidence,
+                    size - 1,
+                    loc=mean,
+                    scale=sem,
                 )
-            )
 
-        return self._df_group_apply(df, mean_func, index_cols=self._agg_cols)
+        def post(x):
+            x = x.copy()
+            x[harmonic] = 1 / x[harmonic]
+            x[geometric] = np.exp(x[geometric])
+            return x
+
+        # Convert it into a +/- format
+        ci_minus, ci_plus = (
+            abs(bound - mean)
+            for bound in interval
+        )
+        if self._mean_ci_method == 'bootstrap':
+            # The bootstrap interval is not symmetric, so keep track of which
+            # bound is which, knowing that 1/x reverses the order.
+            ci_minus, ci_plus = (
+                post(np.where(harmonic, ci_plus, ci_minus)),
+                post(np.where(harmonic, ci_minus, ci_plus)),
+            )
+        else:
+            ci_minus, ci_plus = map(post, (ci_minus, ci_plus))
+            ci_minus, ci_plus = (
+                np.minimum(ci_minus, ci_plus),
+                np.maximum(ci_minus, ci_plus),
+            )
+        mean = post(mean)
+        sem = post(sem)
+        std = post(std)
+
+        # The bootstrap does not assume normally distributed data
+        min_sample_size = 0 if self._mean_ci_method == 'bootstrap' else 30
+        for i in np.flatnonzero(size < min_sample_size):
+            group_str = ', '.join(sorted(f'{k}={v}' for k, v in get_group(i).items()))
+            self.logger.warning(f'Sample size smaller than {min_sample_size} is being used, the mean confidence interval will only be accurate if the data is normally distributed: {size[i]} samples for group {group_str}')
+
+        # Only display the stats we were asked for, one row per stat for each
+        # subgroup.
+        nans = np.full(len(keys), nan)
+        rows = [
+            (
+                [stats_names[mean_kind][pos] for mean_kind in mean_kinds],
+                values,
+                ci[0],
+                ci[1],
+            )
+            for stat, pos, values, ci in (
+                ('mean', 0, mean, (ci_minus, ci_plus)),
+                ('sem', 1, sem, (nans, nans)),
+                ('std', 2, std, (nans, nans)),
+            )
+            if stat in provide_stats
+        ]
+        if not rows:
+            return pd.DataFrame()
+
+        columns = (
+            self._stat_col,
+            val_col,
+            self._ci_cols[0],
+            self._ci_cols[1]
+        )
+        mean_df = pd.DataFrame({
+            col: np.stack(
+                [np.asarray(row[i], dtype=object if i == 0 else 'float64') for row in rows],
+                axis=1,
+            ).ravel()
+            for i, col in enumerate(columns)
+        })
+        keys = keys.loc[keys.index.repeat(len(rows))].reset_index(drop=True)
+        return pd.concat([mean_df, keys], axis=1)
 
     def _df_stats(self):
         """
@@ -812,18 +979,31 @@ class Stats(Loggable):
         value_col = self._val_col
         stat_name = 'ks2samp_test'
 
-        def get_pval(ref, df):
-            _, p_value = scipy.stats.ks_2samp(ref[value_col], df[value_col])
-            return p_value
+        test_df, ids, ref_ids, keys = self._df_subgroups(self._orig_df)
+        # Values of each subgroup, as the rows of a subgroup are contiguous
+        values = np.split(
+            test_df[value_col].to_numpy(),
+            np.flatnonzero(np.diff(ids)) + 1,
+        )
 
-        def func(ref, df, group): # pylint: disable=unused-argument
-            if ref is None:
-                return None
-            else:
-                return pd.DataFrame({stat_name: [get_pval(ref, df)]})
+        def get_pval(ref, values):
+            _, p_value = scipy.stats.ks_2samp(ref, values)
+            return p_value
 
         # Summarize each group by the p-value of the test against the reference group
-        test_df = self._df_group_apply(self._orig_df, func, melt=True)
+        has_ref = ref_ids >= 0
+        if has_ref.any():
+            pvals = [
+                get_pval(values[ref_id], values[i])
+                for i, ref_id in enumerate(ref_ids)
+                if ref_id >= 0
+            ]
+            test_df = keys[has_ref].reset_index(drop=True)
+            test_df.insert(0, stat_name, pvals)
+            test_df = self._melt(test_df)
+        else:
+            test_df = pd.DataFrame()
+
         test_df[self._unit_col] = 'pval'
         test_df = self._df_remove_tweak_cols(test_df)
 
@@ -841,30 +1021,57 @@ class Stats(Loggable):
         tag_cols = self._tag_cols
         non_normalizable_units = self._non_normalizable_units
 
-        def diff_pct(ref, df, group):
-            if ref is None or group[unit_col] in non_normalizable_units:
-                return df
-            else:
-                # (val - ref) / ref == (val / ref) - 1
-                factor =  1 / ref[val_col]
-                transform = lambda x: 100 * (x * factor - 1)
-                df[val_col] = transform(df[val_col])
-
-                # Remove the confidence interval as it is significantly more
-                # complex to compute and would require access to other
-                # statistics too. All in all it's not really worth the hassle,
-                # since the comparison should be based on the stat test anyway.
-                _ci_cols = self._restrict_cols(ci_cols, df)
-                df = df.drop(columns=_ci_cols)
-
-                df[unit_col] = '%'
-                return df
+        df, ids, ref_ids, keys = self._df_subgroups(df)
 
+        # Rows of a subgroup are matched with the rows of the reference
+        # subgroup sharing the same values for these columns.
         index_cols = sorted(
             (set(tag_cols) | {unit_col, stat_col}) -
             (self._ref_group.keys() | {val_col})
         )
-        df = self._df_group_apply(df, diff_pct, index_cols=index_cols)
+        index_cols = [
+            col
+            for col in self._restrict_cols(index_cols, df)
+            if col not in keys.columns
+        ]
+
+        normalize = ref_ids >= 0
+        if normalize.any():
+            normalize &= ~keys[unit_col].isin(non_normalizable_units).to_numpy()
+
+        if normalize.any():
+            row_normalize = normalize[ids]
+            ref_df = df[index_cols].assign(__ref_id=ids, __ref_val=df[val_col])
+            ref_df = ref_df[np.isin(ids, ref_ids[normalize])]
+            ref = df[index_cols].assign(__ref_id=ref_ids[ids]).merge(
+                ref_df,
+                on=[*index_cols, '__ref_id'],
+                how='left',
+            )['__ref_val'].to_numpy()
+
+            # (val - ref) / ref == (val / ref) - 1
+            val = df[val_col].to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                val = np.where(row_normalize, 100 * (val * (1 / ref) - 1), val)
+
+            # Remove the confidence interval as it is significantly more
+            # complex to compute and would require access to other
+            # statistics too. All in all it's not really worth the hassle,
+            # since the comparison should be based on the stat test anyway.
+            _ci_cols = self._restrict_cols(ci_cols, df)
+            if row_normalize.all():
+                df = df.drop(columns=_ci_cols)
+            else:
+                df = df.copy()
+                df.loc[row_normalize, _ci_cols] = nan
+
+            df[val_col] = val
+            df[unit_col] = np.where(
+                row_normalize,
+                '%',
+                df[unit_col].to_numpy(dtype=object),
+            )
+
         # Divisions can end up yielding extremely small values like 1e-14,
         # which seems to create problems while plotting
         df[val_col] = df[val_col].round(10)
@@ -1017,8 +1224,9 @@ class Stats(Loggable):
             **kwargs
         )
 
-        mean_suffix = ' (CL: {:.1f}%)'.format(
-            self._mean_ci_confidence * 100
+        mean_suffix = ' (CL: {:.1f}%{})'.format(
+            self._mean_ci_confidence * 100,
+            ', bootstrap' if self._mean_ci_method == 'bootstrap' else '',
         )
         df = df.copy()
         df.loc[df[self._stat_col] == 'mean', self._stat_col] += mean_suffix
@@ -33,7 +33,10 @@ import inspect
 import shlex
 import contextlib
 import tempfile
+import heapq
 from functools import wraps
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from collections.abc import Set, Mapping, Sequence, Iterable
 from operator import itemgetter, attrgetter
 from numbers import Number, Integral, Real
@@ -50,6 +53,11 @@ import weakref
 import atexit
 import threading
 import warnings
+import hashlib
+import fcntl
+import time
+import socket
+import queue
 
 import numpy as np
 import pandas as pd
@@ -60,7 +68,7 @@ import polars as pl
 
 import devlib
 
-from lisa.utils import Loggable, HideExekallID, memoized, lru_memoized, deduplicate, take, deprecate, nullcontext, measure_time, checksum, newtype, groupby, PartialInit, kwargs_forwarded_to, kwargs_dispatcher, ComposedContextManager, get_nested_key
+from lisa.utils import Loggable, HideExekallID, memoized, lru_memoized, deduplicate, take, deprecate, nullcontext, measure_time, checksum, newtype, groupby, PartialInit, kwargs_forwarded_to, kwargs_dispatcher, ComposedContextManager, get_nested_key, mp_spawn_pool
 from lisa.conf import SimpleMultiSrcConf, LevelKeyDesc, KeyDesc, TopLevelKeyDesc, Configurable
 from lisa.datautils import SignalDesc, df_add_delta, df_deduplicate, df_window, df_window_signals, series_convert, df_update_duplicates, _polars_duration_expr, _df_to_polars, _df_to_pandas, _df_to, _polars_df_in_memory, Timestamp
 from lisa.version import VERSION_TOKEN
@@ -365,11 +373,126 @@ class TraceParserBase(abc.ABC, Loggable, PartialInit):
         'cpus-count',
         'available-events',
         'trace-id',
+        'events-index',
+        'pid-comms',
     ]
     """
     Possible metadata keys
     """
 
+    _FIELDS_INT_BITS = [
+        # CPU numbers are bounded by NR_CPUS, which is at most 8192
+        (re.compile(r'(^|_)cpu(_id)?$'), 16),
+        # Task priorities are in [-1, 140]
+        (re.compile(r'(^|_)prio$'), 16),
+        # Task states reported by sched_switch are below TASK_REPORT_MAX
+        (re.compile(r'^prev_state$'), 16),
+        # pid_t is a 32 bits signed integer
+        (re.compile(r'(^|_)pid$'), 32),
+    ]
+    """
+    Number of bits needed to represent the values allowed by the kernel for
+    the fields matching the regex. The signedness of the field is preserved.
+    """
+
+    _FIELDS_CATEGORICAL = re.compile(r'^(__comm|comm|oldcomm|newcomm|reason)$|^comm_|_comm$')
+    """
+    Regex matching the string fields that only take a small number of distinct
+    values and are therefore stored as categorical columns.
+    """
+
+    @classmethod
+    def _get_field_int_bits(cls, field):
+        for regex, bits in cls._FIELDS_INT_BITS:
+            if regex.search(field):
+                return bits
+        return None
+
+    @classmethod
+    def _optimize_dtypes(cls, df):
+        """
+        Convert the fields of the given event dataframe to the narrowest
+        dtypes able to hold the values allowed by the kernel, in order to
+        reduce the memory and swap footprint of raw events.
+
+        Integer fields are narrowed according to :attr:`_FIELDS_INT_BITS` and
+        string fields matching :attr:`_FIELDS_CATEGORICAL` are turned into
+        categorical columns.
+
+        .. note:: A :class:`pandas.DataFrame` column is left untouched if one
+            of its values does not fit in the narrow dtype. A
+            :class:`polars.LazyFrame` is narrowed based on the field names
+            only, so that its schema does not depend on the data and nothing
+            is computed here. Its narrowing cast is strict, so a value outside
+            of the range allowed by the kernel will make the collection fail
+            rather than be silently wrapped around.
+
+        :param df: Dataframe of the event.
+        :type df: pandas.DataFrame or polars.LazyFrame
+        """
+        if isinstance(df, pd.DataFrame):
+            return cls._optimize_pandas_dtypes(df)
+        else:
+            return cls._optimize_polars_dtypes(df)
+
+    @classmethod
+    def _optimize_polars_dtypes(cls, df):
+        int_dtypes = {
+            (True, 8): pl.Int8,
+            (True, 16): pl.Int16,
+            (True, 32): pl.Int32,
+            (True, 64): pl.Int64,
+            (False, 8): pl.UInt8,
+            (False, 16): pl.UInt16,
+            (False, 32): pl.UInt32,
+            (False, 64): pl.UInt64,
+        }
+
+        def get_int_info(dtype):
+            for info, _dtype in int_dtypes.items():
+                if dtype == _dtype:
+                    return info
+            return None
+
+        exprs = []
+        for col, dtype in df.schema.items():
+            if (info := get_int_info(dtype)) is not None:
+                signed, bits = info
+                _bits = cls._get_field_int_bits(col)
+                if _bits is not None and _bits < bits:
+                    exprs.append(
+                        pl.col(col).cast(int_dtypes[(signed, _bits)], strict=True)
+                    )
+            elif isinstance(dtype, pl.String) and cls._FIELDS_CATEGORICAL.search(col):
+                exprs.append(pl.col(col).cast(pl.Categorical))
+
+        if exprs:
+            df = df.with_columns(exprs)
+        return df
+
+    @classmethod
+    def _optimize_pandas_dtypes(cls, df):
+        converted = {}
+        for col, dtype in df.dtypes.items():
+            if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+                bits = cls._get_field_int_bits(col)
+                if bits is not None and bits < dtype.itemsize * 8:
+                    _dtype = np.dtype(f'{dtype.kind}{bits // 8}')
+                    info = np.iinfo(_dtype)
+                    series = df[col]
+                    # Check that the conversion is lossless, as astype()
+                    # would silently wrap around out of range values.
+                    if series.empty or (info.min <= series.min() and series.max() <= info.max):
+                        converted[col] = series.astype(_dtype, copy=False)
+            elif dtype.name == 'string' and cls._FIELDS_CATEGORICAL.search(col):
+                converted[col] = df[col].astype('category', copy=False)
+
+        if converted:
+            df = df.copy(deep=False)
+            for col, series in converted.items():
+                df[col] = series
+        return df
+
     def __init__(self, events, temp_dir, needed_metadata=None):
         # pylint: disable=unused-argument
         self._requested_metadata = set(needed_metadata or [])
@@ -404,6 +527,17 @@ class TraceParserBase(abc.ABC, Loggable, PartialInit):
             * ``trace-id``: Unique identifier for that trace file used to
                 validate the cache. If not available, a checksum will be used.
 
+            * ``events-index``: JSON-serializable index of the location of
+              the events in the trace file. It will be cached and passed back
+              as the ``events_index`` parameter to parsers accepting it, so
+              that they can avoid reading the whole trace when parsing
+              events.
+
+            * ``pid-comms``: Dictionnary of PID (int) to task names (str)
+              recorded in the trace header, e.g. the ``saved_cmdlines`` of a
+              ``trace.dat`` file. This allows mapping PIDs to names without
+              parsing any scheduler event.
+
         :type key: str
 
         :raises: :exc:`MissingMetadataError` if the metadata is not available
@@ -861,24 +995,7 @@ class TraceDumpTraceParser(TraceParserBase):
         else:
             df = df.sort('Time')
 
-        # Turn all "comm" columns into categorical columns
-        categorical_cols = [
-            col
-            for col, dtype in df.schema.items()
-            if isinstance(dtype, pl.String) and (
-                col in ('comm', 'oldcomm', 'newcomm') or
-                col.startswith('comm_') or
-                col.endswith('_comm')
-            )
-        ]
-
-        if categorical_cols:
-            df = df.with_columns([
-                pl.col(col).cast(pl.Categorical)
-                for col in categorical_cols
-            ])
-
-        return df
+        return self._optimize_dtypes(df)
 
     def get_metadata(self, key):
         try:
@@ -1162,6 +1279,193 @@ class CustomFieldsTxtEventParser(TxtEventParser):
         return self._fields_regex
 
 
+def _txt_parse_lines_chunk(lines, skeleton_regex, event_regexes, events, match_cls):
+    """
+    Parse a chunk of lines in a worker process on behalf of
+    :meth:`TxtTraceParserBase._parallel_parse_lines`.
+
+    Timestamps are deduplicated locally to the chunk, as if it was the
+    beginning of the trace. The raw timestamps are also returned so that the
+    deduplication can be fixed up at the chunk boundary once the previous
+    chunks are known.
+    """
+    skel_search = skeleton_regex.search
+    append = list.append
+    group = match_cls.group
+    groups = match_cls.groups
+
+    raw_times = []
+    times = []
+    skeleton_data = []
+    skeleton_lines = []
+    skeleton_idx = []
+    events_data = {
+        **{event: (None, None, None) for event in events},
+        **{
+            event: (regex.search, [], [])
+            for event, regex in event_regexes.items()
+        },
+    }
+    available_events = set()
+    prev_time = 0
+
+    for line in lines:
+        match = skel_search(line)
+        try:
+            event = group(match, '__event')
+        except TypeError:
+            if b'EVENTS DROPPED' in line:
+                raise DroppedTraceEventError('The trace buffer got overridden by new data, increase the buffer size to ensure all events are recorded')
+            else:
+                continue
+
+        raw_time = Timestamp(group(match, '__timestamp').decode('utf-8')).as_nanoseconds
+        line_time = raw_time if raw_time > prev_time else prev_time + 2
+        prev_time = line_time
+
+        idx = len(times)
+        append(raw_times, raw_time)
+        append(times, line_time)
+
+        try:
+            search, data, data_idx = events_data[event]
+            append(data, groups(search(line)))
+        except TypeError:
+            append(skeleton_data, groups(match))
+            append(skeleton_lines, line)
+            append(skeleton_idx, idx)
+        except KeyError:
+            available_events.add(event)
+        else:
+            append(data_idx, idx)
+
+    events_data = {
+        event: (data, np.array(data_idx, dtype='int64'))
+        for event, (search, data, data_idx) in events_data.items()
+        if search is not None
+    }
+    skeleton_data = (skeleton_data, skeleton_lines, np.array(skeleton_idx, dtype='int64'))
+    return (
+        np.array(raw_times, dtype='int64'),
+        np.array(times, dtype='int64'),
+        skeleton_data,
+        events_data,
+        available_events,
+    )
+
+
+class _TxtTraceIndex:
+    """
+    Index of a text trace file, recording the blocks of the file containing
+    each event.
+
+    The index is built while the trace is parsed by
+    :meth:`TxtTraceParserBase._eagerly_parse_lines`, and can be used later to
+    only read the blocks containing a given set of events.
+
+    :param block_size: Minimum size in bytes of a block.
+    :type block_size: int
+
+    .. note:: A block only starts on a line which timestamp did not need to be
+        deduplicated. This ensures the timestamps of events parsed from a
+        subset of the blocks are identical to the ones obtained from the full
+        trace.
+    """
+
+    def __init__(self, block_size):
+        self._block_size = block_size
+        self._blocks = []
+        self._events = {}
+        self._block_events = set()
+        self._next_split = 0
+        self._line_offset = 0
+        self._size = 0
+
+    def iter_lines(self, lines):
+        """
+        Iterate over ``lines`` while keeping track of the offset of the current
+        line in the file.
+        """
+        offset = 0
+        for line in lines:
+            self._line_offset = offset
+            offset += len(line)
+            yield line
+        self._size = offset
+
+    def add(self, event, can_split):
+        """
+        Record an occurence of ``event`` on the current line.
+
+        :param can_split: If ``True``, a new block can be started at that
+            line.
+        :type can_split: bool
+        """
+        if (can_split or not self._blocks) and self._line_offset >= self._next_split:
+            self._flush_block()
+            self._blocks.append(self._line_offset)
+            self._next_split = self._line_offset + self._block_size
+
+        self._block_events.add(event)
+
+    def _flush_block(self):
+        block = len(self._blocks) - 1
+        for event in self._block_events:
+            self._events.setdefault(event, []).append(block)
+        self._block_events = set()
+
+    def to_metadata(self, skeleton_regex, time_range):
+        """
+        Return the index as a JSON-serializable ``events-index`` metadata.
+        """
+        self._flush_block()
+        start, end = time_range
+        return {
+            'skeleton-regex': skeleton_regex.pattern.decode('ascii'),
+            'size': self._size,
+            'time-range': [start.as_nanoseconds, end.as_nanoseconds],
+            'blocks': self._blocks,
+            'events': {
+                event.decode('ascii'): blocks
+                for event, blocks in self._events.items()
+            },
+        }
+
+    @staticmethod
+    def iter_blocks_lines(f, index, events):
+        """
+        Iterate over the lines of the blocks of the file ``f`` containing any
+        of ``events``, according to the ``index`` metadata.
+        """
+        offsets = [*index['blocks'], index['size']]
+        blocks = sorted(set(itertools.chain.from_iterable(
+            index['events'].get(event, [])
+            for event in events
+        )))
+        # Always read the first block, so that there is at least one event in
+        # the selected lines even if none of the events is in the trace.
+        if not blocks and index['blocks']:
+            blocks = [0]
+
+        # Read contiguous blocks in one go
+        ranges = []
+        for block in blocks:
+            start = offsets[block]
+            end = offsets[block + 1]
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+
+        for start, end in ranges:
+            f.seek(start)
+            for line in f:
+                yield line
+                start += len(line)
+                if start >= end:
+                    break
+
+
 class TxtTraceParserBase(TraceParserBase):
     """
     Text trace parser base class.
@@ -1188,6 +1492,37 @@ class TxtTraceParserBase(TraceParserBase):
     :param pre_filled_metadata: Metadata pre-filled by the caller of the
         constructor.
     :type pre_filled_metadata: dict(str, object) or None
+
+    :param jobs: Number of worker processes used to parse the lines. If
+        ``None`` or ``1``, the lines are parsed in the current process.
+        Otherwise, the lines are split in chunks at line boundaries that are
+        parsed in a pool of processes, and the results are merged so that the
+        output is identical to serial parsing.
+
+        .. note:: This is only worth it for large traces, as spawning the
+            worker processes has a fixed cost.
+    :type jobs: int or None
+
+    :param stream_chunk_size: If not ``None``, the rows parsed for each event
+        are flushed to a parquet file in ``temp_dir`` every
+        ``stream_chunk_size`` lines, and :meth:`parse_event` returns a
+        :class:`polars.LazyFrame` scanning that file. This bounds the peak
+        memory usage by the size of a chunk rather than by the size of the
+        trace.
+
+        .. note:: Events without a known event parser still need to be kept
+            in memory in order to infer their fields. Providing
+            ``event_parsers`` for all the requested events is therefore
+            necessary to get the full benefits.
+    :type stream_chunk_size: int or None
+
+    :param events_index: ``events-index`` metadata provided by a previous
+        parser of the same trace file. If ``lines`` is a binary file object,
+        only the blocks of the file containing the requested events will be
+        read and parsed. When ``lines`` is a binary file object and no index
+        is provided, it will be built while parsing the file and made
+        available as the ``events-index`` metadata.
+    :type events_index: dict or None
     """
 
     _KERNEL_DTYPE = {
@@ -1246,6 +1581,18 @@ class TxtTraceParserBase(TraceParserBase):
 
     _RE_MATCH_CLS = re.Match
 
+    _PARALLEL_CHUNK_LINES = 100000
+    """
+    Number of lines in each chunk sent to a worker process when ``jobs`` is
+    used.
+    """
+
+    _INDEX_BLOCK_SIZE = 1024 * 1024
+    """
+    Minimum size in bytes of the blocks recorded in the ``events-index``
+    metadata.
+    """
+
     @kwargs_forwarded_to(TraceParserBase.__init__)
     def __init__(self,
         lines,
@@ -1254,11 +1601,21 @@ class TxtTraceParserBase(TraceParserBase):
         event_parsers=None,
         default_event_parser_cls=None,
         pre_filled_metadata=None,
+        jobs=None,
+        stream_chunk_size=None,
+        events_index=None,
         **kwargs,
     ):
         needed_metadata = set(needed_metadata or [])
         super().__init__(events, needed_metadata=needed_metadata, **kwargs)
         self._pre_filled_metadata = pre_filled_metadata or {}
+        self._events_index = None
+        self._stream_chunk_size = stream_chunk_size
+        self._parquet_writers = {}
+        if stream_chunk_size:
+            # The parquet files live in temp_dir, so they need to be moved
+            # to the cache.
+            self._STEAL_FILES = True
         events = set(events or [])
 
         if events or needed_metadata - {'trace-id'}:
@@ -1276,6 +1633,24 @@ class TxtTraceParserBase(TraceParserBase):
             need_fields = (events != event_parsers.keys())
             skeleton_regex = self._get_skeleton_regex(need_fields)
 
+            # The index only depends on what lines are matched by the skeleton
+            # regex, which does not depend on need_fields
+            index_regex = self._get_skeleton_regex(False)
+            index = None
+            is_file = isinstance(lines, io.BufferedIOBase)
+            use_index = (
+                is_file and
+                events_index is not None and
+                events_index['skeleton-regex'] == index_regex.pattern.decode('ascii') and
+                events_index['size'] == os.fstat(lines.fileno()).st_size
+            )
+            if use_index:
+                self.logger.debug('Using the events index to only read the relevant parts of the trace')
+                lines = _TxtTraceIndex.iter_blocks_lines(lines, events_index, events)
+            elif is_file and not (jobs is not None and jobs > 1):
+                index = _TxtTraceIndex(self._INDEX_BLOCK_SIZE)
+                lines = index.iter_lines(lines)
+
             self.logger.debug(f'Scanning the trace for metadata {needed_metadata} and events: {events}')
 
             events_df, skeleton_df, time_range, available_events = self._eagerly_parse_lines(
@@ -1283,7 +1658,19 @@ class TxtTraceParserBase(TraceParserBase):
                 skeleton_regex=skeleton_regex,
                 event_parsers=event_parsers,
                 events=events,
+                jobs=jobs,
+                index=index,
             )
+
+            if use_index:
+                # Only a subset of the lines was parsed, so the time range and
+                # available events have to come from the index.
+                start, end = events_index['time-range']
+                time_range = (Timestamp(start, unit='ns'), Timestamp(end, unit='ns'))
+                available_events = set(events_index['events'].keys())
+            elif index is not None:
+                self._events_index = index.to_metadata(index_regex, time_range)
+
             self._events_df = events_df
             self._time_range = time_range
             self._skeleton_df = skeleton_df
@@ -1416,13 +1803,16 @@ class TxtTraceParserBase(TraceParserBase):
             index=index,
         )
 
-    def _eagerly_parse_lines(self, lines, skeleton_regex, event_parsers, events, time=None):
+    def _eagerly_parse_lines(self, lines, skeleton_regex, event_parsers, events, time=None, jobs=None, index=None):
         """
         Filter the lines to select the ones with events.
 
         Also eagerly parse events from them to avoid the extra memory
         consumption from line storage, and to speed up parsing by acting as a
         pipeline on lazy lines stream.
+
+        If ``index`` is a :class:`_TxtTraceIndex`, the events found on each
+        line are recorded in it.
         """
 
         # Recompile all regex so that they work on bytes rather than strings.
@@ -1450,6 +1840,17 @@ class TxtTraceParserBase(TraceParserBase):
         # First, get rid of all the lines coming before the trace
         lines = itertools.dropwhile(drop_filter, lines)
 
+        stream_chunk_size = self._stream_chunk_size
+        if jobs is not None and jobs > 1 and not time_is_provided:
+            return self._parallel_parse_lines(
+                lines=lines,
+                skeleton_regex=skeleton_regex,
+                event_parsers=event_parsers,
+                events=events,
+                jobs=jobs,
+                stream_chunk_size=stream_chunk_size,
+            )
+
         # Appending to lists is amortized O(1). Inside the list, we store
         # tuples since they are:
         # 1) the most compact Python representation of a product type
@@ -1467,6 +1868,15 @@ class TxtTraceParserBase(TraceParserBase):
         begin_time = None
         end_time = None
 
+        if stream_chunk_size:
+            def flushing(lines):
+                for i, line in enumerate(lines, 1):
+                    yield line
+                    if not i % stream_chunk_size:
+                        self._flush_parsed_rows(event_parsers, events_data)
+
+            lines = flushing(lines)
+
         # THE FOLLOWING LOOP IS A THE MOST PERFORMANCE-SENSITIVE PART OF THAT
         # CLASS, APPLY EXTREME CARE AND BENCHMARK WHEN MODIFYING
         # Best practices:
@@ -1482,6 +1892,8 @@ class TxtTraceParserBase(TraceParserBase):
         inf = math.inf
         prev_time = Timestamp(0, unit='ns')
         parse_time = '__timestamp' in skeleton_regex.groupindex.keys()
+        indexing = index is not None and not time_is_provided
+        index_add = index.add if indexing else None
 
         for line in lines:
             if time_is_provided:
@@ -1506,6 +1918,8 @@ class TxtTraceParserBase(TraceParserBase):
                     # stable results and joinable dataframes from multiple
                     # parser instance.
                     line_time = line_time.as_nanoseconds
+                    if indexing:
+                        index_add(event, line_time > prev_time)
                     if line_time <= prev_time:
                         line_time += prev_time - line_time + 2
                     prev_time = line_time
@@ -1542,13 +1956,42 @@ class TxtTraceParserBase(TraceParserBase):
             raise ValueError('No lines containing events have been found')
 
         end_time = line_time
+
+        return self._make_parsed_dfs(
+            skeleton_regex=skeleton_regex,
+            skeleton_data=skeleton_data,
+            event_parsers=event_parsers,
+            events_data=events_data,
+            available_events=available_events,
+            begin_time=begin_time,
+            end_time=end_time,
+            time_is_provided=time_is_provided,
+        )
+
+    def _make_parsed_dfs(self, skeleton_regex, skeleton_data, event_parsers, events_data, available_events, begin_time, end_time, time_is_provided):
+        """
+        Build the dataframes out of the data collected by
+        :meth:`_eagerly_parse_lines`.
+        """
+        events_df = {}
+        if self._stream_chunk_size:
+            self._flush_parsed_rows(event_parsers, events_data)
+            writers = self._parquet_writers
+            self._parquet_writers = {}
+
+            for event, (path, writer) in writers.items():
+                writer.close()
+                events_df[event] = pl.scan_parquet(path)
+                available_events.add(event.encode('ascii'))
+            # All the parsed rows have been flushed already
+            event_parsers = {}
+
         available_events.update(
             event
             for event, (search, data) in events_data.items()
             if data
         )
 
-        events_df = {}
         for event, parser in event_parsers.items():
             try:
                 # Remove the tuple data from the dict as we go, to free memory
@@ -1596,6 +2039,141 @@ class TxtTraceParserBase(TraceParserBase):
 
         return (events_df, skeleton_df, (begin_time, end_time), available_events)
 
+    def _parallel_parse_lines(self, lines, skeleton_regex, event_parsers, events, jobs, stream_chunk_size):
+        """
+        Same as :meth:`_eagerly_parse_lines` but the lines are split in chunks
+        that are parsed in a pool of ``jobs`` processes.
+        """
+        event_regexes = {
+            event: parser.bytes_regex
+            for event, parser in event_parsers.items()
+        }
+        chunk_size = self._PARALLEL_CHUNK_LINES
+        chunks = iter(lambda: list(itertools.islice(lines, chunk_size)), [])
+
+        skeleton_data = []
+        events_data = {
+            **{event: (None, None) for event in events},
+            **{event: (None, []) for event in event_regexes.keys()},
+        }
+        available_events = set()
+
+        begin_time = None
+        end_time = None
+        prev_time = 0
+        unflushed = 0
+
+        def merge(res):
+            nonlocal begin_time, end_time, prev_time, unflushed
+            raw_times, times, (chunk_skeleton_rows, chunk_skeleton_lines, chunk_skeleton_idx), chunk_events_data, chunk_available_events = res
+
+            # The deduplication of a timestamp only depends on the previous
+            # one, so the chunk-local values are correct as soon as one of
+            # them matches the fixed up value. In practice, only a handful of
+            # timestamps at the beginning of the chunk need fixing up.
+            for i, raw_time in enumerate(map(int, raw_times)):
+                line_time = raw_time if raw_time > prev_time else prev_time + 2
+                if line_time == times[i]:
+                    break
+                else:
+                    times[i] = line_time
+                    prev_time = line_time
+
+            if len(times):
+                prev_time = int(times[-1])
+                end_time = prev_time
+                if begin_time is None:
+                    begin_time = int(times[0])
+
+            # Append the final timestamp to each row, in the same layout as
+            # the serial implementation
+            def add_time(rows, idx, *extra):
+                return map(
+                    tuple.__add__,
+                    rows,
+                    zip(times[idx].tolist(), *extra),
+                )
+
+            skeleton_data.extend(add_time(chunk_skeleton_rows, chunk_skeleton_idx, chunk_skeleton_lines))
+            for event, (rows, idx) in chunk_events_data.items():
+                events_data[event][1].extend(add_time(rows, idx))
+
+            available_events.update(chunk_available_events)
+
+            unflushed += len(times)
+            if stream_chunk_size and unflushed >= stream_chunk_size:
+                self._flush_parsed_rows(event_parsers, events_data)
+                unflushed = 0
+
+        with mp_spawn_pool(processes=jobs) as pool:
+            # Bound the number of chunks in flight, so that we do not end up
+            # with the whole trace in memory if lines are produced faster than
+            # they can be parsed.
+            pending = deque()
+            for chunk in chunks:
+                pending.append(
+                    pool.apply_async(
+                        _txt_parse_lines_chunk,
+                        (chunk, skeleton_regex, event_regexes, events, self._RE_MATCH_CLS),
+                    )
+                )
+                if len(pending) >= 2 * jobs:
+                    merge(pending.popleft().get())
+
+            while pending:
+                merge(pending.popleft().get())
+
+        if begin_time is None and events:
+            raise ValueError('No lines containing events have been found')
+
+        return self._make_parsed_dfs(
+            skeleton_regex=skeleton_regex,
+            skeleton_data=skeleton_data,
+            event_parsers=event_parsers,
+            events_data=events_data,
+            available_events=available_events,
+            begin_time=begin_time,
+            end_time=end_time,
+            time_is_provided=False,
+        )
+
+    def _flush_parsed_rows(self, event_parsers, events_data):
+        """
+        Append the rows parsed so far for each event to its parquet file in
+        the temporary folder, and empty the lists of rows.
+        """
+        for event, parser in event_parsers.items():
+            try:
+                _, data = events_data[event]
+            except KeyError:
+                continue
+
+            if data:
+                decoded_event = event.decode('ascii')
+                df = self._make_df_from_data(parser.regex, data, ['__timestamp'])
+                df = self._postprocess_df(decoded_event, parser, df)
+                df.index.name = 'Time'
+                table = _df_to_polars(df).collect().to_arrow()
+
+                try:
+                    path, writer = self._parquet_writers[decoded_event]
+                except KeyError:
+                    path = self._temp_dir / f'{decoded_event}-{uuid.uuid4().hex}.parquet'
+                    writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+                    self._parquet_writers[decoded_event] = (path, writer)
+                else:
+                    # Dtypes that are inferred from the data could differ from
+                    # one chunk to another.
+                    try:
+                        table = table.cast(writer.schema)
+                    except (pyarrow.lib.ArrowInvalid, ValueError) as e:
+                        raise ValueError(f'Could not convert the fields of event "{decoded_event}" to the dtypes inferred from the beginning of the trace, an event parser with explicit dtypes is required: {e}') from e
+
+                writer.write_table(table)
+                # Modify the list in-place, as the parsing loop holds a
+                # reference to it.
+                data.clear()
+
     def _lazyily_parse_event(self, event, parser, df):
         # Only parse the lines that have a chance to match
         df = df[df['__event'] == event.encode('ascii')]
@@ -1701,6 +2279,11 @@ class TxtTraceParserBase(TraceParserBase):
         except KeyError:
             df = self._lazyily_parse_event(event, parser, self._skeleton_df)
 
+        # Streamed events only get a parquet file if at least one row was
+        # parsed
+        if isinstance(df, pl.LazyFrame):
+            return df
+
         # Since there is no way to distinguish between no event entry and
         # non-collected events in text traces, map empty dataframe to missing
         # event
@@ -1783,11 +2366,6 @@ class TxtTraceParserBase(TraceParserBase):
                 df = copy_once(df)
                 df['prev_state'] = df['prev_state'].apply(TaskState.from_sched_switch_str).astype('uint16', copy=False)
 
-            # Save a lot of memory by using category for strings
-            df = copy_once(df)
-            for col in ('next_comm', 'prev_comm'):
-                df[col] = df[col].astype('category', copy=False)
-
         elif event == 'lisa__sched_overutilized':
             copied = False
             def copy_once(x):
@@ -1835,13 +2413,19 @@ class TxtTraceParserBase(TraceParserBase):
                 with contextlib.suppress(KeyError):
                     df['ip'] = df['ip'].astype('category', copy=False)
 
-        return df
+        # Save a lot of memory by using narrow integers and category for
+        # strings
+        return cls._optimize_dtypes(df)
 
     def get_metadata(self, key):
         time_range = self._time_range
         if key == 'time-range' and time_range:
             return time_range
 
+        events_index = self._events_index
+        if key == 'events-index' and events_index is not None:
+            return events_index
+
         # If we filtered some events, we are not exhaustive anymore so we
         # cannot return the list
         if (
@@ -2742,6 +3326,13 @@ class TraceBase(_InternalTraceBase):
             ``signals_init``. This allows keeping a very close time span
             without introducing duplicate indices.
         :type compress_signals_init: bool
+
+        :param columns: If not ``None``, only the given columns are returned,
+            in addition to the ``Time`` index. Since the dataframe is only
+            materialized after the selection, only these columns are read
+            from the trace parser output and converted. This is especially
+            useful with ``df_fmt='pandas'``.
+        :type columns: list(str) or None
         """
         pass
 
@@ -2821,6 +3412,70 @@ class TraceBase(_InternalTraceBase):
         """
         return super().get_view(*args, **kwargs)
 
+    def prefetch(self, methods=None, events=None, background=False):
+        """
+        Load all the events needed by the given analysis methods at once.
+
+        Since events are loaded lazily when first requested, running a
+        sequence of analysis can lead to parsing the trace multiple times.
+        Prefetching all of the events ahead of time allows the parser to load
+        them in a single trace traversal.
+
+        :param methods: Analysis methods, either bound (e.g.
+            ``trace.ana.tasks.df_tasks_states``) or not (e.g.
+            ``TasksAnalysis.df_tasks_states``). The events they use are
+            obtained from their ``used_events`` attribute, as set by
+            :func:`requires_events` and similar decorators. Methods without
+            event requirements are ignored.
+        :type methods: list(collections.abc.Callable) or None
+
+        :param events: Extra events to load.
+        :type events: list(str) or lisa.trace.TraceEventCheckerBase or None
+
+        :param background: If ``True``, the events are loaded in a background
+            thread and a :class:`concurrent.futures.Future` is returned.
+        :type background: bool
+
+        :returns: The set of events that were loaded successfully. Missing
+            events are ignored, so that the error is raised when the analysis
+            actually requests them.
+        """
+        def get_events(f):
+            f = inspect.unwrap(f, stop=lambda f: hasattr(f, 'used_events'))
+            try:
+                return f.used_events.get_all_events()
+            except AttributeError:
+                return set()
+
+        if isinstance(events, TraceEventCheckerBase):
+            events = events.get_all_events()
+
+        events = set(itertools.chain(
+            events or [],
+            itertools.chain.from_iterable(map(get_events, methods or [])),
+        ))
+
+        def prefetch():
+            return self._preload_events(events)
+
+        if background:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lisa-trace-prefetch')
+            future = executor.submit(prefetch)
+            # The worker thread will exit once the prefetch is finished
+            executor.shutdown(wait=False)
+            return future
+        else:
+            return prefetch()
+
+    def flush(self):
+        """
+        Wait for the data being written to the swap area in the background to
+        be written.
+
+        This is useful before e.g. removing or copying the swap area.
+        """
+        self._cache.flush()
+
     @deprecate('This method has been deprecated and is an alias',
         deprecated_in='2.0',
         removed_in='4.0',
@@ -3294,7 +3949,7 @@ class _TopTraceView(TraceBase, _TraceViewBase):
             self.__df_fmt,
         )
 
-    def df_event(self, event, *, df_fmt=None, **kwargs):
+    def df_event(self, event, *, df_fmt=None, columns=None, **kwargs):
         df_fmt = df_fmt or self._df_fmt
 
         df, meta = self.base_trace._internal_df_event(
@@ -3305,6 +3960,16 @@ class _TopTraceView(TraceBase, _TraceViewBase):
             **kwargs
         )
 
+        # The LazyFrame is only a plan at this stage, so selecting the
+        # columns here lets polars push the projection down to the scan of
+        # the raw event data, through the windowing and processing applied
+        # by the views. Views can therefore use any column they need.
+        if columns is not None:
+            if isinstance(df, pd.DataFrame):
+                df = df[[col for col in columns if col != 'Time']]
+            else:
+                df = df.select(deduplicate(['Time', *columns], keep_last=False))
+
         df = _df_to(df, fmt=df_fmt)
         return df
 
@@ -3882,6 +4547,259 @@ class _TraceCacheSwapVersionError(ValueError):
     """
 
 
+class _TraceSwapStore(Loggable):
+    """
+    Content-addressed store of swap areas, shared between all the
+    :class:`Trace` opening a trace with the same content, regardless of the
+    path of the trace file, the user or the machine.
+
+    :param path: Folder of the store. It can be shared between machines, as
+        long as the filesystem supports :func:`fcntl.flock`.
+    :type path: str
+
+    :param max_size: Maximum size of the store in bytes. When exceeded, the
+        least recently used swap areas that are not in use by any
+        :class:`Trace` are removed.
+    :type max_size: int or None
+
+    Each swap area is keyed by the trace ID (typically a checksum of the
+    trace content) and the LISA version.
+    """
+
+    PATH_ENV_VAR = 'LISA_TRACE_SWAP_STORE'
+    """
+    Environment variable used to set the store path by default.
+    """
+
+    MAX_SIZE_ENV_VAR = 'LISA_TRACE_SWAP_STORE_MAX_SIZE'
+    """
+    Environment variable used to set the store maximum size in bytes by
+    default.
+    """
+
+    _LOCK_FILENAME = '.lock'
+
+    def __init__(self, path, max_size=None):
+        self.path = Path(path).resolve()
+        self.max_size = max_size if max_size is not None else math.inf
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build an instance from the :attr:`PATH_ENV_VAR` and
+        :attr:`MAX_SIZE_ENV_VAR` environment variables, or return ``None`` if
+        the store path is not set.
+        """
+        try:
+            path = os.environ[cls.PATH_ENV_VAR]
+        except KeyError:
+            return None
+        else:
+            try:
+                max_size = int(os.environ[cls.MAX_SIZE_ENV_VAR])
+            except KeyError:
+                max_size = None
+            return cls(path, max_size=max_size)
+
+    @staticmethod
+    def _get_token(trace_id):
+        key = repr((trace_id, VERSION_TOKEN)).encode('utf-8')
+        return hashlib.sha256(key).hexdigest()
+
+    def _trace_id_path(self, trace_stat_id):
+        token = hashlib.sha256(trace_stat_id.encode('utf-8')).hexdigest()
+        return self.path / '.trace-ids' / token
+
+    def get_trace_id(self, trace_stat_id):
+        """
+        Get the trace ID previously recorded with :meth:`set_trace_id` for a
+        trace file with the given ``trace_stat_id``, or ``None``.
+        """
+        if trace_stat_id is None:
+            return None
+        else:
+            try:
+                return self._trace_id_path(trace_stat_id).read_text()
+            except OSError:
+                return None
+
+    def set_trace_id(self, trace_stat_id, trace_id):
+        """
+        Record the ``trace_id`` of the trace file with the given
+        ``trace_stat_id``, so it can be looked up without computing the trace
+        ID again.
+        """
+        if trace_stat_id is not None and trace_id is not None:
+            path = self._trace_id_path(trace_stat_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that the update is atomic
+            temp = path.with_name(f'{path.name}.{uuid.uuid4().hex}')
+            temp.write_text(trace_id)
+            os.replace(temp, path)
+
+    @contextlib.contextmanager
+    def _store_lock(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / self._LOCK_FILENAME, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_swap_dir(self, trace_id):
+        """
+        Get the swap area of the trace with the given ``trace_id``.
+
+        :returns: A tuple ``(swap_dir, lock)``. ``lock`` is a file object
+            holding a shared lock on the swap area, which prevents it from
+            being scrubbed. It must be kept open as long as the swap area is
+            in use.
+        """
+        path = self.path / self._get_token(trace_id)
+        with self._store_lock():
+            path.mkdir(exist_ok=True)
+            lock = open(path / self._LOCK_FILENAME, 'a')
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            # The modification time of the lock file records the last use of
+            # the swap area.
+            os.utime(lock.fileno())
+            self._scrub()
+
+        self.logger.debug(f'Using swap area of trace ID {trace_id} from store: {path}')
+        return (str(path), lock)
+
+    def scrub(self):
+        """
+        Remove the least recently used swap areas until the store size is
+        below ``max_size``.
+        """
+        with self._store_lock():
+            self._scrub()
+
+    def _scrub(self):
+        def entry_size(path):
+            return sum(
+                os.stat(os.path.join(root, name)).st_size
+                for root, dirs, files in os.walk(path)
+                for name in files
+            )
+
+        def last_use(path):
+            try:
+                return os.stat(path / self._LOCK_FILENAME).st_mtime
+            except FileNotFoundError:
+                return 0
+
+        if self.max_size == math.inf:
+            return
+
+        entries = [
+            path
+            for path in self.path.iterdir()
+            if path.is_dir() and not path.name.startswith('.')
+        ]
+        sizes = {
+            path: entry_size(path)
+            for path in entries
+        }
+        total_size = sum(sizes.values())
+
+        for path in sorted(entries, key=last_use):
+            if total_size <= self.max_size:
+                break
+
+            with open(path / self._LOCK_FILENAME, 'a') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # The swap area is currently used by a Trace
+                except BlockingIOError:
+                    continue
+                else:
+                    self.logger.debug(f'Removing swap area from store: {path}')
+                    shutil.rmtree(path, ignore_errors=True)
+                    total_size -= sizes[path]
+
+
+class _SwapWriter:
+    """
+    Background thread writing :class:`_TraceCache` entries to their swap area.
+
+    :param max_pending: Maximum number of writes waiting to be processed. When
+        the queue is full, the write is done synchronously by the caller
+        instead, which provides backpressure without blocking on a lock that
+        the writer thread might need. The write can therefore run
+        concurrently with the writer thread, so :class:`_TraceCache` keeps
+        track of the files being written to avoid scrubbing them.
+    :type max_pending: int
+    """
+    def __init__(self, max_pending=16):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _worker(self):
+        while True:
+            f = self._queue.get()
+            try:
+                if f is None:
+                    return
+                else:
+                    f()
+            finally:
+                self._queue.task_done()
+
+    def submit(self, f):
+        """
+        Run ``f`` in the writer thread.
+
+        :returns: ``True`` if ``f`` was queued, ``False`` if it was run
+            synchronously because the queue is full or the writer has been
+            drained.
+        """
+        with self._lock:
+            if self._closed:
+                queued = False
+            else:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._worker,
+                        name='lisa-trace-swap-writer',
+                        daemon=True,
+                    )
+                    self._thread.start()
+                try:
+                    self._queue.put_nowait(f)
+                except queue.Full:
+                    queued = False
+                else:
+                    queued = True
+
+        if not queued:
+            f()
+        return queued
+
+    def drain(self):
+        """
+        Process all the pending writes and stop the writer thread. Writes
+        submitted afterwards are done synchronously.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+_SWAP_WRITER = _SwapWriter()
+# Registered after _dealloc_all() so that it runs before it, since atexit
+# handlers are called in reverse order.
+atexit.register(_SWAP_WRITER.drain)
+
+
 class _TraceCache(Loggable):
     """
     Cache of a :class:`Trace`.
@@ -3907,16 +4825,32 @@ class _TraceCache(Loggable):
         if the file changed.
     :type trace_id: str or None
 
+    :param trace_stat_id: Cheap identifier of the trace file computed from
+        its filesystem metadata by :meth:`_Trace._get_trace_stat_id`. It is
+        recorded in the swap area so that ``trace_id`` can be reused without
+        being recomputed.
+    :type trace_stat_id: str or None
+
     :param metadata: Metadata mapping to store in the swap area.
     :type metadata: dict or None
 
     :param swap_content: Initial content of the swap area.
     :type swap_content: dict(_CacheDataDescNF, _CacheDataSwapEntry) or None
 
+    :param async_swap: If ``True``, data are written to the swap area by a
+        background thread so that :meth:`insert` returns as soon as the data is
+        in memory. Use :meth:`flush` to wait for the writes to complete.
+    :type async_swap: bool
+
     The cache manages both the :class:`pandas.DataFrame` and
     :class:`pandas.Series` generated in memory and a swap area used to evict
     them, and to reload them quickly. Some other data (typically JSON) can also
     be stored in the cache by analysis method.
+
+    When ``max_mem_size`` is set, the memory usage of each entry is computed
+    once when it is inserted and a running total is maintained. Entries are
+    kept in a heap ordered by retention score, so that evicting the cheapest
+    entries does not require scanning and sorting the whole cache.
     """
 
     INIT_SWAP_COST = 1e-8
@@ -3937,10 +4871,20 @@ class _TraceCache(Loggable):
     Data storage format used to swap.
     """
 
-    def __init__(self, max_mem_size=None, trace_path=None, trace_id=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None):
+    def __init__(self, max_mem_size=None, trace_path=None, trace_id=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None, trace_stat_id=None, async_swap=True):
         self._lock = threading.RLock()
         self._cache = {}
+        self._swap_pending = {}
+        self._swap_in_flight = set()
+        self._swap_companion_of = {}
+        self._swap_companions = {}
+        self._async_swap = async_swap
         self._data_cost = {}
+        self._data_mem = {}
+        self._mem_usage = 0
+        self._evict_heap = []
+        self._evict_heap_seq = {}
+        self._evict_seq = itertools.count()
         self._swap_content = swap_content or {}
         self._cache_desc_swap_filename = {}
         self.swap_cost = self.INIT_SWAP_COST
@@ -3948,14 +4892,37 @@ class _TraceCache(Loggable):
         self.max_swap_size = max_swap_size if max_swap_size is not None else math.inf
         self._swap_size = self._get_swap_size()
 
-        self.max_mem_size = max_mem_size if max_mem_size is not None else math.inf
+        self._max_mem_size = max_mem_size if max_mem_size is not None else math.inf
         self._data_mem_swap_ratio = 1
         self._metadata = metadata or {}
 
         self.trace_path = os.path.abspath(trace_path) if trace_path else trace_path
         self._trace_id = trace_id
+        self._trace_stat_id = trace_stat_id
         self._unique_id = uuid.uuid4().hex
 
+    @property
+    def max_mem_size(self):
+        """
+        Maximum amount of memory to use in bytes.
+        """
+        return self._max_mem_size
+
+    @max_mem_size.setter
+    def max_mem_size(self, max_mem_size):
+        with self._lock:
+            self._max_mem_size = max_mem_size
+            # Memory accounting is only maintained when there is a limit to
+            # enforce, so rebuild it from scratch
+            self._data_mem = {}
+            self._mem_usage = 0
+            self._evict_heap = []
+            self._evict_heap_seq = {}
+            for cache_desc in self._cache.keys():
+                self._track_mem(cache_desc)
+
+        self._scrub_mem()
+
     @property
     def swap_dir(self):
         if (swap_dir := self._swap_dir) is None:
@@ -3992,6 +4959,12 @@ class _TraceCache(Loggable):
         )
 
     def __del__(self):
+        # Without a swap area, _hardlinks_base would raise an exception that
+        # memoized() keeps along with its traceback, and therefore the frames
+        # of whatever dropped the last reference to this cache.
+        if getattr(self, '_swap_dir', None) is None:
+            return
+
         # Only try with rmdir first, so that we don't sabbotage existing
         # LazyFrame that might still be alive.
         try:
@@ -4050,6 +5023,7 @@ class _TraceCache(Loggable):
             'metadata': self._metadata,
             'trace-path': trace_path,
             'trace-id': self._trace_id,
+            'trace-stat-id': self._trace_stat_id,
         }
 
     def to_path(self, path):
@@ -4062,7 +5036,7 @@ class _TraceCache(Loggable):
             f.write('\n')
 
     @classmethod
-    def _from_swap_dir(cls, swap_dir, trace_id, trace_path=None, metadata=None, **kwargs):
+    def _from_swap_dir(cls, swap_dir, trace_id, trace_path=None, metadata=None, check_trace_path=True, **kwargs):
         metapath = os.path.join(swap_dir, cls.TRACE_META_FILENAME)
 
         with open(metapath) as f:
@@ -4076,7 +5050,7 @@ class _TraceCache(Loggable):
 
         metadata = metadata or {}
 
-        if trace_path and not os.path.samefile(swap_trace_path, trace_path):
+        if check_trace_path and trace_path and not os.path.samefile(swap_trace_path, trace_path):
             invalid_swap = True
         else:
             old_trace_id = mapping['trace-id']
@@ -4126,15 +5100,45 @@ class _TraceCache(Loggable):
             self.to_path(path)
 
     @classmethod
-    def from_swap_dir(cls, swap_dir, **kwargs):
+    def get_swap_trace_id(cls, swap_dir, trace_stat_id):
+        """
+        Get the trace ID recorded in the given ``swap_dir`` if it was recorded
+        for a trace file with the same ``trace_stat_id``, ``None`` otherwise.
+        """
+        if swap_dir is None or trace_stat_id is None:
+            return None
+        else:
+            metapath = os.path.join(swap_dir, cls.TRACE_META_FILENAME)
+            try:
+                with open(metapath) as f:
+                    mapping = json.load(f)
+            except (OSError, json.decoder.JSONDecodeError):
+                return None
+            else:
+                if (
+                    mapping.get('version-token') == VERSION_TOKEN and
+                    mapping.get('trace-stat-id') == trace_stat_id
+                ):
+                    return mapping.get('trace-id')
+                else:
+                    return None
+
+    @classmethod
+    def from_swap_dir(cls, swap_dir, check_trace_path=True, **kwargs):
         """
         Reload the persistent state from the given ``swap_dir``.
 
+        :param check_trace_path: If ``True``, the swap area is discarded if it
+            was created for another trace file path. This should be ``False``
+            for content-addressed swap areas, which are only validated using
+            the trace ID.
+        :type check_trace_path: bool
+
         :Variable keyword arguments: Forwarded to :class:`_TraceCache`.
         """
         if swap_dir:
             try:
-                return cls._from_swap_dir(swap_dir=swap_dir, **kwargs)
+                return cls._from_swap_dir(swap_dir=swap_dir, check_trace_path=check_trace_path, **kwargs)
             except (FileNotFoundError, _TraceCacheSwapVersionError, json.decoder.JSONDecodeError):
                 pass
 
@@ -4171,6 +5175,12 @@ class _TraceCache(Loggable):
                 return mem.sum()
             except AttributeError:
                 return mem
+        elif isinstance(data, (pl.DataFrame, pl.Series)):
+            return data.estimated_size()
+        # A LazyFrame only holds memory if it is backed by an in-memory
+        # DataFrame. Otherwise, it is just a logical plan scanning files.
+        elif isinstance(data, pl.LazyFrame) and _polars_df_in_memory(data):
+            return data.collect().estimated_size()
         else:
             return sys.getsizeof(data)
 
@@ -4353,7 +5363,7 @@ class _TraceCache(Loggable):
 
         return data
 
-    def _write_swap(self, cache_desc, data, write_meta=True):
+    def _write_swap(self, cache_desc, data, write_meta=True, companion=None):
         try:
             swap_dir = self.swap_dir
         except ValueError:
@@ -4382,14 +5392,22 @@ class _TraceCache(Loggable):
             def log_error(e):
                 self.logger.error(f'Could not write {cache_desc} to swap: {e}')
 
-            # Write the Parquet file and update the write speed
+            # The files are not referenced by self._swap_content until they
+            # are written, so let _scrub_swap() know they are not stale.
+            in_flight = {swap_entry.data_filename, swap_entry.meta_filename}
+            with self._lock:
+                self._swap_in_flight.update(in_flight)
+
             try:
-                with measure_time() as measure:
-                    self._write_data(cache_desc.fmt, data, data_path)
-            # PyArrow fails to save dataframes containing integers > 64bits
-            except OverflowError as e:
-                log_error(e)
-            else:
+                # Write the Parquet file and update the write speed
+                try:
+                    with measure_time() as measure:
+                        self._write_data(cache_desc.fmt, data, data_path)
+                # PyArrow fails to save dataframes containing integers > 64bits
+                except OverflowError as e:
+                    log_error(e)
+                    return
+
                 # Update the swap entry on disk
                 if write_meta:
                     try:
@@ -4408,23 +5426,29 @@ class _TraceCache(Loggable):
 
                 with self._lock:
                     self._swap_content[swap_entry.cache_desc_nf] = swap_entry
+            finally:
+                with self._lock:
+                    self._swap_in_flight -= in_flight
 
-                # Assume that reading from the swap will take as much time as
-                # writing to it. We cannot do better anyway, but that should
-                # mostly bias to keeping things in memory if possible.
-                swap_cost = measure.exclusive_delta
-                try:
-                    data_swapped_size = os.stat(data_path).st_size
-                except FileNotFoundError:
-                    data_swapped_size = 0
+            # Assume that reading from the swap will take as much time as
+            # writing to it. We cannot do better anyway, but that should
+            # mostly bias to keeping things in memory if possible.
+            swap_cost = measure.exclusive_delta
+            try:
+                data_swapped_size = os.stat(data_path).st_size
+            except FileNotFoundError:
+                data_swapped_size = 0
 
-                mem_usage = self._data_mem_usage(data)
-                if mem_usage:
-                    self._update_swap_cost(data, swap_cost, mem_usage, data_swapped_size)
-                with self._lock:
-                    self._swap_size += data_swapped_size
-                self._update_data_swap_size_estimation(data, data_swapped_size)
-                self.scrub_swap()
+            mem_usage = self._data_mem_usage(data)
+            if mem_usage:
+                self._update_swap_cost(data, swap_cost, mem_usage, data_swapped_size)
+            with self._lock:
+                self._swap_size += data_swapped_size
+            self._update_data_swap_size_estimation(data, data_swapped_size)
+            self.scrub_swap()
+
+            if companion is not None and swap_entry.written:
+                self._write_swap(*companion)
 
     def _get_swap_size(self):
         try:
@@ -4459,6 +5483,7 @@ class _TraceCache(Loggable):
 
         with self._lock:
             swap_content = list(self._swap_content.values())
+            in_flight = set(self._swap_in_flight)
 
         data_files = {
             swap_entry.data_filename: swap_entry
@@ -4471,7 +5496,7 @@ class _TraceCache(Loggable):
             for swap_entry in swap_content
         }
         metadata_files.add(self.TRACE_META_FILENAME)
-        non_stale_files = data_files.keys() | metadata_files | {'hardlinks', 'temp'}
+        non_stale_files = data_files.keys() | metadata_files | in_flight | {'hardlinks', 'temp'}
         stale_files = stats.keys() - non_stale_files
         for filename in stale_files:
             stats.pop(filename, None)
@@ -4490,7 +5515,7 @@ class _TraceCache(Loggable):
         discarded_swap_entries = set()
         for filename, stat in sorted(stats.items(), key=by_mtime):
             total_size += stat.st_size
-            if total_size > self.max_swap_size:
+            if total_size > self.max_swap_size and filename not in in_flight:
                 try:
                     swap_entry = data_files[filename]
                 # That was not a data file
@@ -4549,7 +5574,24 @@ class _TraceCache(Loggable):
         """
         try:
             with self._lock:
-                return self._cache[cache_desc]
+                try:
+                    data = self._cache[cache_desc]
+                    self._refresh_mem(cache_desc)
+                    return data
+                # The data might have been evicted while being written to
+                # the swap in the background, in which case we can still
+                # use it
+                except KeyError:
+                    try:
+                        data, _ = self._swap_pending[cache_desc]
+                    # Companions are kept aside as long as their entry is
+                    # in memory
+                    except KeyError:
+                        return self._swap_companions[cache_desc]
+                    else:
+                        if insert:
+                            self._cache[cache_desc] = data
+                            self._track_mem(cache_desc)
         except KeyError as e:
             # pylint: disable=raise-missing-from
             try:
@@ -4573,8 +5615,13 @@ class _TraceCache(Loggable):
                     self.insert(cache_desc, data, write_swap=False, compute_cost=None)
 
                 return data
+        else:
+            # Re-inserting the data may take the cache over its budget
+            if insert:
+                self._scrub_mem()
+            return data
 
-    def insert(self, cache_desc, data, compute_cost=None, write_swap=False, force_write_swap=False, write_meta=True):
+    def insert(self, cache_desc, data, compute_cost=None, write_swap=False, force_write_swap=False, write_meta=True, swap_companion=None):
         """
         Insert an entry in the cache.
 
@@ -4600,11 +5647,22 @@ class _TraceCache(Loggable):
         :param write_meta: If ``True``, the swap entry metadata will be written
             on disk if the data are. Otherwise, no swap entry is written to disk.
         :type write_meta: bool
+
+        :param swap_companion: Tuple ``(cache_desc, data)`` of a small entry
+            that is only written to the swap along with this entry. It can be
+            fetched as long as this entry is in memory or in the swap, and is
+            not accounted for in the memory usage.
+        :type swap_companion: tuple(_CacheDataDesc, object) or None
         """
         with self._lock:
+            self._untrack_mem(cache_desc)
             self._cache[cache_desc] = data
             if compute_cost is not None:
                 self._data_cost[cache_desc] = compute_cost
+            if swap_companion is not None:
+                companion_desc, companion_data = swap_companion
+                self._swap_companion_of[cache_desc] = companion_desc
+                self._swap_companions[companion_desc] = companion_data
 
         if write_swap:
             self.write_swap(
@@ -4613,6 +5671,12 @@ class _TraceCache(Loggable):
                 write_meta=write_meta
             )
 
+        with self._lock:
+            # The entry could have been evicted by another thread in the
+            # meantime
+            if cache_desc in self._cache:
+                self._track_mem(cache_desc)
+
         self._scrub_mem()
 
     def insert_disk_only(self, spec, compute_cost=None):
@@ -4621,61 +5685,171 @@ class _TraceCache(Loggable):
         path = self._cache_desc_swap_path(cache_desc, create=True)
         return Path(path).resolve()
 
-    def _scrub_mem(self):
+    def _retention_score(self, cache_desc, data):
+        """
+        Low retention score means it's more likely to be evicted.
+        """
+        # If we don't know the computation cost, assume it can be evicted cheaply
+        compute_cost = self._data_cost.get(cache_desc, 0)
+
+        if not compute_cost:
+            return 0
+        else:
+            # Reuse the memory usage recorded when the entry was tracked, as
+            # computing it can be expensive
+            try:
+                mem_usage = self._data_mem[cache_desc]
+            except KeyError:
+                swap_cost = self._estimate_data_swap_cost(data)
+            else:
+                swap_cost = mem_usage * self._data_mem_swap_ratio * self.swap_cost
+            # If it's already written back, make it cheaper to evict since
+            # the eviction itself is going to be cheap
+            if self._is_written_to_swap(cache_desc):
+                swap_cost /= 2
+
+            if swap_cost:
+                return compute_cost / swap_cost
+            else:
+                return 0
+
+    def _track_mem(self, cache_desc):
+        """
+        Account for the memory usage of an entry of ``self._cache`` and make it
+        a candidate for eviction.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
         if self.max_mem_size == math.inf:
             return
 
-        mem_usage = sum(
-            self._data_mem_usage(data)
-            for data in self._cache.values()
+        data = self._cache[cache_desc]
+        size = self._data_mem_usage(data)
+        self._data_mem[cache_desc] = size
+        self._mem_usage += size
+        self._push_eviction_candidate(cache_desc)
+
+    def _refresh_mem(self, cache_desc):
+        """
+        Recompute the retention score of an entry of ``self._cache`` that is
+        being used, so that it is evicted after the entries with the same
+        score that were used less recently.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        if cache_desc in self._evict_heap_seq:
+            self._push_eviction_candidate(cache_desc)
+
+    def _push_eviction_candidate(self, cache_desc):
+        """
+        Push the descriptor on the eviction heap with its current retention
+        score, replacing any previous heap entry of that descriptor.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        data = self._cache[cache_desc]
+        # Entries in the heap are invalidated lazily: an entry is only valid
+        # if its sequence number is the one recorded for the descriptor.
+        # Among entries with the same score, the oldest is evicted first.
+        seq = next(self._evict_seq)
+        self._evict_heap_seq[cache_desc] = seq
+        heapq.heappush(
+            self._evict_heap,
+            (self._retention_score(cache_desc, data), seq, cache_desc)
         )
 
-        if mem_usage > self.max_mem_size:
-            with self._lock:
-                # Make sure garbage collection occurred recently, to get the most
-                # accurate refcount possible
-                gc.collect()
-                refcounts = {
-                    cache_desc: sys.getrefcount(data)
-                    for cache_desc, data in self._cache.items()
-                }
-                min_refcount = min(refcounts.values())
+        # Compact the heap so stale entries do not accumulate
+        if len(self._evict_heap) > 2 * len(self._evict_heap_seq) + 64:
+            self._evict_heap = [
+                item
+                for item in self._evict_heap
+                if self._evict_heap_seq.get(item[2]) == item[1]
+            ]
+            heapq.heapify(self._evict_heap)
+
+    def _untrack_mem(self, cache_desc):
+        """
+        Reverse of :meth:`_track_mem`.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        self._mem_usage -= self._data_mem.pop(cache_desc, 0)
+        self._evict_heap_seq.pop(cache_desc, None)
+
+    def _pop_eviction_candidate(self):
+        """
+        Pop the descriptor with the lowest retention score from the heap, or
+        ``None`` if there is none left.
 
-                # Low retention score means it's more likely to be evicted
-                def retention_score(cache_desc_and_data):
-                    cache_desc, data = cache_desc_and_data
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        heap = self._evict_heap
+        while heap:
+            _, seq, cache_desc = heapq.heappop(heap)
+            if self._evict_heap_seq.get(cache_desc) == seq:
+                return (seq, cache_desc)
+        return None
 
-                    # If we don't know the computation cost, assume it can be evicted cheaply
-                    compute_cost = self._data_cost.get(cache_desc, 0)
+    def _scrub_mem(self):
+        if self.max_mem_size == math.inf:
+            return
 
-                    if not compute_cost:
-                        score = 0
+        with self._lock:
+            if self._mem_usage <= self.max_mem_size:
+                return
+
+            # Entries that are referenced outside of the cache will not free
+            # any memory when evicted, so they are only evicted after the
+            # others. Since references can be kept alive by reference cycles,
+            # a full garbage collection is made only if evicting the
+            # unreferenced entries was not enough.
+            def is_shared(cache_desc):
+                data = self._cache[cache_desc]
+                # References from self._cache, the "data" variable and the
+                # parameter of sys.getrefcount()
+                return data is not None and sys.getrefcount(data) > 3
+
+            def restore(candidates):
+                for seq, cache_desc in candidates:
+                    self._evict_heap_seq[cache_desc] = seq
+                    heapq.heappush(
+                        self._evict_heap,
+                        (
+                            self._retention_score(cache_desc, self._cache[cache_desc]),
+                            seq,
+                            cache_desc,
+                        )
+                    )
+
+            def evict_unshared():
+                shared = []
+                while self._mem_usage > self.max_mem_size:
+                    candidate = self._pop_eviction_candidate()
+                    if candidate is None:
+                        break
+                    _, cache_desc = candidate
+                    if is_shared(cache_desc):
+                        shared.append(candidate)
                     else:
-                        swap_cost = self._estimate_data_swap_cost(data)
-                        # If it's already written back, make it cheaper to evict since
-                        # the eviction itself is going to be cheap
-                        if self._is_written_to_swap(cache_desc):
-                            swap_cost /= 2
-
-                        if swap_cost:
-                            score = compute_cost / swap_cost
-                        else:
-                            score = 0
-
-                    # Assume that more references to an object implies it will
-                    # stay around for longer. Therefore, it's less interesting to
-                    # remove it from this cache and pay the cost of reading/writing it to
-                    # swap, since the memory will not be freed anyway.
-                    #
-                    # Normalize to the minimum refcount, so that the _cache and other
-                    # structures where references are stored are discounted for sure.
-                    return (refcounts[cache_desc] - min_refcount + 1) * score
-
-                new_mem_usage = 0
-                for cache_desc, data in sorted(self._cache.items(), key=retention_score):
-                    new_mem_usage += self._data_mem_usage(data)
-                    if new_mem_usage > self.max_mem_size:
                         self.evict(cache_desc)
+                return shared
+
+            shared = evict_unshared()
+            if self._mem_usage > self.max_mem_size and shared:
+                restore(shared)
+                gc.collect()
+                shared = evict_unshared()
+
+                # Still over budget, so evict shared entries as well
+                restore(shared)
+                while self._mem_usage > self.max_mem_size:
+                    candidate = self._pop_eviction_candidate()
+                    if candidate is None:
+                        break
+                    _, cache_desc = candidate
+                    self.evict(cache_desc)
+            else:
+                restore(shared)
 
     def evict(self, cache_desc):
         """
@@ -4692,9 +5866,26 @@ class _TraceCache(Loggable):
         try:
             with self._lock:
                 del self._cache[cache_desc]
+                self._untrack_mem(cache_desc)
         except KeyError:
             pass
 
+        # The companion has been written along with the data if they were
+        # written to the swap. Otherwise, it is useless without the data. If
+        # the write is still pending, it will be discarded once done.
+        with self._lock:
+            if cache_desc not in self._swap_pending:
+                self._discard_swap_companion(cache_desc)
+
+    def _discard_swap_companion(self, cache_desc):
+        """
+        Discard the companion of an entry that is not in memory anymore.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        companion_desc = self._swap_companion_of.pop(cache_desc, None)
+        self._swap_companions.pop(companion_desc, None)
+
     def write_swap(self, cache_desc, force=False, write_meta=True):
         """
         Write the given descriptor to the swap area if that would be faster to
@@ -4714,11 +5905,54 @@ class _TraceCache(Loggable):
         try:
             with self._lock:
                 data = self._cache[cache_desc]
+                # Grab the companion now, as it will be discarded if the
+                # entry is evicted before the write completes.
+                companion_desc = self._swap_companion_of.get(cache_desc)
+                try:
+                    companion = (companion_desc, self._swap_companions[companion_desc])
+                except KeyError:
+                    companion = None
         except KeyError:
             pass
         else:
             if force or self._should_evict_to_swap(cache_desc, data):
-                self._write_swap(cache_desc, data, write_meta)
+                self._submit_write_swap(cache_desc, data, write_meta, companion)
+
+    def _submit_write_swap(self, cache_desc, data, write_meta, companion=None):
+        # Placeholders are used to reserve a swap entry that the caller
+        # expects to find right away, and there is nothing to write anyway.
+        if data is None or not self._async_swap or self._swap_dir is None:
+            self._write_swap(cache_desc, data, write_meta, companion)
+        else:
+            with self._lock:
+                if cache_desc in self._swap_pending:
+                    return
+                done = threading.Event()
+                self._swap_pending[cache_desc] = (data, done)
+
+            def write():
+                try:
+                    self._write_swap(cache_desc, data, write_meta, companion)
+                except Exception as e:
+                    self.logger.error(f'Could not write {cache_desc} to swap: {e}')
+                finally:
+                    with self._lock:
+                        del self._swap_pending[cache_desc]
+                        if cache_desc not in self._cache:
+                            self._discard_swap_companion(cache_desc)
+                    done.set()
+
+            _SWAP_WRITER.submit(write)
+
+    def flush(self):
+        """
+        Wait for all the pending writes to the swap area to complete.
+        """
+        with self._lock:
+            pending = [done for _, done in self._swap_pending.values()]
+
+        for done in pending:
+            done.wait()
 
     def write_swap_all(self, **kwargs):
         """
@@ -4730,6 +5964,8 @@ class _TraceCache(Loggable):
         for cache_desc in cache_descs:
             self.write_swap(cache_desc, **kwargs)
 
+        self.flush()
+
     def clear_event(self, event, raw=None):
         """
         Clear cache entries referencing a given event.
@@ -4743,34 +5979,45 @@ class _TraceCache(Loggable):
         :type raw: bool or None
         """
         with self._lock:
-            self._cache = {
-                cache_desc: data
-                for cache_desc, data in self._cache.items()
-                if not (
+            self._clear(
+                cache_desc
+                for cache_desc in self._cache.keys()
+                if (
                     cache_desc.get('event') == event
                     and (
                         raw is None
                         or cache_desc.get('raw') == raw
                     )
                 )
-            }
+            )
 
     def clear_all_events(self, raw=None):
         """
         Same as :meth:`clear_event` but works on all events at once.
         """
         with self._lock:
-            self._cache = {
-                cache_desc: data
-                for cache_desc, data in self._cache.items()
-                if (
+            self._clear(
+                cache_desc
+                for cache_desc in self._cache.keys()
+                if not (
                     # Cache entries can be associated to something else than events
                     'event' not in cache_desc or
                     # Either we care about raw and we check, or blanket clear
                     raw is None or
                     cache_desc.get('raw') == raw
                 )
-            }
+            )
+
+    def _clear(self, cache_descs):
+        """
+        Remove the given descriptors from memory, without writing them to
+        swap.
+
+        .. note:: Must be called with ``self._lock`` held.
+        """
+        for cache_desc in list(cache_descs):
+            del self._cache[cache_desc]
+            self._untrack_mem(cache_desc)
 
 
 class _Trace(Loggable, _InternalTraceBase):
@@ -4830,15 +6077,24 @@ class _Trace(Loggable, _InternalTraceBase):
         swap_dir=None,
         enable_swap=True,
         max_swap_size=None,
+        swap_store=None,
     ):
         super().__init__()
         self._lock = threading.RLock()
 
         trace_path = str(trace_path) if trace_path else None
+        self._swap_store_lock = None
+
+        if swap_store is None:
+            swap_store = _TraceSwapStore.from_env()
+        elif not isinstance(swap_store, _TraceSwapStore):
+            swap_store = _TraceSwapStore(swap_store)
 
         if enable_swap:
             if trace_path:
-                if swap_dir is None:
+                # If a store is used, the swap area will be taken from it
+                # once the trace ID is known
+                if swap_dir is None and swap_store is None:
                     basename = os.path.basename(trace_path)
                     swap_dir = os.path.join(
                         os.path.dirname(trace_path),
@@ -4897,14 +6153,47 @@ class _Trace(Loggable, _InternalTraceBase):
         # No-op cache so that the cacheable metadata machinery does not fall
         # over when querying the trace-id.
         self._cache = _TraceCache()
-        trace_id = self._get_trace_id()
+
+        use_store = bool(
+            enable_swap and
+            trace_path and
+            swap_dir is None and
+            swap_store is not None
+        )
+
+        # Try to reuse the trace ID recorded by a previous Trace for the same
+        # file, since computing it could involve hashing the whole trace.
+        trace_stat_id = self._get_trace_stat_id(trace_path) if trace_path else None
+        if use_store:
+            trace_id = swap_store.get_trace_id(trace_stat_id)
+        else:
+            trace_id = _TraceCache.get_swap_trace_id(swap_dir, trace_stat_id)
+
+        if trace_id is None:
+            trace_id = self._get_trace_id()
+            if use_store:
+                swap_store.set_trace_id(trace_stat_id, trace_id)
+
+        content_addressed = use_store and trace_id is not None
+        if content_addressed:
+            swap_dir, lock = swap_store.get_swap_dir(trace_id)
+            # Release the swap area once the trace is garbage collected, or at
+            # the latest when the interpreter exits.
+            self._swap_store_lock = _Deallocator(
+                f=lock.close,
+                on_del=True,
+                at_exit=True,
+            )
+
         self._cache = _TraceCache.from_swap_dir(
             trace_path=trace_path,
             swap_dir=swap_dir,
             max_swap_size=max_swap_size,
             max_mem_size=max_mem_size,
             trace_id=trace_id,
+            trace_stat_id=trace_stat_id,
             metadata=self._cache._metadata,
+            check_trace_path=not content_addressed,
         )
         # Initial scrub of the swap to discard unwanted data, honoring the
         # max_swap_size right from the beginning
@@ -4939,6 +6228,8 @@ class _Trace(Loggable, _InternalTraceBase):
         'cpus-count',
         'available-events',
         'trace-id',
+        'events-index',
+        'pid-comms',
         # Do not cache symbols-address as JSON is unable to store integer keys
         # in objects, so the data will wrongly have string keys when reloaded.
     }
@@ -4991,6 +6282,19 @@ class _Trace(Loggable, _InternalTraceBase):
                 # imprecise.
                 value = (start.as_nanoseconds, end.as_nanoseconds)
 
+            elif key == 'pid-comms':
+                # JSON is unable to store integer keys in objects, so store a
+                # list of (pid, comm) pairs instead.
+                value = sorted(dict(value).items())
+
+            return value
+
+        def finalize(key, value):
+            if key == 'pid-comms':
+                value = {
+                    int(pid): comm
+                    for pid, comm in value
+                }
             return value
 
         def get(key, parser):
@@ -5028,9 +6332,11 @@ class _Trace(Loggable, _InternalTraceBase):
             return value
 
         if cache and key in self._CACHEABLE_METADATA:
-            return get_cacheable(key, parser=parser)
+            value = get_cacheable(key, parser=parser)
         else:
-            return get(key, parser=parser)
+            value = get(key, parser=parser)
+
+        return finalize(key, value)
 
     @classmethod
     def _is_meta_event(cls, event):
@@ -5121,6 +6427,19 @@ class _Trace(Loggable, _InternalTraceBase):
         events = set(events)
         needed_metadata = set(needed_metadata or [])
 
+        kwargs = {}
+        # Only parsers that explicitly accept it can be given the index of
+        # the trace built by a previous parse. Partially initialized
+        # PartialInit instances do not support inspection.
+        try:
+            params = inspect.signature(self._parser).parameters
+        except (TypeError, ValueError):
+            params = {}
+
+        if 'events_index' in params:
+            with contextlib.suppress(MissingMetadataError):
+                kwargs['events_index'] = cache.get_metadata('events-index')
+
         @contextlib.contextmanager
         def cm():
             with pl.StringCache(), self._cache._parser_temp_path() as temp_dir:
@@ -5129,6 +6448,7 @@ class _Trace(Loggable, _InternalTraceBase):
                     events=events,
                     needed_metadata=needed_metadata,
                     temp_dir=temp_dir,
+                    **kwargs,
                 )
 
                 # While we are at it, gather a bunch of metadata. Since we did not
@@ -5183,6 +6503,29 @@ class _Trace(Loggable, _InternalTraceBase):
             Timestamp(end, unit='ns', rounding='up'),
         )
 
+    @staticmethod
+    def _get_trace_stat_id(path):
+        """
+        Cheap identifier of the trace file, computed from its filesystem
+        metadata rather than its content.
+
+        ``None`` is returned if the file was modified too recently, since it
+        could then be modified again without any visible change of its
+        metadata.
+        """
+        stat = os.stat(path)
+        if time.time() - stat.st_mtime < 2:
+            return None
+        else:
+            return repr((
+                socket.gethostname(),
+                os.path.realpath(path),
+                stat.st_dev,
+                stat.st_ino,
+                stat.st_size,
+                stat.st_mtime_ns,
+            ))
+
     @memoized
     def _get_trace_id(self):
         try:
@@ -5592,6 +6935,15 @@ class Trace(TraceBase, metaclass=_TraceMeta):
         the max size is the size of the trace file.
     :type max_swap_size: int or None
 
+    :param swap_store: Folder of a content-addressed store of swap areas,
+        shared by all the :class:`Trace` opening a trace with the same content.
+        This allows reusing the parsed data across processes, users and
+        machines. It is ignored if ``swap_dir`` is provided. When ``None``,
+        the ``LISA_TRACE_SWAP_STORE`` environment variable is used if set, and
+        the ``LISA_TRACE_SWAP_STORE_MAX_SIZE`` environment variable sets the
+        maximum size of the store in bytes.
+    :type swap_store: str or None
+
     :Attributes:
         * ``start``: The timestamp of the first trace event in the trace
         * ``end``: The timestamp of the last trace event in the trace
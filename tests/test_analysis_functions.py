@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2024, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import random
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lisa.analysis.functions import _CallGraph, _KsymIndex
+
+
+class TestCallGraph(TestCase):
+    FUNCTIONS = ['foo', 'bar', 'baz', 'irq_handler']
+    THREAD_ROOT_FUNCTIONS = ['irq_handler']
+
+    def _make_events(self, seed, nr_cpus=2, nr_events=200):
+        """
+        Random nested calls and returns, with some exits without entry at the
+        beginning, some entries without exit at the end, some mismatched
+        exits, recursive calls, tags and capacity changes.
+
+        Exits also record the entry and exit timestamps in nanoseconds in
+        ``calltime`` and ``rettime``, which are a bit off the index.
+        """
+        rng = random.Random(seed)
+        event = _CallGraph._EVENT
+        rows = []
+        time = 0
+        for cpu in range(nr_cpus):
+            stack = []
+            for _ in range(nr_events):
+                time += rng.randint(1, 10)
+                row = dict(Time=time * 1e-6, __cpu=cpu, func_name=None, tags=None, capacity=np.nan, calltime=np.nan, rettime=np.nan)
+                x = rng.random()
+                if x < 0.4:
+                    func_name = rng.choices(self.FUNCTIONS, weights=[4, 4, 4, 1])[0]
+                    stack.append((func_name, time))
+                    row.update(event=event.ENTRY, func_name=func_name)
+                elif x < 0.8:
+                    calltime = time - 1
+                    if stack and rng.random() < 0.9:
+                        func_name, calltime = stack.pop()
+                    else:
+                        func_name = rng.choice(self.FUNCTIONS)
+                        if stack:
+                            _, calltime = stack.pop()
+                    row.update(
+                        event=event.EXIT,
+                        func_name=func_name,
+                        calltime=calltime * 1e3 + rng.randint(0, 500),
+                        rettime=time * 1e3 - rng.randint(0, 500),
+                    )
+                elif x < 0.93:
+                    row.update(event=event.SET_TAG, tags={rng.choice('ab'): rng.randint(0, 2)})
+                else:
+                    row.update(event=event.SET_CAPACITY, capacity=rng.choice([512, 1024]))
+                rows.append(row)
+
+        return pd.DataFrame.from_records(rows, index='Time')
+
+    def _check_df_from_df(self, df, **kwargs):
+        graph = _CallGraph.from_df(df, **kwargs)
+        expected = pd.DataFrame.from_records(
+            (
+                (
+                    node.entry_time, node.cpu, node.func_name, node.cpu_capacity,
+                    dict(node.tags), node.tagged_name,
+                    node['cum_time'], node['self_time'],
+                )
+                for node in graph.all_nodes
+            ),
+            columns=['Time', 'cpu', 'function', 'capacity', 'tags', 'tagged_name', 'cum_time', 'self_time'],
+            index='Time',
+        )
+
+        thread_root_functions = set(kwargs.get('thread_root_functions') or [])
+        cpu_res = pd.concat(
+            _CallGraph._df_from_cpu_df(
+                subdf,
+                thread_root_functions=thread_root_functions,
+                ts_cols=kwargs.get('ts_cols', ('calltime', 'rettime')),
+            )
+            for cpu, subdf in df.groupby('__cpu')
+        )
+
+        def sort(df):
+            return df.reset_index().sort_values(['cpu', 'Time']).reset_index(drop=True)
+
+        columns = list(expected.columns)
+        expected = sort(expected)
+        for res in (_CallGraph.df_from_df(df, **kwargs), cpu_res):
+            res = res[res['listed']][columns].copy()
+            res['tags'] = res['tags'].apply(dict)
+            res = sort(res)
+
+            assert len(res) == len(expected)
+            pd.testing.assert_frame_equal(
+                res,
+                expected,
+                check_dtype=False,
+            )
+
+    def test_df_from_df(self):
+        for seed in range(20):
+            df = self._make_events(seed)
+            self._check_df_from_df(df, ts_cols=None)
+
+    def test_df_from_df_ts_cols(self):
+        for seed in range(20):
+            df = self._make_events(seed)
+            self._check_df_from_df(df)
+
+    def test_df_from_df_thread_root_functions(self):
+        for seed in range(20):
+            df = self._make_events(seed)
+            self._check_df_from_df(df, ts_cols=None, thread_root_functions=self.THREAD_ROOT_FUNCTIONS)
+
+
+class TestKsymIndex(TestCase):
+    def _linear_resolve(self, addr_map, addr, exact):
+        if not (addr >= 0):
+            return None
+        elif exact:
+            return addr_map.get(addr)
+        else:
+            candidates = [a for a in addr_map if a <= addr]
+            return addr_map[max(candidates)] if candidates else None
+
+    def _check_resolve(self, addr_map, addrs):
+        index = _KsymIndex(addr_map)
+        addrs = pd.Series(addrs, index=range(10, 10 + len(addrs)), name='addr')
+        for exact in (True, False):
+            res = index.resolve(addrs, exact=exact)
+            assert list(res.index) == list(addrs.index)
+            assert res.name == 'addr'
+            expected = [
+                self._linear_resolve(addr_map, addr, exact)
+                for addr in addrs
+            ]
+            assert [None if pd.isna(x) else x for x in res] == expected
+
+    def test_resolve(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            addrs = rng.sample(range(0x1000, 0x2000), 50)
+            # Some symbols are aliased to the same name
+            addr_map = {
+                addr: f'sym{rng.randint(0, 30)}'
+                for addr in addrs
+            }
+            lookup = [
+                *rng.sample(addrs, 20),
+                *(rng.randint(0, 0x2100) for _ in range(50)),
+                0, min(addrs), max(addrs), -1, np.nan,
+            ]
+            self._check_resolve(addr_map, lookup)
+
+    def test_resolve_empty(self):
+        self._check_resolve({}, [0, 0x1000, -1, np.nan])
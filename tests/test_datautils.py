@@ -17,7 +17,10 @@
 
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
+import polars as pl
+import pytest
 
 import lisa.datautils as du
 
@@ -36,3 +39,179 @@ class DfCheck(TestCase):
                 assert len(subdf) == 3
             else:
                 assert len(subdf) == 2
+
+    def test_series_rolling_apply(self):
+        index = [0.1 * i for i in range(20)]
+        series = pd.Series(range(20), index=index, dtype='float64')
+
+        for reduction in ('mean', 'sum', 'count', 'max'):
+            expected = du.series_rolling_apply(
+                series,
+                lambda x: getattr(x, reduction)(),
+                0.35,
+                center=True,
+            )
+            res = du.series_rolling_apply(series, reduction, 0.35, center=True)
+            pd.testing.assert_series_equal(res, expected)
+
+    def test_series_rolling_apply_polars(self):
+        # 0.5 is duplicated, and 1.5 is alone in its window
+        index = [0, 0.1, 0.2, 0.5, 0.5, 0.6, 1.5, 1.6]
+        series = pd.Series([3, 1, 4, 1, 5, 9, 2, 6], index=index, dtype='float64')
+        series.index.name = 'Time'
+        df = du._df_to_polars(series.to_frame('foo'))
+
+        for reduction in sorted(du._ROLLING_REDUCTIONS):
+            for center in (False, True):
+                expected = du.series_rolling_apply(series, reduction, 0.25, center=center)
+                res = du.series_rolling_apply(df, reduction, 0.25, center=center)
+                res = res.collect()
+
+                np.testing.assert_allclose(
+                    res['Time'].dt.total_nanoseconds().to_numpy() * 1e-9,
+                    expected.index,
+                )
+                # Only the last row of a duplicated timestamp is expected to
+                # match, see series_rolling_apply() documentation.
+                keep = ~expected.index.duplicated(keep='last')
+                np.testing.assert_allclose(
+                    res['foo'].cast(pl.Float64).to_numpy()[keep],
+                    expected.to_numpy()[keep],
+                )
+
+    def test_df_run_length_encode(self):
+        index = list(map(float, range(1, 8)))
+        df = pd.DataFrame(
+            index=index,
+            data=dict(
+                state=[1, 1, 2, 2, 2, 1, 3],
+                count=[1, 2, 3, 4, 5, 6, 7],
+            ),
+        )
+
+        rle = du.df_run_length_encode(df, cols=['state'], agg=dict(count='sum', duration='duration'))
+        assert rle.index.tolist() == [1, 3, 6, 7]
+        assert rle['state'].tolist() == [1, 2, 1, 3]
+        assert rle['length'].tolist() == [2, 3, 1, 1]
+        assert rle['count'].tolist() == [3, 12, 6, 7]
+        assert rle['duration'].tolist()[:-1] == [2, 3, 1]
+
+        combined = du.df_combine_duplicates(df, cols=['state'], func='sum', output_col='count')
+        assert combined.index.tolist() == [1, 3, 6, 7]
+        assert combined['count'].tolist() == [3, 12, 6, 7]
+
+        df.index.name = 'Time'
+        df = du._df_to_polars(df)
+        rle = du.df_run_length_encode(df, cols=['state'], agg=dict(count='sum', duration='duration'))
+        rle = rle.collect()
+        assert rle['Time'].dt.total_seconds().to_list() == [1, 3, 6, 7]
+        assert rle['state'].to_list() == [1, 2, 1, 3]
+        assert rle['length'].to_list() == [2, 3, 1, 1]
+        assert rle['count'].to_list() == [3, 12, 6, 7]
+        assert rle['duration'].dt.total_seconds().to_list()[:-1] == [2, 3, 1]
+
+        # The index is not used to find duplicates, like with pandas
+        dedup = du.df_deduplicate(
+            df.select('Time', 'state'),
+            keep='first',
+            consecutives=False,
+        ).collect()
+        assert dedup['Time'].dt.total_seconds().to_list() == [1, 3, 7]
+        assert dedup['state'].to_list() == [1, 2, 3]
+
+    def test_df_combine_duplicates_inplace(self):
+        # Duplicated timestamps must not make inplace pruning remove other
+        # rows with the same label
+        df = pd.DataFrame(
+            dict(
+                active=[1, 1, 0, 0, 1],
+                count=[1, 2, 3, 4, 5],
+            ),
+            index=pd.Index([0.0, 1.0, 1.0, 2.0, 3.0], name='Time'),
+        )
+        expected = du.df_combine_duplicates(df, cols=['active'], func='sum', output_col='count')
+        assert expected.index.tolist() == [0, 1, 3]
+        assert expected['active'].tolist() == [1, 0, 1]
+        assert expected['count'].tolist() == [3, 7, 5]
+
+        for func in ('sum', lambda group: group['count'].sum()):
+            combined = df.copy()
+            du.df_combine_duplicates(combined, cols=['active'], func=func, output_col='count', inplace=True)
+            pd.testing.assert_frame_equal(combined, expected)
+
+    def test_series_deduplicate_agg(self):
+        series = pd.Series([1, 2, 2, 3, 4, 2], index=[1, 2, 20, 30, 40, 50], name='foo')
+
+        dedup = du.series_deduplicate(series, keep='first', consecutives=True, agg='duration')
+        assert dedup.name == 'foo'
+        assert dedup.index.tolist() == [1, 2, 30, 40, 50]
+        assert dedup.tolist()[:-1] == [1, 28, 10, 10]
+
+        dedup = du.series_deduplicate(series, keep='last', consecutives=True, agg='sum')
+        assert dedup.index.tolist() == [1, 20, 30, 40, 50]
+        assert dedup.tolist() == [1, 4, 3, 4, 2]
+
+        with pytest.raises(ValueError):
+            du.series_deduplicate(series, keep='first', consecutives=False, agg='sum')
+
+    def test_df_window_signals_compress_init(self):
+        df = pd.DataFrame(
+            dict(
+                cpu=[0, 1, 0, 1, 0],
+                value=[1, 2, 3, 4, 5],
+            ),
+            index=pd.Index([1.0, 2.0, 3.0, 4.0, 5.0], name='Time'),
+        )
+        signals = [du.SignalDesc('foo', ['cpu'])]
+
+        windows = [
+            ((3.5, 4.5), False),
+            ((2.2, 2.8), True),
+            ((10.0, 20.0), True),
+        ]
+        for window, empty in windows:
+            expected = du.df_window_signals(df, window, signals, compress_init=True)
+            res = du.df_window_signals(du._df_to_polars(df), window, signals, compress_init=True)
+            res = res.collect()
+
+            # pandas also repeats the last row before an empty window
+            if empty:
+                expected = expected.iloc[:len(res)]
+
+            assert res['value'].to_list() == expected['value'].tolist()
+            assert res['Time'].dt.total_nanoseconds().to_list() == [
+                round(t * 1e9)
+                for t in expected.index
+            ]
+
+    def test_df_windows(self):
+        index = [*map(float, range(1, 11)), 3.14]
+        df = pd.DataFrame(index=pd.Index(sorted(index), name='Time'), data=dict(foo=range(11)))
+        windows = pd.DataFrame(dict(
+            # Windows within the index, overlapping with it, outside of it
+            # and with bounds right before an index value.
+            start=[2.5, 0, 7, -2, 15, 3, 3, 3.1399999999999997, np.nan, 4],
+            end=[4.5, 1.5, 20, -1, 20, 3, 3.1399999999999997, 3.14, 2, np.nan],
+        ))
+
+        for method in ('pre', 'post', 'inclusive', 'exclusive'):
+            expected = pd.concat(
+                du.df_window(
+                    df,
+                    (
+                        None if np.isnan(start) else start,
+                        None if np.isnan(end) else end,
+                    ),
+                    method=method,
+                ).assign(window=i)
+                for i, (start, end) in enumerate(zip(windows['start'], windows['end']))
+            )
+
+            res = du.df_windows(df, windows, method=method)
+            pd.testing.assert_frame_equal(res, expected)
+
+            res = du.df_windows(du._df_to_polars(df), windows, method=method)
+            res = res.collect()
+            assert res['foo'].to_list() == expected['foo'].to_list()
+            assert res['window'].to_list() == expected['window'].to_list()
+            assert (res['Time'].dt.total_nanoseconds() * 1e-9).to_list() == pytest.approx(list(expected.index))
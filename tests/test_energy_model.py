@@ -16,11 +16,13 @@
 #
 
 from collections import OrderedDict
+from itertools import product
 from unittest import TestCase
 import os
 import shutil
 import tempfile
 
+import numpy as np
 import pytest
 
 from devlib.target import KernelVersion
@@ -208,6 +210,52 @@ class TestOptimalPlacement(TestCase):
         with pytest.raises(EnergyModelCapacityError):
             em.get_optimal_placements(tasks)
 
+    def test_brute_force(self):
+        workloads = [
+            {'task0': 10, 'task1': 1, 'task2': 350, 'task3': 150, 'task4': 200},
+            {'task0': 100, 'task1': 100, 'task2': 50, 'task3': 200},
+            {'task' + str(i): 10 for i in range(6)},
+        ]
+        for tasks in workloads:
+            for capacity_margin_pct in (0, 20):
+                def get_placements(**kwargs):
+                    try:
+                        return em.get_optimal_placements(tasks, capacity_margin_pct, **kwargs)
+                    except EnergyModelCapacityError:
+                        return None
+
+                placements = get_placements()
+                brute_force_placements = get_placements(brute_force=True)
+                if placements is None:
+                    assert brute_force_placements is None
+                else:
+                    self.assert_placement_list_equal(placements, brute_force_placements)
+
+    def test_many_tasks(self):
+        tasks = {'task' + str(i): 10 * (i % 4 + 1) for i in range(20)}
+        placements = em.get_optimal_placements(tasks)
+        for util in placements:
+            assert sum(util) == sum(tasks.values())
+
+    def test_many_distinct_tasks(self):
+        utils = [
+            3, 4, 7, 9, 10, 11, 16, 17, 19, 20, 23, 27, 30, 31, 33,
+            34, 35, 38, 39, 40, 43, 44, 45, 47, 49, 50, 51, 54, 55, 57,
+        ]
+        tasks = {'task' + str(i): util for i, util in enumerate(utils)}
+
+        placements = em.get_optimal_placements(tasks)
+        assert sorted(placements) == [(100, 100, 370, 371), (100, 100, 371, 370)]
+        for util in placements:
+            assert sum(util) == sum(utils)
+
+        # Check against the exhaustive search on a subset small enough for it
+        tasks = dict(list(tasks.items())[:7])
+        assert (
+            sorted(em.get_optimal_placements(tasks)) ==
+            sorted(em.get_optimal_placements(tasks, brute_force=True))
+        )
+
 
 class TestBiggestCpus(TestCase):
     def test_biggest_cpus(self):
@@ -461,6 +509,42 @@ class TestEstimateFromTrace(TestCase):
             assert row.name == pytest.approx(exp_index, abs=1e-4)
             assert row.to_dict() == exp_values
 
+    def test_estimate_from_idle_freqs(self):
+        # Compare with estimate_from_cpu_util() on every combination of
+        # frequencies and idle states
+        little_freqs = list(little_cpu_active_states.keys())
+        big_freqs = list(big_cpu_active_states.keys())
+        idle_idxs = [-1, 0, 1, 2]
+        rows = [
+            (idle, (little_freq, little_freq, big_freq, big_freq))
+            for idle in product(idle_idxs, repeat=len(em.cpus))
+            for little_freq in little_freqs
+            for big_freq in big_freqs
+        ]
+        idle = np.array([idle for idle, freqs in rows])
+        freqs = np.array([freqs for idle, freqs in rows])
+
+        nrg = em._estimate_from_idle_freqs(idle=idle, freqs=freqs)
+
+        for i, (idle_row, freqs_row) in enumerate(rows):
+            cpus_active = np.array(idle_row) == -1
+            idle_states = [
+                node.idle_state_by_idx(max(min(i, j), 0))
+                for node, i, j in zip(
+                    em.cpu_nodes,
+                    em._deepest_idle_idxs(cpus_active),
+                    idle_row,
+                )
+            ]
+            expected = em.estimate_from_cpu_util(
+                cpu_utils=cpus_active * em.capacity_scale,
+                idle_states=idle_states,
+                freqs=freqs_row,
+            )
+            for cpus, power in expected.items():
+                name = '-'.join(str(c) for c in cpus)
+                assert nrg[name][i] == pytest.approx(power)
+
 
 class TestSerialization(StorageTestCase):
     """
@@ -0,0 +1,75 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2024, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lisa.pelt import simulate_pelt, simulate_pelt_batch
+
+
+class TestSimulatePELT(TestCase):
+    def _make_activations(self, nr_activations, mean_duration):
+        rng = np.random.default_rng(0)
+        index = np.cumsum(rng.exponential(mean_duration, nr_activations))
+        return pd.Series(np.arange(nr_activations) % 2, index=index)
+
+    def _test_engines(self, activations, **kwargs):
+        for windowless in (False, True):
+            ref = simulate_pelt(activations, windowless=windowless, engine='python', **kwargs)
+            new = simulate_pelt(activations, windowless=windowless, engine='numpy', **kwargs)
+            assert ref.index.equals(new.index)
+            assert np.allclose(ref, new, rtol=1e-9, atol=1e-6, equal_nan=True)
+
+    def test_engines(self):
+        self._test_engines(self._make_activations(2000, 4e-3))
+
+    def test_engines_init(self):
+        self._test_engines(self._make_activations(2000, 4e-3), init=300)
+
+    def test_engines_long_sleeps(self):
+        # Decays far beyond the range of float64 between activations
+        self._test_engines(self._make_activations(200, 5), init=100)
+
+    def test_engines_index(self):
+        activations = self._make_activations(500, 4e-3)
+        index = pd.Index(np.linspace(0, activations.index[-1], 1000))
+        self._test_engines(activations, index=index)
+
+    def test_batch(self):
+        df = pd.concat(
+            pd.DataFrame(
+                {
+                    'pid': pid,
+                    'activations': activations,
+                },
+                index=activations.index,
+            )
+            for pid, activations in enumerate(
+                self._make_activations(nr, 4e-3)
+                for nr in (100, 500, 1)
+            )
+        ).sort_index(kind='stable')
+
+        for windowless in (False, True):
+            res = simulate_pelt_batch(df, windowless=windowless, init=100)
+            assert res.index.equals(df.index)
+            for pid, task_df in df.groupby('pid'):
+                ref = simulate_pelt(task_df['activations'], windowless=windowless, init=100)
+                pelt = res[res['pid'] == pid]['pelt']
+                assert np.allclose(ref, pelt, rtol=1e-9, atol=1e-6, equal_nan=True)
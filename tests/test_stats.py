@@ -0,0 +1,327 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2024, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats
+
+from lisa.stats import Stats, series_mean_stats, _grouped_bootstrap_interval
+
+
+class TestGroupedBootstrapInterval(TestCase):
+    SIZES = [5, 12, 1, 30, 7]
+
+    def _make_values(self, sizes, seed=0):
+        rng = np.random.default_rng(seed)
+        values = rng.lognormal(1, 0.5, size=sum(sizes))
+        ids = np.repeat(np.arange(len(sizes)), sizes)
+        return (values, ids)
+
+    def _ref_interval(self, values, ids, confidence_level, resamples, seed):
+        """
+        One group at a time with the same draws as
+        :func:`_grouped_bootstrap_interval` when each group is in its own
+        block.
+        """
+        rng = np.random.default_rng(seed)
+        alpha = (1 - confidence_level) / 2
+        low = []
+        high = []
+        for i in range(ids.max() + 1):
+            group = values[ids == i]
+            idx = (rng.random((resamples, len(group))) * len(group)).astype('int64')
+            means = group[idx].mean(axis=1)
+            _low, _high = np.quantile(means, [alpha, 1 - alpha])
+            low.append(_low)
+            high.append(_high)
+        return (np.array(low), np.array(high))
+
+    def test_chunked(self):
+        values, ids = self._make_values(self.SIZES)
+        resamples = 1000
+        # Less than the resamples of a single value, so that each group is
+        # in its own block and resampled a few resamples at a time.
+        max_mem = 16 * resamples // 2
+        low, high = _grouped_bootstrap_interval(
+            values, ids,
+            confidence_level=0.95,
+            resamples=resamples,
+            seed=1,
+            max_mem=max_mem,
+        )
+        ref_low, ref_high = self._ref_interval(
+            values, ids,
+            confidence_level=0.95,
+            resamples=resamples,
+            seed=1,
+        )
+        np.testing.assert_allclose(low, ref_low)
+        np.testing.assert_allclose(high, ref_high)
+
+        # Different draws, but the same interval within the bootstrap noise
+        full_low, full_high = _grouped_bootstrap_interval(
+            values, ids,
+            confidence_level=0.95,
+            resamples=resamples,
+            seed=1,
+        )
+        tolerance = 0.1 * (ref_high - ref_low)
+        assert (abs(full_low - low) <= tolerance).all()
+        assert (abs(full_high - high) <= tolerance).all()
+
+    def test_scipy(self):
+        values, ids = self._make_values([40], seed=2)
+        resamples = 20000
+        low, high = _grouped_bootstrap_interval(
+            values, ids,
+            confidence_level=0.9,
+            resamples=resamples,
+            seed=3,
+        )
+        ref = scipy.stats.bootstrap(
+            (values,),
+            np.mean,
+            confidence_level=0.9,
+            n_resamples=resamples,
+            method='percentile',
+            random_state=4,
+        ).confidence_interval
+        width = ref.high - ref.low
+        assert abs(low[0] - ref.low) < 0.05 * width
+        assert abs(high[0] - ref.high) < 0.05 * width
+
+
+class TestStats(TestCase):
+    MEAN_KINDS = {
+        'a': 'arithmetic',
+        'h': 'harmonic',
+        'g': 'geometric',
+    }
+
+    def _make_df(self, nr_iterations=15):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame.from_records(
+            dict(
+                bench=bench,
+                iteration=i,
+                mean_kind=mean_kind,
+                unit='s',
+                value=rng.lognormal(1, 0.5),
+            )
+            for bench, mean_kind in self.MEAN_KINDS.items()
+            for i in range(nr_iterations)
+        )
+
+    STATS_NAMES = {
+        'arithmetic': ('mean', 'std'),
+        'harmonic': ('hmean', 'hsd'),
+        'geometric': ('gmean', 'gsd'),
+    }
+
+    def _make_boards_df(self, nr_iterations=10):
+        rng = np.random.default_rng(1)
+        return pd.DataFrame.from_records(
+            dict(
+                board=board,
+                bench=bench,
+                run=run,
+                iteration=i,
+                mean_kind=mean_kind,
+                unit='s',
+                value=rng.lognormal(mu, 0.5),
+            )
+            for board, mu in (('juno', 1), ('hikey', 1.2))
+            for bench, mean_kind in self.MEAN_KINDS.items()
+            for run in range(2)
+            for i in range(nr_iterations)
+        )
+
+    def _check_stats(self, df, stats, group_cols):
+        """
+        Check the statistics of each group against the ones computed one group
+        at a time.
+        """
+        res = stats.get_df(compare=False, remove_ref=False)
+        res = res.set_index([*group_cols, 'stat'])
+
+        for key, group in df.groupby(group_cols):
+            values = group['value']
+            mean_kind, = group['mean_kind'].unique()
+            mean, std, _, (ci_minus, ci_plus) = series_mean_stats(values, kind=mean_kind)
+            mean_name, std_name = self.STATS_NAMES[mean_kind]
+
+            row = res.loc[(*key, mean_name)]
+            assert row['value'] == pytest.approx(mean)
+            assert row['ci_minus'] == pytest.approx(ci_minus)
+            assert row['ci_plus'] == pytest.approx(ci_plus)
+            assert res.loc[(*key, std_name), 'value'] == pytest.approx(std)
+            assert res.loc[(*key, 'median'), 'value'] == pytest.approx(values.median())
+            assert res.loc[(*key, 'count'), 'value'] == len(values)
+
+        return res
+
+    def _check_compare(self, df, stats, group_cols):
+        """
+        Check the stat test and the comparison of each group against its
+        reference group.
+        """
+        sub_group_cols = [col for col in group_cols if col != 'board']
+        res = self._check_stats(df, stats, group_cols)
+        compared = stats.df.set_index([*group_cols, 'stat'])
+        assert set(compared.index.get_level_values('board')) == {'hikey'}
+
+        for key, group in df.groupby(sub_group_cols):
+            key = key if isinstance(key, tuple) else (key,)
+            ref = group[group['board'] == 'juno']['value']
+            values = group[group['board'] == 'hikey']['value']
+            # The board is the second level of the index
+            index = (key[0], 'hikey', *key[1:])
+            ref_index = (key[0], 'juno', *key[1:])
+
+            pval = scipy.stats.ks_2samp(ref, values).pvalue
+            assert res.loc[(*index, 'ks2samp_test'), 'value'] == pytest.approx(pval)
+            assert res.loc[(*ref_index, 'ks2samp_test'), 'value'] == pytest.approx(1)
+            row = compared.loc[(*index, 'ks2samp_test')]
+            assert row['value'] == pytest.approx(pval)
+            assert row['unit'] == 'pval'
+
+            mean_kind, = group['mean_kind'].unique()
+            for stat in (*self.STATS_NAMES[mean_kind], 'median', 'count'):
+                val = res.loc[(*index, stat), 'value']
+                ref_val = res.loc[(*ref_index, stat), 'value']
+                row = compared.loc[(*index, stat)]
+                assert row['value'] == pytest.approx(100 * (val / ref_val - 1))
+                assert row['unit'] == '%'
+                assert np.isnan(row['ci_minus'])
+
+    def test_compare(self):
+        df = self._make_boards_df()
+        stats = Stats(
+            df,
+            ref_group={'board': 'juno'},
+            agg_cols=['iteration', 'run'],
+        )
+        self._check_compare(df, stats, ['bench', 'board'])
+
+    def test_compare_subgroups(self):
+        df = self._make_boards_df()
+        # "run" is not aggregated over, so it defines subgroups that are only
+        # compared with the reference subgroup of the same run
+        stats = Stats(
+            df,
+            ref_group={'board': 'juno'},
+            agg_cols=['iteration'],
+        )
+        self._check_compare(df, stats, ['bench', 'board', 'run'])
+
+    def test_ref_group_none(self):
+        df = self._make_boards_df()
+        # The board is only used for grouping, so there is nothing to compare
+        # against
+        stats = Stats(
+            df,
+            ref_group={'board': None},
+            agg_cols=['iteration'],
+        )
+        group_cols = ['bench', 'board', 'run']
+        res = self._check_stats(df, stats, group_cols)
+        assert 'ks2samp_test' not in set(res.index.get_level_values('stat'))
+        pd.testing.assert_frame_equal(
+            stats.df.set_index([*group_cols, 'stat']).sort_index(),
+            res.sort_index(),
+        )
+
+    def test_bootstrap_ci(self):
+        rng = np.random.default_rng(0)
+        # An outlier makes the distribution of the mean skewed in the space it
+        # is computed in, so that the interval is clearly not symmetric.
+        skewed = np.append(rng.uniform(1, 2, 19), 20)
+        inverse = {
+            'arithmetic': lambda x: x,
+            'harmonic': lambda x: 1 / x,
+            'geometric': np.exp,
+        }
+        df = pd.DataFrame.from_records(
+            dict(
+                bench=bench,
+                iteration=i,
+                mean_kind=mean_kind,
+                unit='s',
+                value=value,
+            )
+            for bench, mean_kind in self.MEAN_KINDS.items()
+            for i, value in enumerate(inverse[mean_kind](skewed))
+        )
+        resamples = 20000
+        stats = Stats(
+            df,
+            agg_cols=['iteration'],
+            mean_ci_method='bootstrap',
+            mean_ci_confidence=0.9,
+            bootstrap_resamples=resamples,
+            bootstrap_seed=1,
+        )
+        res = stats.df.set_index(['bench', 'stat'])
+
+        funcs = {
+            'arithmetic': ('mean', np.mean),
+            'harmonic': ('hmean', scipy.stats.hmean),
+            'geometric': ('gmean', scipy.stats.gmean),
+        }
+        for bench, mean_kind in self.MEAN_KINDS.items():
+            stat, func = funcs[mean_kind]
+            row = res.loc[(bench, stat)]
+            mean = row['value']
+            ci_minus = row['ci_minus']
+            ci_plus = row['ci_plus']
+
+            # Undo the +/- format of series_mean_stats()
+            if mean_kind == 'arithmetic':
+                low = mean - ci_minus
+                high = mean + ci_plus
+            elif mean_kind == 'harmonic':
+                low = 1 / (1 / mean + 1 / ci_minus)
+                high = 1 / (1 / mean - 1 / ci_plus)
+            elif mean_kind == 'geometric':
+                low = mean / ci_minus
+                high = mean * ci_plus
+
+            values = df[df['bench'] == bench]['value'].to_numpy()
+            assert mean == pytest.approx(func(values))
+            ref = scipy.stats.bootstrap(
+                (values,),
+                func,
+                confidence_level=0.9,
+                n_resamples=resamples,
+                method='percentile',
+                random_state=2,
+            ).confidence_interval
+            width = ref.high - ref.low
+            assert abs(low - ref.low) < 0.05 * width
+            assert abs(high - ref.high) < 0.05 * width
+
+    def test_bootstrap_resamples(self):
+        with pytest.raises(ValueError):
+            Stats(
+                self._make_df(),
+                agg_cols=['iteration'],
+                mean_ci_method='bootstrap',
+                bootstrap_resamples=0,
+            )
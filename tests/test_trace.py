@@ -19,17 +19,27 @@ import json
 import os
 from unittest import TestCase
 import copy
+import gc
 import math
+import tempfile
+import shutil
+from unittest import mock
 
 import pytest
 import numpy as np
 import pandas as pd
+import polars as pl
+from polars.testing import assert_frame_equal
 
 from devlib.target import KernelVersion
 
-from lisa.trace import Trace, TxtTraceParser, MockTraceParser
+from lisa.trace import Trace, TxtTraceParser, MockTraceParser, MissingTraceEventError, _Trace, _TraceSwapStore, _TraceCache, _CacheDataDesc
+import lisa.trace
+import lisa.analysis.base
+from lisa.analysis.base import TraceAnalysisBase
 from lisa.analysis.tasks import TaskID
-from lisa.datautils import df_squash
+from lisa.analysis.status import StatusAnalysis
+from lisa.datautils import df_squash, _df_to_polars
 from lisa.platforms.platinfo import PlatformInfo
 from .utils import StorageTestCase, ASSET_DIR
 
@@ -67,13 +77,15 @@ class TraceTestCase(StorageTestCase):
         with open(trace_path, "w") as fout:
             fout.write(in_data)
 
-        return Trace(
+        trace = Trace(
             trace_path,
             plat_info=self.plat_info if plat_info is None else plat_info,
             events=self.events if events is None else events,
             normalize_time=False,
             parser=TxtTraceParser.from_txt_file,
         )
+        self.traces.append(trace)
+        return trace
 
     def get_trace(self, trace_name):
         """
@@ -158,6 +170,37 @@ class TestTrace(TraceTestCase):
         assert ana.get_task_name_pids('father') == [1234]
         assert ana.get_task_name_pids('father', ignore_fork=False) == [1234, 5678]
 
+    def test_prefetch(self):
+        trace = Trace(
+            self.trace_path,
+            plat_info=self.plat_info,
+            parser=TxtTraceParser.from_txt_file,
+            enable_swap=False,
+        )
+        methods = [
+            trace.ana.tasks.df_tasks_states,
+            StatusAnalysis.df_overutilized,
+        ]
+        def parser_calls(load_raw_df):
+            return [
+                call
+                for call in load_raw_df.call_args_list
+                if call.args[1]
+            ]
+
+        with mock.patch.object(_Trace, '_load_raw_df', autospec=True, side_effect=_Trace._load_raw_df) as load_raw_df:
+            events = trace.prefetch(methods=methods, events=['cpu_idle'])
+            # Everything was loaded in one go
+            assert len(parser_calls(load_raw_df)) == 1
+            assert {'sched_switch', 'sched_wakeup', 'sched_overutilized'} <= events
+            # Missing events are ignored
+            assert 'cpu_idle' not in events
+
+            assert trace.prefetch(methods=methods, background=True).result() == events
+            # The events are now in the cache
+            trace.ana.status.df_overutilized()
+            assert len(parser_calls(load_raw_df)) == 1
+
     def test_time_range(self):
         """
         TestTrace: time_range is the duration of the trace
@@ -378,6 +421,35 @@ class TestTrace(TraceTestCase):
         # Proxy check for detecting delta computation changes
         assert df.delta.sum() == pytest.approx(134.568219)
 
+    def test_df_task_states_timeline(self):
+        ana = self.trace.ana.tasks
+        timeline = ana._df_tasks_timeline(df_fmt='polars-lazyframe').collect()
+        offsets = ana._df_tasks_timeline_offsets(df_fmt='polars-lazyframe').collect()
+
+        # The rows of each PID are contiguous and cover the whole timeline
+        offsets = offsets.sort('offset')
+        assert offsets['offset'].to_list() == [0, *offsets['len'].cum_sum().to_list()[:-1]]
+        assert offsets['len'].sum() == len(timeline)
+        for pid, offset, length in offsets.select('pid', 'offset', 'len').iter_rows():
+            assert timeline.slice(offset, length)['pid'].unique().to_list() == [pid]
+
+        # Slicing the states of a PID out of the timeline gives the same
+        # result as computing the states of all tasks and filtering on the PID.
+        all_states = ana.df_tasks_states()
+        for pid in offsets['pid'].to_list():
+            expected = all_states[all_states['pid'] == pid].drop(columns=['pid', 'comm'])
+            # Only filter on the PID, as some PIDs have several names
+            states = ana.df_task_states(TaskID(pid=pid, comm=None))
+
+            assert states.columns.tolist() == expected.columns.tolist()
+            # Duplicated timestamps are not shifted the same way in both
+            # dataframes, since they do not contain the same rows.
+            assert states.index.to_numpy() == pytest.approx(expected.index.to_numpy(), abs=1e-6)
+            pd.testing.assert_frame_equal(
+                states.reset_index(drop=True),
+                expected.reset_index(drop=True),
+            )
+
 
 class TestTraceView(TraceTestCase):
 
@@ -495,8 +567,455 @@ class TestMockTraceParser(TestCase):
         assert not df.empty
         assert 'target_cpu' in df.columns
 
+    def test_df_event_columns(self):
+        df = self.trace.df_event('sched_wakeup', columns=['pid', 'target_cpu'])
+        assert list(df.columns) == ['pid', 'target_cpu']
+        assert df['target_cpu'].tolist() == [1, 2, 4]
+
+        view = self.trace.get_view(df_fmt='polars-lazyframe')
+        df = view.df_event('sched_wakeup', columns=['target_cpu'])
+        assert df.columns == ['Time', 'target_cpu']
+
     def test_time_range(self):
         assert self.trace.start.as_nanoseconds == 0
         assert self.trace.end.as_nanoseconds == 42000000000
 
+class _CacheTestAnalysisName:
+    # Not defined in the analysis class itself, so that it does not get
+    # registered as a trace analysis.
+    name = 'cache_test'
+
+
+class _CacheTestAnalysis(_CacheTestAnalysisName, TraceAnalysisBase):
+    calls = []
+
+    @TraceAnalysisBase.df_method
+    def df_dep(self):
+        self.calls.append('df_dep')
+        return pd.DataFrame(
+            dict(foo=[1, 2, 3]),
+            index=pd.Index([0.0, 1.0, 2.0], name='Time'),
+        )
+
+    @TraceAnalysisBase.df_method
+    def df_main(self):
+        self.calls.append('df_main')
+        return self.df_dep() * 2
+
+
+class TestTraceSwap(StorageTestCase):
+    def _make_trace(self, name, store, copy=True):
+        path = os.path.join(self.res_dir, name)
+        if copy:
+            # Preserve the modification time, so that the file does not look
+            # like it is being modified.
+            shutil.copy2(os.path.join(ASSET_DIR, 'trace.txt'), path)
+        trace = Trace(
+            path,
+            events=['sched_switch'],
+            parser=TxtTraceParser.from_txt_file,
+            swap_store=store,
+        )
+        self.traces.append(trace)
+        return trace
+
+    def _test_trace_id_reuse(self, store):
+        trace = self._make_trace('trace.txt', store)
+        trace_id = trace._cache._trace_id
+        assert trace_id is not None
+
+        with mock.patch.object(_Trace, '_get_trace_id') as get_trace_id:
+            trace = self._make_trace('trace.txt', store, copy=False)
+            assert not get_trace_id.called
+        assert trace._cache._trace_id == trace_id
+
+    def test_trace_id_reuse(self):
+        self._test_trace_id_reuse(store=None)
+
+    def test_store_trace_id_reuse(self):
+        store = os.path.join(self.res_dir, 'store')
+        self._test_trace_id_reuse(store=store)
+
+    def test_shared_swap(self):
+        store = os.path.join(self.res_dir, 'store')
+        trace1 = self._make_trace('trace1.txt', store)
+        trace1.df_event('sched_switch')
+        # Swap entries are written in the background
+        trace1.flush()
+
+        # Same content, different path
+        trace2 = self._make_trace('trace2.txt', store)
+        swap_dir = trace2._cache.swap_dir
+        assert swap_dir == trace1._cache.swap_dir
+        assert os.path.dirname(swap_dir) == store
+
+        # The raw event parsed by trace1 is available in the swap
+        desc = trace2._make_raw_cache_desc('sched_switch')
+        assert trace2._cache._is_written_to_swap(desc)
+
+    def test_mem_eviction(self):
+        df = pd.DataFrame(dict(foo=range(1000)))
+        size = _TraceCache._data_mem_usage(df)
+        cache = _TraceCache(max_mem_size=3.5 * size)
+        descs = [
+            _CacheDataDesc(spec=dict(foo=i), fmt='parquet')
+            for i in range(5)
+        ]
+
+        def check(kept):
+            assert cache._mem_usage <= cache.max_mem_size
+            assert {
+                i
+                for i, desc in enumerate(descs)
+                if desc in cache._cache
+            } == kept
+
+        # Entries with unknown compute cost are evicted first
+        cache.insert(descs[0], df.copy())
+        cache.insert(descs[1], df.copy(), compute_cost=10)
+        cache.insert(descs[2], df.copy(), compute_cost=10)
+        cache.insert(descs[3], df.copy(), compute_cost=10)
+        check({1, 2, 3})
+
+        # Among entries with the same score, the least recently used is
+        # evicted first
+        cache.fetch(descs[1])
+        cache.insert(descs[4], df.copy(), compute_cost=10)
+        check({1, 3, 4})
+
+    def test_async_swap(self):
+        trace = self._make_trace('trace.txt', store=None)
+        cache = trace._cache
+        desc = trace._make_raw_cache_desc('sched_switch')
+
+        trace.df_event('sched_switch')
+        # Evicting while the write might still be in flight must not lose
+        # the data
+        cache.evict(desc)
+        assert cache.fetch(desc, insert=False) is not None
+
+        cache.flush()
+        assert not cache._swap_pending
+        assert cache._is_written_to_swap(desc)
+
+    def test_fetch_pending_scrub(self):
+        df = pd.DataFrame(dict(foo=range(1000)))
+        size = _TraceCache._data_mem_usage(df)
+        swap_dir = os.path.join(self.res_dir, 'swap')
+        os.makedirs(swap_dir)
+        cache = _TraceCache(max_mem_size=2.5 * size, swap_dir=swap_dir)
+        descs = [
+            _CacheDataDesc(spec=dict(foo=i), fmt='parquet')
+            for i in range(3)
+        ]
+
+        # Keep the writes to the swap pending forever
+        with mock.patch.object(lisa.trace._SWAP_WRITER, 'submit'):
+            cache.insert(descs[0], df.copy(), compute_cost=1)
+            cache.insert(descs[1], df.copy(), compute_cost=1)
+            cache.evict(descs[0])
+            assert descs[0] in cache._swap_pending
+            cache.insert(descs[2], df.copy(), compute_cost=1)
+
+            # Fetching the pending entry puts it back in memory, which must
+            # not exceed the budget
+            data = cache.fetch(descs[0])
+            assert data is not None
+            assert cache._mem_usage <= cache.max_mem_size
+            assert descs[0] in cache._cache
+
+    def test_scrub_swap_in_flight(self):
+        df = pd.DataFrame(dict(foo=range(1000)))
+        swap_dir = os.path.join(self.res_dir, 'swap')
+        os.makedirs(swap_dir)
+        cache = _TraceCache(swap_dir=swap_dir, async_swap=False)
+        desc = _CacheDataDesc(spec=dict(foo=0), fmt='parquet')
+        write_data = cache._write_data
+
+        # Scrub the swap area from another writer while the data file is
+        # written but not yet referenced by the swap content
+        def racing_write_data(*args, **kwargs):
+            write_data(*args, **kwargs)
+            cache._scrub_swap(swap_dir)
+
+        with mock.patch.object(cache, '_write_data', racing_write_data):
+            cache.insert(desc, df, write_swap=True, force_write_swap=True)
+
+        swap_entry = cache._swap_content[desc.normal_form]
+        assert os.path.exists(os.path.join(swap_dir, swap_entry.data_filename))
+        cache.evict(desc)
+        assert cache.fetch(desc) is not None
+
+    def test_df_method_code_change(self):
+        store = os.path.join(self.res_dir, 'store')
+        get_code_token = lisa.analysis.base._get_code_token
+
+        def check(name, expected_calls, changed=()):
+            def _get_code_token(module, qualname):
+                token = get_code_token(module, qualname)
+                if qualname.split('.')[-1] in changed:
+                    token = f'changed-{token}'
+                return token
+
+            # Each trace has its own memory cache, so results can only be
+            # shared through the swap, like between different processes.
+            trace = self._make_trace(name, store)
+            calls = _CacheTestAnalysis.calls
+            calls.clear()
+            with mock.patch.object(lisa.analysis.base, '_get_code_token', _get_code_token), \
+                 mock.patch.object(_TraceCache, '_should_evict_to_swap', return_value=True):
+                df = _CacheTestAnalysis(trace).df_main()
+                trace.flush()
+
+            assert df['foo'].tolist() == [2, 4, 6]
+            assert sorted(calls) == sorted(expected_calls)
+
+        check('trace1.txt', ['df_main', 'df_dep'])
+        # Nothing changed
+        check('trace2.txt', [])
+        # Changing a dependency invalidates the result
+        check('trace3.txt', ['df_main', 'df_dep'], changed={'df_dep'})
+        # Changing the function itself does not affect its dependency
+        check('trace4.txt', ['df_main'], changed={'df_main'})
+        check('trace5.txt', [], changed={'df_main'})
+
+    def test_swap_companion(self):
+        trace = self._make_trace('trace.txt', store=None)
+        cache = trace._cache
+        desc = _CacheDataDesc(spec=dict(foo=1), fmt='parquet')
+        companion = _CacheDataDesc(spec=dict(foo=1, companion=True), fmt='json')
+        df = pd.DataFrame(dict(bar=[1, 2, 3]))
+
+        # The companion is not written to the swap unless the data are
+        with mock.patch.object(_TraceCache, '_should_evict_to_swap', return_value=False):
+            cache.insert(desc, df, write_swap=True, swap_companion=(companion, [42]))
+            cache.flush()
+            assert not cache._is_written_to_swap(desc)
+            assert not cache._is_written_to_swap(companion)
+            assert cache.fetch(companion) == [42]
+
+            # Evicting the data without writing them discards the companion
+            cache.evict(desc)
+            with pytest.raises(KeyError):
+                cache.fetch(companion)
+
+        cache.insert(desc, df, write_swap=True, swap_companion=(companion, [42]))
+        cache.write_swap(desc, force=True)
+        cache.flush()
+        assert cache._is_written_to_swap(desc)
+        assert cache._is_written_to_swap(companion)
+
+        cache.evict(desc)
+        assert cache.fetch(companion) == [42]
+
+    def test_scrub(self):
+        store = _TraceSwapStore(os.path.join(self.res_dir, 'store'), max_size=1)
+        trace = self._make_trace('trace1.txt', store)
+        trace.df_event('sched_switch')
+        swap_dir = trace._cache.swap_dir
+
+        # In use, so it cannot be removed
+        store.scrub()
+        assert os.path.exists(swap_dir)
+
+        # Once the trace is gone, the swap area is not in use anymore
+        trace.flush()
+        self.traces.remove(trace)
+        del trace
+        gc.collect()
+        store.scrub()
+        assert not os.path.exists(swap_dir)
+
+
+class _SmallChunksTxtTraceParser(TxtTraceParser):
+    # Make sure the trace is split in many chunks
+    _PARALLEL_CHUNK_LINES = 37
+
+
+class _SmallBlocksTxtTraceParser(TxtTraceParser):
+    # Make sure the index has many blocks
+    _INDEX_BLOCK_SIZE = 300
+
+
+class TestTxtTraceParser(TestCase):
+    events = ['sched_switch', 'sched_wakeup', 'sched_overutilized']
+
+    def _check_parallel(self, make_parser):
+        serial = make_parser()
+        parallel = make_parser(jobs=3)
+
+        assert serial.get_metadata('time-range') == parallel.get_metadata('time-range')
+        assert serial.get_metadata('available-events') == parallel.get_metadata('available-events')
+
+        for event in self.events:
+            pd.testing.assert_frame_equal(
+                serial.parse_event(event),
+                parallel.parse_event(event),
+            )
+
+    def test_parallel(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def make_parser(**kwargs):
+                return _SmallChunksTxtTraceParser.from_txt_file(
+                    os.path.join(ASSET_DIR, 'trace.txt'),
+                    events=self.events,
+                    temp_dir=temp_dir,
+                    **kwargs
+                )
+
+            self._check_parallel(make_parser)
+
+    def test_parallel_duplicated_timestamps(self):
+        # Runs of identical timestamps crossing the chunk boundaries
+        line = '          father-1234  [002] {ts}: {event}:          prev_comm=father prev_pid=1234 prev_prio=120 prev_state=0 next_comm=father next_pid=5678 next_prio=120'
+        txt = '\n'.join(
+            line.format(
+                ts=f'{18765 + i // 50}.000001',
+                event=self.events[i % 2],
+            )
+            for i in range(500)
+        )
+        self.events = self.events[:1]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def make_parser(**kwargs):
+                return _SmallChunksTxtTraceParser.from_string(
+                    txt,
+                    events=self.events,
+                    temp_dir=temp_dir,
+                    **kwargs
+                )
+
+            self._check_parallel(make_parser)
+
+    def test_stream(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def make_parser(**kwargs):
+                return TxtTraceParser.from_txt_file(
+                    os.path.join(ASSET_DIR, 'trace.txt'),
+                    events=self.events,
+                    temp_dir=temp_dir,
+                    **kwargs
+                )
+
+            parser = make_parser()
+            streamed = make_parser(stream_chunk_size=100)
+
+            assert parser.get_metadata('available-events') == streamed.get_metadata('available-events')
+
+            for event in self.events:
+                df = parser.parse_event(event)
+                df.index.name = 'Time'
+                streamed_df = streamed.parse_event(event)
+                assert isinstance(streamed_df, pl.LazyFrame)
+
+                assert_frame_equal(
+                    _df_to_polars(df).collect(),
+                    streamed_df.collect(),
+                    categorical_as_str=True,
+                )
+
+    def test_events_index(self):
+        path = os.path.join(ASSET_DIR, 'trace.txt')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def make_parser(event, **kwargs):
+                return _SmallBlocksTxtTraceParser.from_txt_file(
+                    path,
+                    events=[event],
+                    temp_dir=temp_dir,
+                    **kwargs
+                )
+
+            index = make_parser('sched_switch').get_metadata('events-index')
+            assert len(index['blocks']) > 1
+            # Rare events are only found in a handful of blocks
+            assert len(index['events']['sched_overutilized']) < len(index['blocks'])
+
+            for event in self.events:
+                parser = make_parser(event)
+                indexed = make_parser(event, events_index=index)
+
+                assert parser.get_metadata('time-range') == indexed.get_metadata('time-range')
+                assert parser.get_metadata('available-events') == indexed.get_metadata('available-events')
+                pd.testing.assert_frame_equal(
+                    parser.parse_event(event),
+                    indexed.parse_event(event),
+                )
+
+            with pytest.raises(MissingTraceEventError):
+                make_parser('foobar', events_index=index).parse_event('foobar')
+
+    def test_optimized_dtypes(self):
+        txt = '\n'.join([
+            '          father-1234  [002] 18765.000001: sched_switch:          prev_comm=father prev_pid=1234 prev_prio=120 prev_state=0 next_comm=son next_pid=5678 next_prio=120',
+            '             son-5678  [002] 18765.000002: sched_switch:          prev_comm=son prev_pid=5678 prev_prio=120 prev_state=1 next_comm=father next_pid=1234 next_prio=120',
+            '          <idle>-0     [001] 18765.000003: cpu_idle:             state=1 cpu_id=1',
+            '          <idle>-0     [001] 18765.000004: cpu_idle:             state=4294967295 cpu_id=1',
+        ])
+        expected = {
+            'sched_switch': {
+                '__cpu': ('uint16', pl.UInt16),
+                '__pid': ('uint32', pl.UInt32),
+                'prev_pid': ('uint32', pl.UInt32),
+                'next_pid': ('uint32', pl.UInt32),
+                'prev_prio': ('int16', pl.Int16),
+                'next_prio': ('int16', pl.Int16),
+                'prev_state': ('uint16', pl.UInt16),
+                'prev_comm': ('category', pl.Categorical),
+                'next_comm': ('category', pl.Categorical),
+            },
+            'cpu_idle': {
+                '__cpu': ('uint16', pl.UInt16),
+                'cpu_id': ('uint16', pl.UInt16),
+                'state': ('int64', pl.Int64),
+            },
+        }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def make_parser(**kwargs):
+                return TxtTraceParser.from_string(
+                    txt,
+                    events=list(expected.keys()),
+                    temp_dir=temp_dir,
+                    **kwargs
+                )
+
+            parser = make_parser()
+            streamed = make_parser(stream_chunk_size=100)
+
+            for event, dtypes in expected.items():
+                df = parser.parse_event(event)
+                assert isinstance(df, pd.DataFrame)
+                for col, (dtype, _) in dtypes.items():
+                    assert df[col].dtype.name == dtype
+
+                df = streamed.parse_event(event)
+                assert isinstance(df, pl.LazyFrame)
+                for col, (_, dtype) in dtypes.items():
+                    assert df.schema[col] == dtype
+
+    def test_optimized_dtypes_out_of_range(self):
+        # A CPU number too big for the narrow dtype leaves the column as-is
+        # rather than wrapping around.
+        df = pd.DataFrame(dict(
+            cpu=np.array([1, 70000], dtype='int64'),
+            prio=np.array([120, 100], dtype='int64'),
+        ))
+        optimized = TxtTraceParser._optimize_dtypes(df)
+        assert optimized['cpu'].dtype.name == 'int64'
+        assert optimized['prio'].dtype.name == 'int16'
+        assert optimized['cpu'].tolist() == [1, 70000]
+
+        df = pl.LazyFrame(dict(
+            cpu=pl.Series([1, 70000], dtype=pl.Int64),
+            prio=pl.Series([120, 100], dtype=pl.Int64),
+        ))
+        # The schema of a LazyFrame does not depend on the data, so the
+        # collection fails instead.
+        optimized = TxtTraceParser._optimize_dtypes(df)
+        assert optimized.schema['cpu'] == pl.Int16
+        assert optimized.schema['prio'] == pl.Int16
+        with pytest.raises((pl.ComputeError, pl.InvalidOperationError)):
+            optimized.collect()
+
 # vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
@@ -57,6 +57,11 @@ class StorageTestCase(TestCase):
 
     def setup_method(self, method):
         self.res_dir = tempfile.mkdtemp()
+        # Traces with a swap area in res_dir, which may still have swap
+        # entries being written in the background
+        self.traces = []
 
     def teardown_method(self, method):
+        for trace in self.traces:
+            trace.flush()
         shutil.rmtree(self.res_dir)
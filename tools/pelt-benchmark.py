@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2024, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the speed and the output of the PELT simulation engines of
+:func:`lisa.pelt.simulate_pelt` on a random periodic-ish task.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from lisa.pelt import simulate_pelt
+
+
+def make_activations(nr_activations, mean_duration, seed):
+    rng = np.random.default_rng(seed)
+    index = np.cumsum(rng.exponential(mean_duration, nr_activations))
+    return pd.Series(np.arange(nr_activations) % 2, index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--activations', type=int, default=100000,
+        help='Number of activations to simulate')
+    parser.add_argument('--mean-duration', type=float, default=4e-3,
+        help='Mean duration of activations and sleeps in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    activations = make_activations(
+        nr_activations=args.activations,
+        mean_duration=args.mean_duration,
+        seed=args.seed,
+    )
+
+    for windowless in (False, True):
+        results = {}
+        for engine in ('python', 'numpy'):
+            start = time.perf_counter()
+            pelt = simulate_pelt(
+                activations,
+                windowless=windowless,
+                engine=engine,
+            )
+            results[engine] = (pelt, time.perf_counter() - start)
+
+        (ref, ref_time), (new, new_time) = results['python'], results['numpy']
+        error = (ref - new).abs().max()
+        mode = 'windowless' if windowless else 'windowed'
+        print(f'{mode}: python={ref_time:.3f}s numpy={new_time:.3f}s speedup={ref_time / new_time:.1f}x max abs error={error:.3g}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2024, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the speed of the pandas and polars implementations of
+:func:`lisa.datautils.df_window_signals` on a random event dataframe.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from lisa.datautils import df_window_signals, SignalDesc
+
+
+def make_df(nr_rows, nr_cpus, nr_pids, seed):
+    rng = np.random.default_rng(seed)
+    index = np.cumsum(rng.integers(1, 10000, nr_rows))
+    return pd.DataFrame(
+        dict(
+            cpu=rng.integers(0, nr_cpus, nr_rows),
+            pid=rng.integers(0, nr_pids, nr_rows),
+            value=rng.random(nr_rows),
+        ),
+        index=pd.Index(index / 1e9, name='Time'),
+    )
+
+
+def to_polars(df):
+    df = df.reset_index()
+    df['Time'] = pd.to_timedelta(df['Time'], unit='s')
+    return pl.from_pandas(df).lazy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000,
+        help='Number of rows of the dataframe')
+    parser.add_argument('--cpus', type=int, default=8,
+        help='Number of distinct values of the "cpu" signal column')
+    parser.add_argument('--pids', type=int, default=1000,
+        help='Number of distinct values of the "pid" signal column')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pandas_df = make_df(
+        nr_rows=args.rows,
+        nr_cpus=args.cpus,
+        nr_pids=args.pids,
+        seed=args.seed,
+    )
+    polars_df = to_polars(pandas_df)
+
+    start, end = pandas_df.index[0], pandas_df.index[-1]
+    duration = end - start
+    window = (start + duration / 2, start + duration * 3 / 4)
+    signals = [
+        SignalDesc('event', ['cpu']),
+        SignalDesc('event', ['pid']),
+    ]
+
+    for compress_init in (False, True):
+        results = {}
+        for name, df in (('pandas', pandas_df), ('polars', polars_df)):
+            t0 = time.perf_counter()
+            res = df_window_signals(
+                df,
+                window=window,
+                signals=signals,
+                compress_init=compress_init,
+            )
+            if isinstance(res, pl.LazyFrame):
+                res = res.collect()
+            results[name] = (len(res), time.perf_counter() - t0)
+
+        (ref_len, ref_time), (new_len, new_time) = results['pandas'], results['polars']
+        print(f'compress_init={compress_init}: pandas={ref_time:.3f}s ({ref_len} rows) polars={new_time:.3f}s ({new_len} rows) speedup={ref_time / new_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()